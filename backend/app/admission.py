@@ -0,0 +1,213 @@
+import asyncio
+from contextlib import contextmanager
+from sqlalchemy import func
+from .config import settings
+from .database import engine, SessionLocal
+from .models.job import QuizJob
+from .metrics import HTTP_IN_FLIGHT, LLM_IN_FLIGHT, REQUESTS_SHED
+
+CRITICAL = "critical"
+NORMAL = "normal"
+LOW = "low"
+
+# Never shed: dropping these loses a student's answers or blinds the platform
+CRITICAL_PATHS = ("/health", "/ready", "/metrics", "/api/quiz/submit", "/api/quiz/review/submit")
+
+# Shed first: each one waits on the LLM
+LLM_POSTS = {
+    "/api/learning/explain",
+    "/api/learning/practice",
+    "/api/learning/lesson",
+    "/api/learning/chat",
+    "/api/quiz/generate",
+    "/api/quiz/assignments",
+}
+# Reports nobody is waiting on
+LOW_PREFIXES = ("/api/usage/",)
+
+SHED_BODY = b'{"detail":"Server is busy, please retry shortly"}'
+
+
+def priority_of(method: str, path: str) -> str:
+    if method == "OPTIONS" or path.startswith(CRITICAL_PATHS):
+        return CRITICAL
+    if (method == "POST" and path in LLM_POSTS) or path.startswith(LOW_PREFIXES):
+        return LOW
+    return NORMAL
+
+
+class AdmissionController:
+    """
+    Tracks how saturated this worker is and decides which requests to
+    turn away before they queue behind the LLM or the DB pool.
+
+    Four signals, each a share of its limit:
+    - requests: HTTP requests in progress (the queue in front of
+      everything else) out of ADMISSION_MAX_IN_FLIGHT
+    - llm_calls: LLM calls in progress (requests, quiz jobs and sockets)
+      out of ADMISSION_MAX_LLM_CALLS
+    - db_pool: connections checked out of the pool out of its size + overflow
+    - quiz_jobs: quiz jobs waiting in the queue (shared by every worker)
+      out of ADMISSION_MAX_QUEUED_JOBS. Counted by a background task
+      every ADMISSION_QUEUE_REFRESH_SECONDS, not per request.
+
+    Low-priority endpoints are shed once any signal reaches
+    ADMISSION_SHED_LOW_AT, which is also when /ready starts failing.
+    Normal endpoints are shed only when requests or db_pool are at their
+    limit; LLM saturation doesn't slow them down. Critical endpoints are
+    never shed.
+
+    The other counts are per worker process, like the event loop and
+    pool they describe.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        max_llm_calls: int,
+        shed_low_at: float,
+        retry_after: int,
+        max_queued_jobs: int,
+        refresh_seconds: float
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_llm_calls = max_llm_calls
+        self.shed_low_at = shed_low_at
+        self.retry_after = retry_after
+        self.max_queued_jobs = max_queued_jobs
+        self.refresh_seconds = refresh_seconds
+        self.in_flight = 0
+        self.llm_calls = 0
+        self.queued_jobs = 0
+        self._refresher = None
+
+    @contextmanager
+    def llm_call(self):
+        """Count one LLM call for as long as the block runs."""
+        self.llm_calls += 1
+        LLM_IN_FLIGHT.inc()
+        try:
+            yield
+        finally:
+            self.llm_calls -= 1
+            LLM_IN_FLIGHT.dec()
+
+    def refresh(self):
+        """Re-count the queued quiz jobs (one COUNT on the status index)."""
+        db = SessionLocal()
+        try:
+            self.queued_jobs = db.query(func.count(QuizJob.id)).filter(
+                QuizJob.status == "queued"
+            ).scalar()
+        finally:
+            db.close()
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.refresh)
+            except Exception as e:
+                # Keep the last count; the DB being down shows up elsewhere
+                print(f"Could not count queued quiz jobs: {e}")
+            await asyncio.sleep(self.refresh_seconds)
+
+    async def start(self):
+        self._refresher = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._refresher is not None:
+            self._refresher.cancel()
+            await asyncio.gather(self._refresher, return_exceptions=True)
+            self._refresher = None
+
+    def _pool_load(self) -> float:
+        pool = engine.pool
+        # Pools without a fixed size (SQLite in-memory, unlimited overflow) never saturate
+        max_overflow = getattr(pool, "_max_overflow", -1)
+        if not hasattr(pool, "checkedout") or max_overflow < 0:
+            return 0.0
+        return pool.checkedout() / (pool.size() + max_overflow)
+
+    def loads(self) -> dict:
+        return {
+            "requests": self.in_flight / self.max_in_flight,
+            "llm_calls": self.llm_calls / self.max_llm_calls,
+            "db_pool": self._pool_load(),
+            "quiz_jobs": self.queued_jobs / self.max_queued_jobs
+        }
+
+    def shed_reason(self, priority: str, loads: dict = None) -> str:
+        """The saturated signal a request of this priority is shed for, or None to admit it."""
+        if priority == CRITICAL:
+            return None
+        loads = loads or self.loads()
+        if priority == LOW:
+            limits = {name: self.shed_low_at for name in loads}
+        else:
+            limits = {"requests": 1.0, "db_pool": 1.0}
+        for name, limit in limits.items():
+            if loads[name] >= limit:
+                return name
+        return None
+
+    def readiness(self) -> dict:
+        """Body of GET /ready."""
+        loads = self.loads()
+        return {
+            "ready": self.shed_reason(LOW, loads) is None,
+            "in_flight": self.in_flight,
+            "llm_calls": self.llm_calls,
+            "queued_jobs": self.queued_jobs,
+            "loads": {name: round(load, 3) for name, load in loads.items()}
+        }
+
+
+class AdmissionMiddleware:
+    """
+    Answers 503 with Retry-After for requests the AdmissionController
+    sheds, before any routing, DB or LLM work, and counts the rest as in
+    flight until their response is finished (streams included).
+    """
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        priority = priority_of(scope["method"], scope["path"])
+        reason = self.controller.shed_reason(priority)
+        if reason is not None:
+            REQUESTS_SHED.labels(priority=priority, reason=reason).inc()
+            await send({
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(SHED_BODY)).encode()),
+                    (b"retry-after", str(self.controller.retry_after).encode())
+                ]
+            })
+            await send({"type": "http.response.body", "body": SHED_BODY})
+            return
+
+        self.controller.in_flight += 1
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.in_flight -= 1
+            HTTP_IN_FLIGHT.dec()
+
+
+# Singleton instance
+admission = AdmissionController(
+    max_in_flight=settings.ADMISSION_MAX_IN_FLIGHT,
+    max_llm_calls=settings.ADMISSION_MAX_LLM_CALLS,
+    shed_low_at=settings.ADMISSION_SHED_LOW_AT,
+    retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS,
+    max_queued_jobs=settings.ADMISSION_MAX_QUEUED_JOBS,
+    refresh_seconds=settings.ADMISSION_QUEUE_REFRESH_SECONDS
+)
@@ -0,0 +1,117 @@
+import gzip
+from starlette.datastructures import Headers, MutableHeaders
+
+# Optional: brotli is preferred when installed and the client accepts it
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript")
+
+
+def _accepted(accept_encoding: str) -> set:
+    """Codings the client accepts (q > 0) from an Accept-Encoding header."""
+    codings = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q=") and q[2:].strip() in ("0", "0.0", "0.00", "0.000"):
+            continue
+        codings.add(name.strip())
+    return codings
+
+
+class CompressionMiddleware:
+    """
+    Brotli or gzip for response bodies of at least `minimum_size` bytes.
+
+    Only single-message bodies are compressed. Streamed responses
+    (explanations, practice questions) pass through untouched, so their
+    chunks still reach the client as soon as they are generated.
+
+    Every response of a compressible type gets `Vary: Accept-Encoding`,
+    compressed or not: another client asking for the same URL might get
+    it compressed, so shared caches must key on that header.
+
+    Plain ASGI, like MetricsMiddleware, so nothing is buffered for
+    responses that aren't compressed.
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _choose(self, scope) -> str:
+        accepted = _accepted(Headers(scope=scope).get("accept-encoding", ""))
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    @staticmethod
+    def _compressible(headers) -> bool:
+        return (
+            "content-encoding" not in headers
+            and headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+        )
+
+    def _compress(self, coding: str, body: bytes) -> bytes:
+        if coding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        coding = self._choose(scope)
+
+        start = None
+        passing_through = False
+
+        async def send_compressed(message):
+            nonlocal start, passing_through
+            if passing_through:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=list(message["headers"]))
+                if not self._compressible(headers):
+                    passing_through = True
+                    await send(message)
+                    return
+                headers.add_vary_header("Accept-Encoding")
+                message = dict(message, headers=headers.raw)
+                if coding is None:
+                    passing_through = True
+                    await send(message)
+                    return
+                # Hold the headers until the first body message shows whether to compress
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=list(start["headers"]))
+            body = message.get("body", b"")
+            compress = not message.get("more_body", False) and len(body) >= self.minimum_size
+            if compress:
+                compressed = self._compress(coding, body)
+                compress = len(compressed) < len(body)
+
+            if not compress:
+                passing_through = True
+                await send(start)
+                await send(message)
+                return
+
+            headers["Content-Encoding"] = coding
+            headers["Content-Length"] = str(len(compressed))
+            await send(dict(start, headers=headers.raw))
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
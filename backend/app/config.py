@@ -22,6 +22,86 @@ class Settings(BaseSettings):
     # CORS
     FRONTEND_URL: str = "http://localhost:3000"
 
+    # LLM backend
+    LLM_BACKEND: str = "groq"                   # or "fake": offline replies for load tests, no API calls
+    FAKE_LLM_LATENCY_MS: float = 1500.0         # median simulated reply time
+    FAKE_LLM_LATENCY_SIGMA: float = 0.4         # log-normal spread of reply times (0 = fixed)
+    FAKE_LLM_ERROR_RATE: float = 0.0            # share of simulated calls that fail
+    FAKE_LLM_SEED: int = 0                      # makes latency/error draws repeatable
+
+    # LLM record/replay
+    LLM_CASSETTE_MODE: str = "off"              # "record" saves every reply, "replay" answers from recordings only
+    LLM_CASSETTE_DIR: str = "./cassettes"       # one JSON file per recorded prompt
+    LLM_CASSETTE_TIME_SCALE: float = 1.0        # replay delay vs recorded latency (1 = original, 0 = instant)
+
+    # Greeting template pool
+    GREETING_POOL_SIZE: int = 8                 # templates kept per level
+    GREETING_REFRESH_SECONDS: int = 6 * 60 * 60 # how often the LLM refreshes a pool
+
+    # LLM usage ledger
+    LLM_DAILY_TOKEN_BUDGET: int = 0             # per user, 0 = unlimited
+    USAGE_BATCH_SIZE: int = 50                  # rows per ledger insert
+    USAGE_FLUSH_SECONDS: float = 2.0            # max delay before a partial batch is written
+
+    # Tutor chat context
+    CHAT_RECENT_TURNS: int = 8                  # messages kept verbatim
+    CHAT_CONTEXT_TOKEN_BUDGET: int = 3000       # max prompt size per chat reply
+    CHAT_GROUNDING_TOKENS: int = 1200           # share of the budget for the lesson explanation
+
+    # Live tutoring WebSocket
+    WS_FLUSH_SECONDS: float = 2.0               # max delay before staged DB writes are committed
+    WS_FLUSH_BATCH_SIZE: int = 20               # commit early once this many writes are staged
+    WS_MAX_CONCURRENT_MESSAGES: int = 4         # messages handled at once per socket
+
+    # Quiz generation jobs
+    QUIZ_JOB_WORKERS: int = 2                   # worker tasks per process
+    QUIZ_JOB_CONCURRENCY: int = 2               # jobs each worker runs at once
+    QUIZ_JOB_MAX_ATTEMPTS: int = 3              # tries before a job is marked failed
+    QUIZ_JOB_POLL_SECONDS: float = 5.0          # idle workers re-check the queue table this often
+    QUIZ_JOB_LEASE_SECONDS: float = 60.0        # running jobs not renewed for this long are requeued
+
+    # Idempotency keys
+    IDEMPOTENCY_TTL_SECONDS: int = 24 * 60 * 60 # how long a stored response is replayed
+
+    # Popularity-driven pregeneration
+    PREGEN_ENABLED: bool = False                # run the nightly pregeneration job
+    PREGEN_HOUR_UTC: int = 3                    # when the nightly run starts
+    PREGEN_TOP_K: int = 200                     # most popular keys to keep warm
+    PREGEN_TOKEN_BUDGET: int = 300_000          # estimated tokens one night may spend
+    PREGEN_TTL_HOURS: int = 36                  # how long pregenerated content is served
+    PREGEN_QUIZ_POOL_SIZE: int = 10             # questions pregenerated per quiz key
+    POPULARITY_HALF_LIFE_HOURS: float = 72.0    # how fast old requests stop counting
+
+    # State shared by worker processes (quota counters, caches, in-flight claims)
+    SHARED_STATE_URL: str = "sqlite:///./shared_state.db"  # or memory:// (one worker), redis://host:6379/0
+
+    # Admission control (per worker process)
+    ADMISSION_ENABLED: bool = True              # shed requests with 503 when the worker is saturated
+    ADMISSION_MAX_IN_FLIGHT: int = 64           # requests in progress before normal endpoints are shed
+    ADMISSION_MAX_LLM_CALLS: int = 16           # LLM calls in progress counted as full LLM load
+    ADMISSION_SHED_LOW_AT: float = 0.8          # share of any limit at which LLM endpoints are shed and /ready fails
+    ADMISSION_MAX_QUEUED_JOBS: int = 50         # queued quiz jobs counted as a full job queue
+    ADMISSION_QUEUE_REFRESH_SECONDS: float = 2.0  # how often the queued quiz job count is re-read
+    ADMISSION_RETRY_AFTER_SECONDS: int = 5      # Retry-After sent with shed responses
+
+    # Inbound rate limits (sliding window, per worker process; 0 = unlimited)
+    RATE_LIMIT_ENABLED: bool = True             # answer 429 to clients over their limit
+    RATE_LIMIT_WINDOW_SECONDS: int = 60
+    RATE_LIMIT_LLM_PER_USER: int = 10           # LLM endpoint calls per username per window, across all workers
+    RATE_LIMIT_LLM_PER_IP: int = 30             # per client IP (a classroom can share one), across all workers
+    RATE_LIMIT_CHEAP_PER_USER: int = 30         # other requests per username per window, per worker (x4 workers = 120)
+    RATE_LIMIT_CHEAP_PER_IP: int = 150          # per client IP, per worker (x4 workers = 600)
+    RATE_LIMIT_MAX_KEYS: int = 50_000           # usernames/IPs tracked per per-worker limit; least recently seen are evicted
+
+    # Response compression
+    COMPRESSION_MIN_BYTES: int = 1024           # smaller bodies are sent as-is
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4         # used when the brotli package is installed
+
+    # Startup
+    AUTO_CREATE_SCHEMA: bool = True             # create missing tables when the app starts
+    WARMUP_ON_STARTUP: bool = True              # import langchain and fill greeting pools in the background after start
+
 
 @lru_cache()
 def get_settings():
@@ -0,0 +1,50 @@
+from sqlalchemy import event, inspect
+from .database import SessionLocal
+
+# Model class -> callbacks run with the column values of each committed insert
+_insert_hooks = {}
+
+
+def on_insert_committed(model, callback):
+    """
+    Call `callback(values)` for every row of `model` added through an ORM
+    session, once its transaction commits.
+
+    `values` is a dict of the row's column values as flushed (columns
+    filled in by server defaults are left out). Rolled-back
+    inserts never reach the callback. Bulk inserts bypass the session's
+    unit of work and are not seen.
+    """
+    _insert_hooks.setdefault(model, []).append(callback)
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _collect_inserts(session, flush_context):
+    # The new objects are still listed here and have their ids and defaults
+    for obj in session.new:
+        callbacks = _insert_hooks.get(type(obj))
+        if not callbacks:
+            continue
+        # Only what is already loaded: server defaults would cost a query each
+        state = inspect(obj)
+        values = {
+            attr.key: state.dict[attr.key]
+            for attr in state.mapper.column_attrs
+            if attr.key in state.dict
+        }
+        pending = session.info.setdefault("committed_insert_hooks", [])
+        pending.extend((callback, values) for callback in callbacks)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _run_insert_hooks(session):
+    for callback, values in session.info.pop("committed_insert_hooks", []):
+        try:
+            callback(values)
+        except Exception as e:
+            print(f"Insert hook {callback.__qualname__} failed: {e}")
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _drop_insert_hooks(session):
+    session.info.pop("committed_insert_hooks", None)
@@ -1,16 +1,103 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .database import engine, Base
-from .routes import learning, profile, quiz
+from fastapi.responses import JSONResponse
+from .routes import learning, profile, quiz, usage, live
+from .services.ai_service import ai_service
+from .services.greeting_service import greeting_engine
+from .services.usage_ledger import usage_ledger
+from .services.job_queue import quiz_jobs
+from .services.topic_index import topic_index
+from .services.popularity import popularity
+from .services.pregeneration import pregeneration
+from .services.shared_state import shared_state
+from .schema import create_schema
+from .database import engine
+from .metrics import MetricsMiddleware, TimedRoute, instrument_engine, metrics_response
+from .compression import CompressionMiddleware
+from .admission import AdmissionMiddleware, admission
+from .rate_limit import RateLimitMiddleware
+from .config import settings
+
+
+async def warm_up():
+    """Import langchain, build the LLM client and fill the greeting pools"""
+    await asyncio.to_thread(ai_service.warm)
+    await greeting_engine.warm()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Startup and shutdown.
+
+    Nothing heavy happens at import time: the schema check, background
+    workers and in-memory indexes start here, and the index loads and
+    warm-up run in the background so the server answers right away.
+    """
+    if settings.AUTO_CREATE_SCHEMA:
+        await asyncio.to_thread(create_schema)
+
+    # Batched LLM usage ledger writer
+    await usage_ledger.start()
+    # Resume queued quiz jobs and start the worker pool
+    await quiz_jobs.start()
+    # Keep the queued quiz job count admission control sheds on up to date
+    await admission.start()
+
+    background = [
+        # Topic autocomplete and popularity, from past sessions
+        asyncio.create_task(asyncio.to_thread(topic_index.load)),
+        asyncio.create_task(asyncio.to_thread(popularity.load)),
+    ]
+    if settings.WARMUP_ON_STARTUP:
+        background.append(asyncio.create_task(warm_up()))
+    if settings.PREGEN_ENABLED:
+        pregeneration.start()
+
+    yield
+
+    for task in background:
+        task.cancel()
+    await pregeneration.stop()
+    await admission.stop()
+    # Jobs still running go back to the queue
+    await quiz_jobs.stop()
+    # Write out any LLM usage entries still queued
+    await usage_ledger.stop()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title="GenAI Tutor API",
     description="AI-powered personalized tutoring platform",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
+# Render time (response_model validation and encoding) for the routes below
+app.router.route_class = TimedRoute
+
+# DB statement counts/timings and pool checkouts for /metrics and Server-Timing
+instrument_engine(engine)
+
+# 503 + Retry-After for low-priority requests while this worker is saturated;
+# added first so it is innermost and shed responses still get CORS headers
+if settings.ADMISSION_ENABLED:
+    app.add_middleware(AdmissionMiddleware, controller=admission)
+
+# 429 + Retry-After for clients over their per-username or per-IP limit;
+# outside admission control, so rejected requests never count as in flight
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(
+        RateLimitMiddleware,
+        window_seconds=settings.RATE_LIMIT_WINDOW_SECONDS,
+        llm_per_user=settings.RATE_LIMIT_LLM_PER_USER,
+        llm_per_ip=settings.RATE_LIMIT_LLM_PER_IP,
+        cheap_per_user=settings.RATE_LIMIT_CHEAP_PER_USER,
+        cheap_per_ip=settings.RATE_LIMIT_CHEAP_PER_IP,
+        max_keys=settings.RATE_LIMIT_MAX_KEYS,
+        store=shared_state
+    )
 
 # CORS Configuration for Production
 # This allows your frontend (Vercel) to communicate with backend (Railway)
@@ -30,10 +117,24 @@ app.add_middleware(
     max_age=3600,
 )
 
+# Brotli/gzip for larger responses
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_BYTES,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY
+)
+
+# Per-request timings (Server-Timing header and Prometheus histograms);
+# added last so it is outermost and its totals include compression
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(learning.router)
 app.include_router(profile.router)
 app.include_router(quiz.router)
+app.include_router(usage.router)
+app.include_router(live.router)
 
 @app.get("/")
 async def root():
@@ -43,7 +144,8 @@ async def root():
         "version": "1.0.0",
         "status": "running",
         "docs": "/docs",
-        "health": "/health"
+        "health": "/health",
+        "ready": "/ready"
     }
 
 @app.get("/health")
@@ -56,6 +158,26 @@ async def health_check():
         "environment": "production"
     }
 
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness: 503 while this worker is shedding low-priority requests,
+    so the platform routes new traffic elsewhere. /health stays 200.
+    """
+    state = admission.readiness()
+    if state["ready"]:
+        return state
+    return JSONResponse(
+        state,
+        status_code=503,
+        headers={"Retry-After": str(settings.ADMISSION_RETRY_AFTER_SECONDS)}
+    )
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus metrics: request, DB, LLM and render timings"""
+    return metrics_response()
+
 # Add OPTIONS handler for CORS preflight requests
 @app.options("/{path:path}")
 async def options_handler(path: str):
@@ -0,0 +1,257 @@
+import asyncio
+import functools
+import os
+import time
+from contextvars import ContextVar
+from fastapi.routing import APIRoute
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from starlette.responses import Response
+
+# ─── Series ──────────────────────────────────────────────────────────
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Request latency", ["method", "route", "status"]
+)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds", "Latency of one SQL statement",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request", "SQL statements run by one request", ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+)
+DB_SECONDS_PER_REQUEST = Histogram(
+    "db_time_per_request_seconds", "Total SQL time of one request", ["route"]
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "Connections currently checked out of the pool",
+    multiprocess_mode="livesum"
+)
+DB_POOL_CAPACITY = Gauge(
+    "db_pool_capacity", "Connections the pool can hand out (size + overflow)",
+    multiprocess_mode="livesum"
+)
+DB_POOL_CHECKOUTS = Counter("db_pool_checkouts_total", "Connections checked out of the pool")
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "Admitted requests not yet finished", multiprocess_mode="livesum"
+)
+LLM_IN_FLIGHT = Gauge(
+    "llm_calls_in_flight", "LLM calls in progress", multiprocess_mode="livesum"
+)
+REQUESTS_SHED = Counter(
+    "http_requests_shed_total", "Requests answered 503 by admission control", ["priority", "reason"]
+)
+REQUESTS_RATE_LIMITED = Counter(
+    "http_requests_rate_limited_total", "Requests answered 429 by rate limiting", ["cost", "key"]
+)
+LLM_SECONDS = Histogram(
+    "llm_call_duration_seconds", "Latency of one LLM call", ["method", "success"],
+    buckets=(0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 8.0, 13.0, 21.0, 34.0, 60.0)
+)
+RENDER_SECONDS = Histogram(
+    "response_render_seconds", "Time spent turning an endpoint's return value into a response body", ["route"],
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+)
+
+
+# ─── Per-request timings ─────────────────────────────────────────────
+
+class RequestTimings:
+    """Phase timings of one request, in milliseconds."""
+
+    __slots__ = ("db_ms", "db_queries", "llm_ms", "llm_methods", "render_ms", "returned_at")
+
+    def __init__(self):
+        self.db_ms = 0.0
+        self.db_queries = 0
+        self.llm_ms = 0.0
+        self.llm_methods = []
+        self.render_ms = 0.0
+        self.returned_at = None   # perf_counter() when the endpoint returned
+
+    def server_timing(self, total_ms: float) -> str:
+        parts = [f"app;dur={total_ms:.1f}"]
+        if self.db_queries:
+            parts.append(f'db;dur={self.db_ms:.1f};desc="{self.db_queries} queries"')
+        if self.llm_methods:
+            parts.append(f'llm;dur={self.llm_ms:.1f};desc="{",".join(self.llm_methods)}"')
+        if self.render_ms:
+            parts.append(f"render;dur={self.render_ms:.1f}")
+        return ", ".join(parts)
+
+
+# Sync endpoints run in a thread with a copy of the context, which still
+# points at the same RequestTimings object
+_timings: ContextVar = ContextVar("request_timings", default=None)
+
+
+def observe_llm(method: str, seconds: float, success: bool):
+    """Record one LLM call (called by AITutorService)."""
+    LLM_SECONDS.labels(method=method, success=str(success).lower()).observe(seconds)
+    timings = _timings.get()
+    if timings is not None:
+        timings.llm_ms += seconds * 1000
+        timings.llm_methods.append(method)
+
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    endpoint = scope.get("endpoint")
+    return endpoint.__name__ if endpoint is not None else "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Times every HTTP request, adds a Server-Timing header (total, DB, LLM
+    and render time) and feeds the request histograms.
+
+    Plain ASGI rather than BaseHTTPMiddleware, so the header can be added
+    when the response starts without buffering the body.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        timings = RequestTimings()
+        token = _timings.set(timings)
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                total_ms = (time.perf_counter() - started) * 1000
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.server_timing(total_ms).encode()))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _timings.reset(token)
+            route = _route_label(scope)
+            REQUEST_SECONDS.labels(
+                method=scope["method"], route=route, status=str(status["code"])
+            ).observe(time.perf_counter() - started)
+            DB_QUERIES_PER_REQUEST.labels(route=route).observe(timings.db_queries)
+            DB_SECONDS_PER_REQUEST.labels(route=route).observe(timings.db_ms / 1000)
+            if timings.render_ms:
+                RENDER_SECONDS.labels(route=route).observe(timings.render_ms / 1000)
+
+
+def observe_render(seconds: float):
+    """Record time spent encoding a response body."""
+    timings = _timings.get()
+    if timings is not None:
+        timings.render_ms += seconds * 1000
+
+
+def _returned():
+    timings = _timings.get()
+    if timings is not None:
+        timings.returned_at = time.perf_counter()
+
+
+def _noting_return(call):
+    """Wrap an endpoint so it notes when it returned."""
+    if asyncio.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def endpoint(*args, **kwargs):
+            result = await call(*args, **kwargs)
+            _returned()
+            return result
+    else:
+        @functools.wraps(call)
+        def endpoint(*args, **kwargs):
+            result = call(*args, **kwargs)
+            _returned()
+            return result
+    return endpoint
+
+
+class TimedRoute(APIRoute):
+    """
+    APIRoute that records render time: everything from the endpoint
+    returning to the response being ready, i.e. response_model
+    validation, jsonable_encoder (FastAPI's serialize_response) and
+    encoding the body.
+    """
+
+    def get_route_handler(self):
+        # The dependant is already built from the real endpoint, so its
+        # signature and annotations are unaffected by the wrapper
+        self.dependant.call = _noting_return(self.dependant.call)
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            response = await handler(request)
+            timings = _timings.get()
+            if timings is not None and timings.returned_at is not None:
+                observe_render(time.perf_counter() - timings.returned_at)
+                timings.returned_at = None
+            return response
+
+        return timed_handler
+
+
+# ─── SQLAlchemy hooks ────────────────────────────────────────────────
+
+def instrument_engine(engine):
+    """Count and time every statement and track pool checkouts."""
+    pool = engine.pool
+    if hasattr(pool, "size"):
+        DB_POOL_CAPACITY.set(pool.size() + max(pool._max_overflow, 0))
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_started"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info.pop("query_started", time.perf_counter())
+        DB_QUERY_SECONDS.observe(seconds)
+        timings = _timings.get()
+        if timings is not None:
+            timings.db_ms += seconds * 1000
+            timings.db_queries += 1
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_CHECKED_OUT.inc()
+        DB_POOL_CHECKOUTS.inc()
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        DB_POOL_CHECKED_OUT.dec()
+
+
+# ─── Exposition ──────────────────────────────────────────────────────
+
+def metrics_response() -> Response:
+    """
+    Prometheus text format. With several gunicorn workers
+    (PROMETHEUS_MULTIPROC_DIR set), adds up every worker's series.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        body = generate_latest(registry)
+    else:
+        body = generate_latest()
+    return Response(body, media_type=CONTENT_TYPE_LATEST)
@@ -3,5 +3,21 @@ from .user import User
 from .profile import StudentProfile
 from .session import LearningSession
 from .quiz import QuizSession, QuizQuestion
+from .usage import LLMUsage
+from .conversation import Conversation, ConversationTurn
+from .job import QuizJob
+from .idempotency import IdempotencyRecord
+from .assignment import QuizAssignment, AssignmentQuestion, AssignmentAnswer
+from .mastery import ConceptMastery, QuestionRating
+from .review import ReviewItem
+from .dedup import QuestionSignature, QuestionBucket
+from .pregenerated import PregeneratedContent
+from .migration import AppliedMigration
 
-__all__ = ["User", "StudentProfile", "LearningSession", "QuizSession", "QuizQuestion"]
\ No newline at end of file
+__all__ = [
+    "User", "StudentProfile", "LearningSession", "QuizSession", "QuizQuestion",
+    "LLMUsage", "Conversation", "ConversationTurn", "QuizJob",
+    "IdempotencyRecord", "QuizAssignment", "AssignmentQuestion", "AssignmentAnswer",
+    "ConceptMastery", "QuestionRating", "ReviewItem",
+    "QuestionSignature", "QuestionBucket", "PregeneratedContent", "AppliedMigration"
+]
\ No newline at end of file
@@ -0,0 +1,76 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Boolean
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+import uuid
+from ..database import Base
+
+class QuizAssignment(Base):
+    """
+    Quiz Assignment table - one quiz generated once and shared by a class.
+
+    The questions are stored once in AssignmentQuestion. Each student's
+    attempt is a normal QuizSession pointing at the assignment, which
+    stores only that student's answers (AssignmentAnswer).
+    """
+
+    __tablename__ = "quiz_assignments"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    teacher_id = Column(String, ForeignKey("users.id"), nullable=False)
+    topic = Column(String(255), nullable=False)
+    level = Column(String(20), nullable=False)
+    total_questions = Column(Integer, default=5)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    teacher = relationship("User")
+    questions = relationship(
+        "AssignmentQuestion",
+        back_populates="assignment",
+        order_by="AssignmentQuestion.question_number",
+        cascade="all, delete-orphan"
+    )
+
+    def __repr__(self):
+        return f"<QuizAssignment(topic={self.topic}, questions={self.total_questions})>"
+
+
+class AssignmentQuestion(Base):
+    """Assignment Question table - a shared question (no per-student answer)."""
+
+    __tablename__ = "assignment_questions"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    assignment_id = Column(String, ForeignKey("quiz_assignments.id"), nullable=False, index=True)
+    question_number = Column(Integer, nullable=False)
+    question_text = Column(String(1000), nullable=False)
+    options = Column(String(2000), nullable=False)
+    correct_answer = Column(String(1), nullable=False)
+    difficulty = Column(String(20), default="medium")
+    concept = Column(String(255), nullable=True)
+    explanation = Column(String(1000), nullable=True)
+
+    # Relationship
+    assignment = relationship("QuizAssignment", back_populates="questions")
+
+    def __repr__(self):
+        return f"<AssignmentQuestion(#{self.question_number})>"
+
+
+class AssignmentAnswer(Base):
+    """Assignment Answer table - one student's answer to a shared question."""
+
+    __tablename__ = "assignment_answers"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    quiz_session_id = Column(String, ForeignKey("quiz_sessions.id"), nullable=False, index=True)
+    question_id = Column(String, ForeignKey("assignment_questions.id"), nullable=False)
+    user_answer = Column(String(1), nullable=True)
+    is_correct = Column(Boolean, nullable=True)
+
+    # Relationships
+    quiz_session = relationship("QuizSession", back_populates="answers")
+    question = relationship("AssignmentQuestion")
+
+    def __repr__(self):
+        return f"<AssignmentAnswer(correct={self.is_correct})>"
@@ -0,0 +1,56 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Integer, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+import uuid
+from ..database import Base
+
+class Conversation(Base):
+    """
+    Conversation table - one multi-turn tutor chat.
+
+    Older turns are folded into `summary` so the prompt stays bounded;
+    `summarized_through` is the last turn_number already in the summary.
+    A conversation can be grounded in the explanation of the
+    LearningSession it started from.
+    """
+
+    __tablename__ = "conversations"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
+    learning_session_id = Column(String, ForeignKey("learning_sessions.id"), nullable=True)
+    topic = Column(String(255), nullable=False)
+    level = Column(String(20), nullable=False)
+    summary = Column(Text, nullable=True)
+    summarized_through = Column(Integer, default=0)
+    turn_count = Column(Integer, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    # Relationships
+    user = relationship("User")
+    learning_session = relationship("LearningSession")
+
+    def __repr__(self):
+        return f"<Conversation(topic={self.topic}, turns={self.turn_count})>"
+
+
+class ConversationTurn(Base):
+    """Conversation Turn table - one student or tutor message."""
+
+    __tablename__ = "conversation_turns"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    conversation_id = Column(String, ForeignKey("conversations.id"), nullable=False)
+    turn_number = Column(Integer, nullable=False)
+    role = Column(String(20), nullable=False)       # "student" or "tutor"
+    content = Column(Text, nullable=False)
+    token_count = Column(Integer, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_conversation_turns_conversation_turn", "conversation_id", "turn_number"),
+    )
+
+    def __repr__(self):
+        return f"<ConversationTurn(#{self.turn_number}, role={self.role})>"
@@ -0,0 +1,36 @@
+from sqlalchemy import Column, String, ForeignKey, LargeBinary
+from ..database import Base
+
+class QuestionSignature(Base):
+    """
+    Question Signature table - MinHash signature of a stored QuizQuestion.
+
+    Computed once at insert from the question text plus its options, and
+    used to estimate how similar two questions are without re-reading them.
+    """
+
+    __tablename__ = "question_signatures"
+
+    question_id = Column(String, ForeignKey("quiz_questions.id"), primary_key=True)
+    signature = Column(LargeBinary, nullable=False)   # NUM_PERM little-endian uint32s
+
+    def __repr__(self):
+        return f"<QuestionSignature(question_id={self.question_id})>"
+
+
+class QuestionBucket(Base):
+    """
+    Question Bucket table - LSH band buckets for near-duplicate lookup.
+
+    Each question lands in one bucket per band. Questions sharing any
+    bucket are duplicate candidates, so a lookup reads a handful of index
+    entries instead of comparing against the whole table.
+    """
+
+    __tablename__ = "question_buckets"
+
+    bucket_key = Column(String(32), primary_key=True)   # "<band>:<hash of the band>"
+    question_id = Column(String, ForeignKey("quiz_questions.id"), primary_key=True)
+
+    def __repr__(self):
+        return f"<QuestionBucket(bucket_key={self.bucket_key})>"
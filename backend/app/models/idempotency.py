@@ -0,0 +1,28 @@
+from sqlalchemy import Column, String, DateTime, Integer, Text
+from sqlalchemy.sql import func
+from ..database import Base
+
+class IdempotencyRecord(Base):
+    """
+    Idempotency Record table - the stored response for an Idempotency-Key.
+
+    A retried request with the same key gets this response back instead of
+    running again. Rows expire after IDEMPOTENCY_TTL_SECONDS.
+
+    Columns:
+    - scope: "<endpoint>:<user id>:<client key>", so keys are per endpoint and user
+    - request_hash: Fingerprint of the request body, to catch key reuse
+    - status_code / response_body: What the first request returned
+    """
+
+    __tablename__ = "idempotency_records"
+
+    scope = Column(String(300), primary_key=True)
+    request_hash = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=False)
+    response_body = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<IdempotencyRecord(scope={self.scope}, status={self.status_code})>"
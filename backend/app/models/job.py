@@ -0,0 +1,44 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Index
+from sqlalchemy.sql import func
+import uuid
+from ..database import Base
+
+class QuizJob(Base):
+    """
+    Quiz Job table - the queue of pending quiz generations.
+
+    Workers claim a job by flipping its status from "queued" to "running"
+    with a conditional update, so a job is processed once even with
+    several workers. Jobs live in the database, so queued work survives
+    a restart.
+
+    A running job holds a lease its worker keeps renewing; once
+    lease_expires_at passes (the worker's process died) the job is
+    queued again.
+
+    Status: queued → running → succeeded / failed
+    """
+
+    __tablename__ = "quiz_jobs"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    username = Column(String(100), nullable=False)
+    topic = Column(String(255), nullable=False)
+    level = Column(String(20), nullable=False)
+    num_questions = Column(Integer, default=5)
+    status = Column(String(20), default="queued", nullable=False)
+    attempts = Column(Integer, default=0)
+    error = Column(String(1000), nullable=True)
+    quiz_session_id = Column(String, ForeignKey("quiz_sessions.id"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_quiz_jobs_status_created_at", "status", "created_at"),
+    )
+
+    def __repr__(self):
+        return f"<QuizJob(topic={self.topic}, status={self.status})>"
@@ -0,0 +1,53 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Float, Index
+from sqlalchemy.sql import func
+from ..database import Base
+
+class ConceptMastery(Base):
+    """
+    Concept Mastery table - a student's Elo-style skill estimate per concept.
+
+    Updated in place on every quiz submission, so "what is this student
+    weakest at?" is one indexed lookup instead of a scan of their history.
+
+    Columns:
+    - concept: Normalized (lowercase) concept name from QuizQuestion.concept
+    - topic: Normalized topic the concept was last seen under
+    - rating: Skill estimate (starts at 1500, higher = stronger)
+    - attempts / correct: Raw counts behind the estimate
+    """
+
+    __tablename__ = "concept_mastery"
+
+    user_id = Column(String, ForeignKey("users.id"), primary_key=True)
+    concept = Column(String(255), primary_key=True)
+    topic = Column(String(255), nullable=True)
+    rating = Column(Float, nullable=False)
+    attempts = Column(Integer, default=0)
+    correct = Column(Integer, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_concept_mastery_user_topic_rating", "user_id", "topic", "rating"),
+    )
+
+    def __repr__(self):
+        return f"<ConceptMastery(concept={self.concept}, rating={self.rating:.0f})>"
+
+
+class QuestionRating(Base):
+    """
+    Question Rating table - Elo-style difficulty estimate per question.
+
+    Keyed by a fingerprint of the normalized question text, so the same
+    question asked in different quizzes shares one estimate.
+    """
+
+    __tablename__ = "question_ratings"
+
+    fingerprint = Column(String(40), primary_key=True)
+    rating = Column(Float, nullable=False)
+    attempts = Column(Integer, default=0)
+    correct = Column(Integer, default=0)
+
+    def __repr__(self):
+        return f"<QuestionRating(rating={self.rating:.0f}, attempts={self.attempts})>"
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, String, DateTime
+from sqlalchemy.sql import func
+from ..database import Base
+
+class AppliedMigration(Base):
+    """
+    Applied Migration table - one row per one-off data migration that has
+    run against this database, so create_schema runs each only once.
+
+    Columns:
+    - name: The migration's name in create_schema
+    """
+
+    __tablename__ = "applied_migrations"
+
+    name = Column(String(100), primary_key=True)
+    applied_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<AppliedMigration(name={self.name})>"
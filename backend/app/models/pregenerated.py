@@ -0,0 +1,29 @@
+from sqlalchemy import Column, String, DateTime, Text, Integer
+from sqlalchemy.sql import func
+from ..database import Base
+
+class PregeneratedContent(Base):
+    """
+    Pregenerated Content table - LLM output prepared ahead of demand.
+
+    Filled overnight for the most popular (topic, level, style) keys and
+    served instead of a live LLM call until it expires.
+
+    Columns:
+    - cache_key: "<kind>|<level>|<style>|<normalized topic>"
+    - kind: "explain" (explanation_result dict) or "quiz" (question pool)
+    - payload: JSON of the generated content
+    - hits: How many requests it has answered
+    """
+
+    __tablename__ = "pregenerated_content"
+
+    cache_key = Column(String(400), primary_key=True)
+    kind = Column(String(20), nullable=False)
+    payload = Column(Text, nullable=False)
+    hits = Column(Integer, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<PregeneratedContent(cache_key={self.cache_key}, hits={self.hits})>"
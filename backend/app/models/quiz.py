@@ -12,6 +12,7 @@ class QuizSession(Base):
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = Column(String, ForeignKey("users.id"), nullable=False)
     learning_session_id = Column(String, ForeignKey("learning_sessions.id"), nullable=True)
+    assignment_id = Column(String, ForeignKey("quiz_assignments.id"), nullable=True, index=True)
     topic = Column(String(255), nullable=False)
     level = Column(String(20), nullable=False)
     total_questions = Column(Integer, default=5)
@@ -25,6 +26,9 @@ class QuizSession(Base):
     # Relationships
     user = relationship("User")
     questions = relationship("QuizQuestion", back_populates="quiz_session", cascade="all, delete-orphan")
+    # Only for attempts at a shared QuizAssignment (questions live on the assignment)
+    assignment = relationship("QuizAssignment")
+    answers = relationship("AssignmentAnswer", back_populates="quiz_session", cascade="all, delete-orphan")
     
     def __repr__(self):
         return f"<QuizSession(topic={self.topic}, score={self.score}%)>"
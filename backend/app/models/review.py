@@ -0,0 +1,47 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Float, Index, UniqueConstraint
+from sqlalchemy.sql import func
+import uuid
+from ..database import Base
+
+class ReviewItem(Base):
+    """
+    Review Item table - a missed question scheduled for spaced repetition.
+
+    The question is copied from the quiz it was missed in (like
+    AssignmentQuestion), so a review quiz is one indexed query on
+    (user_id, due_at) with no joins and no LLM call.
+
+    SM-2 state:
+    - ease_factor: How fast intervals grow (starts at 2.5, floor 1.3)
+    - interval_days: Days until the next review after the last one
+    - repetitions: Correct reviews in a row (reset on a miss)
+    """
+
+    __tablename__ = "review_items"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = Column(String, ForeignKey("users.id"), nullable=False)
+    fingerprint = Column(String(40), nullable=False)   # Same key as QuestionRating
+    topic = Column(String(255), nullable=False)
+    question_text = Column(String(1000), nullable=False)
+    options = Column(String(2000), nullable=False)
+    correct_answer = Column(String(1), nullable=False)
+    difficulty = Column(String(20), default="medium")
+    concept = Column(String(255), nullable=True)
+    explanation = Column(String(1000), nullable=True)
+
+    ease_factor = Column(Float, default=2.5)
+    interval_days = Column(Integer, default=0)
+    repetitions = Column(Integer, default=0)
+    lapses = Column(Integer, default=0)
+    due_at = Column(DateTime(timezone=True), nullable=False)
+    last_reviewed_at = Column(DateTime(timezone=True), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "fingerprint", name="uq_review_items_user_fingerprint"),
+        Index("ix_review_items_user_due", "user_id", "due_at"),
+    )
+
+    def __repr__(self):
+        return f"<ReviewItem(due={self.due_at}, interval={self.interval_days}d)>"
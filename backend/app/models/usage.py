@@ -0,0 +1,41 @@
+from sqlalchemy import Column, String, DateTime, Integer, Float, Boolean, Index
+from sqlalchemy.sql import func
+from ..database import Base
+
+class LLMUsage(Base):
+    """
+    LLM Usage ledger - one append-only row per chain invocation.
+
+    Rows are never updated, and are written in batches by the usage ledger
+    so accounting stays off the request path.
+
+    Columns:
+    - username: Who the call was made for (None for background work)
+    - endpoint: Which API endpoint triggered it
+    - method: Which AITutorService method made the call
+    - model: Model name reported by the provider
+    - prompt_tokens / completion_tokens / total_tokens: Token usage
+    - latency_ms: Wall-clock time of the call
+    - success: False if the call raised
+    """
+
+    __tablename__ = "llm_usage"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    username = Column(String(100), nullable=True)
+    endpoint = Column(String(100), nullable=True)
+    method = Column(String(50), nullable=False)
+    model = Column(String(100), nullable=True)
+    prompt_tokens = Column(Integer, default=0)
+    completion_tokens = Column(Integer, default=0)
+    total_tokens = Column(Integer, default=0)
+    latency_ms = Column(Float, default=0.0)
+    success = Column(Boolean, default=True)
+
+    __table_args__ = (
+        Index("ix_llm_usage_username_created_at", "username", "created_at"),
+    )
+
+    def __repr__(self):
+        return f"<LLMUsage(method={self.method}, tokens={self.total_tokens})>"
@@ -0,0 +1,269 @@
+import re
+import time
+from collections import OrderedDict
+import orjson
+from .admission import LLM_POSTS
+from .metrics import REQUESTS_RATE_LIMITED
+
+# Never limited: the platform polls these
+EXEMPT_PATHS = ("/health", "/ready", "/metrics")
+
+# /api/profile/{username}..., /api/quiz/{username}/..., /api/usage/{username}/today
+PATH_USERNAME = re.compile(r"^/api/(?:profile|quiz|usage)/([^/]+)")
+# First path segments under those prefixes that are routes, not usernames
+NOT_USERNAMES = {
+    "create", "generate", "jobs", "session", "assignments", "submit", "review",
+    "summary", "pregeneration"
+}
+# Longer usernames are cut, so one key can't hold much memory
+MAX_KEY_LENGTH = 64
+
+LIMITED_BODY = b'{"detail":"Too many requests, please slow down"}'
+
+
+class _Window:
+    __slots__ = ("start", "current", "previous")
+
+    def __init__(self, start: float):
+        self.start = start
+        self.current = 0
+        self.previous = 0
+
+
+def _wait(limit: int, window: float, start: float, previous: int, current: int, now: float) -> float:
+    """
+    0 if one more request fits in the sliding window, else seconds until
+    it will. `start` is when the current window began; `previous` and
+    `current` are the counts of the last and the current window.
+    """
+    overlap = 1 - (now - start) / window
+    if previous * overlap + current + 1 <= limit:
+        return 0.0
+
+    room = limit - 1 - current
+    if room < 0:
+        # Full even without the previous window: wait until this one
+        # has slid far enough into the past
+        next_start = start + window
+        return next_start - now + window * (1 - (limit - 1) / current)
+    # Wait until enough of the previous window has slid out
+    return start + window * (1 - room / previous) - now
+
+
+class SlidingWindowLimiter:
+    """
+    Sliding-window counter per key: this window's count plus the previous
+    window's, weighted by how much of it still overlaps the last
+    `window_seconds`. Each check is O(1) and each key is three numbers.
+
+    Counts live in this process. Keys are kept in an LRU of at most
+    `max_keys`; past that the least recently seen key is dropped, which
+    at worst forgets the count of a client that has gone quiet.
+    """
+
+    def __init__(self, limit: int, window_seconds: float, max_keys: int):
+        self.limit = limit
+        self.window = window_seconds
+        self.max_keys = max_keys
+        self._windows = OrderedDict()
+
+    def _window(self, key: str, now: float) -> _Window:
+        start = now - now % self.window
+        entry = self._windows.get(key)
+        if entry is None:
+            entry = self._windows[key] = _Window(start)
+            if len(self._windows) > self.max_keys:
+                self._windows.popitem(last=False)
+            return entry
+
+        self._windows.move_to_end(key)
+        if entry.start != start:
+            # Slide: the last window becomes the previous one, older counts drop out
+            entry.previous = entry.current if entry.start == start - self.window else 0
+            entry.current = 0
+            entry.start = start
+        return entry
+
+    def retry_after(self, key: str, now: float) -> float:
+        """0 if one more request from `key` fits, else seconds until it will."""
+        if self.limit <= 0:
+            return 0.0
+        entry = self._window(key, now)
+        return _wait(self.limit, self.window, entry.start, entry.previous, entry.current, now)
+
+    def add(self, key: str, now: float, amount: int = 1):
+        if self.limit > 0:
+            self._window(key, now).current += amount
+
+    async def acquire(self, key: str, now: float) -> float:
+        """Count one request from `key` if it fits; else seconds until it will."""
+        wait = self.retry_after(key, now)
+        if not wait:
+            self.add(key, now)
+        return wait
+
+    async def release(self, key: str, now: float):
+        """Take back a request counted by acquire() that was turned away after all."""
+        self.add(key, now, -1)
+
+
+class SharedWindowLimiter:
+    """
+    The same sliding window with its counts in the shared state store, so
+    the limit holds across every worker process instead of per worker.
+
+    Each window's count is one counter that expires after two windows.
+    A check reads the previous window's count and increments the current
+    one (taking it back if the request doesn't fit), in one thread hop.
+    """
+
+    def __init__(self, name: str, limit: int, window_seconds: float, store):
+        self.name = name
+        self.limit = limit
+        self.window = window_seconds
+        self.store = store
+
+    def _key(self, key: str, start: float) -> str:
+        return f"ratelimit:{self.name}:{key}:{int(start)}"
+
+    def _acquire(self, key: str, now: float) -> float:
+        start = now - now % self.window
+        current_key = self._key(key, start)
+        previous = self.store.get(self._key(key, start - self.window)) or 0
+        current = self.store.incr(current_key, 1, ttl=self.window * 2)
+        wait = _wait(self.limit, self.window, start, previous, current - 1, now)
+        if wait:
+            self.store.incr(current_key, -1)
+        return wait
+
+    async def acquire(self, key: str, now: float) -> float:
+        """Count one request from `key` if it fits; else seconds until it will."""
+        if self.limit <= 0:
+            return 0.0
+        return await self.store.run(self._acquire, key, now)
+
+    async def release(self, key: str, now: float):
+        """Take back a request counted by acquire() that was turned away after all."""
+        if self.limit > 0:
+            start = now - now % self.window
+            await self.store.aincr(self._key(key, start), -1)
+
+
+def _path_username(path: str) -> str:
+    match = PATH_USERNAME.match(path)
+    if match is None or match.group(1) in NOT_USERNAMES:
+        return None
+    return match.group(1)
+
+
+def _body_username(body: bytes) -> str:
+    try:
+        payload = orjson.loads(body)
+    except orjson.JSONDecodeError:
+        return None
+    if not isinstance(payload, dict):
+        return None
+    username = payload.get("username") or payload.get("teacher_username")
+    return username if isinstance(username, str) else None
+
+
+class RateLimitMiddleware:
+    """
+    Per-IP and per-username request limits, checked before routing so a
+    rejected request costs no user lookup, DB or LLM work.
+
+    LLM endpoints and everything else have separate limits. The username
+    comes from the path, or for LLM endpoints from the JSON body, which
+    is read here and handed on to the route unchanged. The IP is checked
+    first, so a client over its IP limit is turned away without reading
+    the body.
+
+    LLM limits are counted in the shared state `store`, so they hold
+    across all worker processes. The other limits are counted per worker,
+    since a store round-trip on every cheap request would cost about as
+    much as the request; their settings are per worker.
+    """
+
+    def __init__(
+        self,
+        app,
+        window_seconds: float,
+        llm_per_user: int,
+        llm_per_ip: int,
+        cheap_per_user: int,
+        cheap_per_ip: int,
+        max_keys: int,
+        store
+    ):
+        self.app = app
+        self.limiters = {
+            ("llm", "user"): SharedWindowLimiter("llm:user", llm_per_user, window_seconds, store),
+            ("llm", "ip"): SharedWindowLimiter("llm:ip", llm_per_ip, window_seconds, store),
+            ("cheap", "user"): SlidingWindowLimiter(cheap_per_user, window_seconds, max_keys),
+            ("cheap", "ip"): SlidingWindowLimiter(cheap_per_ip, window_seconds, max_keys),
+        }
+
+    async def _reject(self, send, cost: str, scope_name: str, retry_after: float):
+        REQUESTS_RATE_LIMITED.labels(cost=cost, key=scope_name).inc()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(LIMITED_BODY)).encode()),
+                (b"retry-after", str(max(1, int(retry_after + 0.999))).encode())
+            ]
+        })
+        await send({"type": "http.response.body", "body": LIMITED_BODY})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        method, path = scope["method"], scope["path"]
+        if method == "OPTIONS" or path.startswith(EXEMPT_PATHS):
+            return await self.app(scope, receive, send)
+
+        cost = "llm" if method == "POST" and path in LLM_POSTS else "cheap"
+        # Wall-clock time: shared windows must line up across processes
+        now = time.time()
+
+        client = scope.get("client")
+        admitted_ip = None
+        if client:
+            limiter = self.limiters[cost, "ip"]
+            retry_after = await limiter.acquire(client[0], now)
+            if retry_after:
+                return await self._reject(send, cost, "ip", retry_after)
+            admitted_ip = (limiter, client[0])
+
+        username = _path_username(path)
+        buffered = []
+        if username is None and cost == "llm":
+            # Read the (small) JSON body now and replay it to the route
+            while True:
+                message = await receive()
+                buffered.append(message)
+                if message["type"] != "http.request" or not message.get("more_body", False):
+                    break
+            username = _body_username(b"".join(m.get("body", b"") for m in buffered))
+
+        if username:
+            key = username[:MAX_KEY_LENGTH]
+            limiter = self.limiters[cost, "user"]
+            retry_after = await limiter.acquire(key, now)
+            if retry_after:
+                # Only count requests that are let through, so a rejected
+                # username doesn't also use up its IP's allowance
+                if admitted_ip:
+                    await admitted_ip[0].release(admitted_ip[1], now)
+                return await self._reject(send, cost, "user", retry_after)
+
+        if not buffered:
+            return await self.app(scope, receive, send)
+
+        async def replay():
+            if buffered:
+                return buffered.pop(0)
+            return await receive()
+
+        await self.app(scope, replay, send)
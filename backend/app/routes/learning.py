@@ -1,28 +1,51 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from sqlalchemy.orm import Session
 from ..database import get_db
 from ..models.session import LearningSession
 from ..models.user import User
+from ..models.conversation import Conversation, ConversationTurn
 from ..schemas.learning import (
     GreetingRequest,
     GreetingResponse,
     TopicRequest,
     TopicResponse,
     PracticeQuestionsRequest,
-    PracticeQuestionsResponse
+    PracticeQuestionsResponse,
+    LessonRequest,
+    LessonResponse,
+    ChatRequest,
+    ChatResponse,
+    ConversationResponse,
+    ConversationTurnResponse,
+    TopicSuggestion,
+    TopicSuggestResponse
 )
 from ..services.ai_service import ai_service
+from ..services.quiz_store import save_quiz, quiz_session_response
+from ..services.usage_ledger import bind_caller, BudgetExceededError
+from ..services.conversation import conversation_manager
+from ..services.greeting_service import greeting_engine
+from ..services.topic_index import topic_index
+from ..services.pregeneration import content_cache
+from ..services.user_versions import user_versions
+from ..metrics import TimedRoute
 
 router = APIRouter(
     prefix="/api/learning",
-    tags=["Learning"]
+    tags=["Learning"],
+    route_class=TimedRoute
 )
 
 @router.post("/greeting", response_model=GreetingResponse)
 async def get_greeting(request: GreetingRequest):
-    """Generate a personalized AI greeting"""
+    """
+    Serve a personalized greeting.
+
+    Filled in locally from the pre-generated template pool, so no LLM call
+    sits on the first page load.
+    """
     try:
-        greeting = await ai_service.generate_greeting(
+        greeting = greeting_engine.get_greeting(
             student_name=request.student_name,
             level=request.level
         )
@@ -35,6 +58,23 @@ async def get_greeting(request: GreetingRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/topics/suggest", response_model=TopicSuggestResponse)
+def suggest_topics(q: str = Query(..., min_length=1, max_length=200), limit: int = Query(8, ge=1, le=10)):
+    """
+    Autocomplete a topic as the student types.
+
+    Served from an in-memory index of past topics (no DB query), ranked by
+    how often they've been studied, and tolerant of small typos.
+    """
+    return TopicSuggestResponse(
+        query=q,
+        suggestions=[
+            TopicSuggestion(topic=topic, count=count)
+            for topic, count in topic_index.suggest(q, limit=limit)
+        ]
+    )
+
+
 @router.post("/explain", response_model=TopicResponse)
 async def explain_topic(
     request: TopicRequest,
@@ -44,12 +84,18 @@ async def explain_topic(
     Get AI explanation and save to learning history.
     Username is read from the request body so sessions are always saved.
     """
+    bind_caller("/api/learning/explain", request.username)
     try:
-        result = await ai_service.explain_topic(
-            topic=request.topic,
-            level=request.level,
-            learning_style=request.learning_style
-        )
+        # Popular topics are pregenerated overnight
+        result = content_cache.get(db, "explain", request.level, request.learning_style, request.topic)
+        if result is None:
+            result = await ai_service.explain_topic(
+                topic=request.topic,
+                level=request.level,
+                learning_style=request.learning_style
+            )
+        else:
+            result["topic"] = request.topic
 
         # ── FIX: username now comes from request body (not query param)
         if request.username:
@@ -76,9 +122,12 @@ async def explain_topic(
                     user.profile.total_sessions = str(current + 1)
 
                 db.commit()
+                await user_versions.abump(user.id)
 
         return TopicResponse(**result)
 
+    except BudgetExceededError as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -86,6 +135,7 @@ async def explain_topic(
 @router.post("/practice", response_model=PracticeQuestionsResponse)
 async def get_practice_questions(request: PracticeQuestionsRequest):
     """Generate practice questions for a topic"""
+    bind_caller("/api/learning/practice")
     try:
         result = await ai_service.generate_practice_questions(
             topic=request.topic,
@@ -93,5 +143,186 @@ async def get_practice_questions(request: PracticeQuestionsRequest):
             num_questions=request.num_questions
         )
         return PracticeQuestionsResponse(**result)
+    except BudgetExceededError as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/lesson", response_model=LessonResponse)
+async def get_lesson(
+    request: LessonRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Generate explanation, practice questions and quiz in one LLM call.
+
+    Replaces calling /explain, /practice and /api/quiz/generate separately
+    for the same topic and level. The explanation is saved as a
+    LearningSession and the quiz as a QuizSession linked to it.
+    """
+    user = db.query(User).filter(User.username == request.username).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    bind_caller("/api/learning/lesson", request.username)
+    try:
+        result = await ai_service.generate_lesson(
+            topic=request.topic,
+            level=request.level,
+            learning_style=request.learning_style,
+            num_practice_questions=request.num_practice_questions,
+            num_quiz_questions=request.num_quiz_questions
+        )
+        explanation = result["explanation"]
+
+        session = LearningSession(
+            user_id=user.id,
+            topic=request.topic,
+            level=request.level,
+            learning_style=request.learning_style,
+            explanation=explanation["explanation"],
+            word_count=explanation["word_count"],
+            estimated_reading_time=explanation["estimated_reading_time"]
+        )
+        db.add(session)
+        db.flush()  # Get the ID for the quiz link
+
+        if user.profile:
+            current = int(user.profile.total_sessions or "0")
+            user.profile.total_sessions = str(current + 1)
+
+        quiz_session = save_quiz(
+            db,
+            user_id=user.id,
+            topic=request.topic,
+            level=request.level,
+            questions_data=result["quiz_questions"],
+            learning_session_id=session.id
+        )
+
+        db.commit()
+        db.refresh(quiz_session)
+        await user_versions.abump(user.id)
+
+        return LessonResponse(
+            learning_session_id=session.id,
+            explanation=TopicResponse(**explanation),
+            practice=PracticeQuestionsResponse(**result["practice"]),
+            quiz=quiz_session_response(quiz_session)
+        )
+
+    except BudgetExceededError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to generate lesson: {str(e)}"
+        )
+
+
+@router.post("/chat", response_model=ChatResponse)
+async def chat(
+    request: ChatRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Ask the tutor a follow-up question, keeping the conversation's context.
+
+    Start a chat by sending a learning_session_id (grounded in that
+    explanation) or a topic, then continue it with the returned
+    conversation_id. Older turns are summarized so prompts stay small.
+    """
+    user = db.query(User).filter(User.username == request.username).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    if request.conversation_id:
+        conversation = db.query(Conversation).filter(
+            Conversation.id == request.conversation_id,
+            Conversation.user_id == user.id
+        ).first()
+        if not conversation:
+            raise HTTPException(status_code=404, detail="Conversation not found")
+    else:
+        learning_session = None
+        if request.learning_session_id:
+            learning_session = db.query(LearningSession).filter(
+                LearningSession.id == request.learning_session_id,
+                LearningSession.user_id == user.id
+            ).first()
+            if not learning_session:
+                raise HTTPException(status_code=404, detail="Learning session not found")
+
+        topic = request.topic or (learning_session.topic if learning_session else None)
+        if not topic:
+            raise HTTPException(
+                status_code=400,
+                detail="Send a topic or learning_session_id to start a conversation"
+            )
+
+        conversation = Conversation(
+            user_id=user.id,
+            learning_session_id=learning_session.id if learning_session else None,
+            topic=topic,
+            level=request.level or (learning_session.level if learning_session else "beginner"),
+            summarized_through=0,
+            turn_count=0
+        )
+        db.add(conversation)
+        db.flush()
+
+    bind_caller("/api/learning/chat", request.username)
+    try:
+        result = await conversation_manager.reply(db, conversation, request.message)
+        db.commit()
+
+        return ChatResponse(
+            conversation_id=conversation.id,
+            reply=result["reply"],
+            turn_count=conversation.turn_count,
+            summarized_turns=conversation.summarized_through or 0,
+            context_tokens=result["context_tokens"]
+        )
+
+    except BudgetExceededError as e:
+        db.rollback()
+        raise HTTPException(status_code=429, detail=str(e))
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/chat/{conversation_id}", response_model=ConversationResponse)
+def get_conversation(
+    conversation_id: str,
+    username: str = Query(..., min_length=2),
+    limit: int = 20,
+    db: Session = Depends(get_db)
+):
+    """Get one of the user's tutor chats: its summary and most recent messages"""
+    conversation = db.query(Conversation).join(
+        User, User.id == Conversation.user_id
+    ).filter(
+        Conversation.id == conversation_id,
+        User.username == username
+    ).first()
+    if not conversation:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+
+    turns = db.query(ConversationTurn).filter(
+        ConversationTurn.conversation_id == conversation.id
+    ).order_by(
+        ConversationTurn.turn_number.desc()
+    ).limit(limit).all()
+
+    return ConversationResponse(
+        id=conversation.id,
+        topic=conversation.topic,
+        level=conversation.level,
+        learning_session_id=conversation.learning_session_id,
+        summary=conversation.summary,
+        turn_count=conversation.turn_count,
+        turns=[ConversationTurnResponse.model_validate(t) for t in reversed(turns)]
+    )
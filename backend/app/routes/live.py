@@ -0,0 +1,361 @@
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+import asyncio
+import json
+import uuid
+from ..config import settings
+from ..database import SessionLocal
+from ..models.user import User
+from ..models.session import LearningSession
+from ..models.quiz import QuizSession
+from ..models.conversation import Conversation
+from ..services.ai_service import ai_service
+from ..services.conversation import conversation_manager
+from ..services.usage_ledger import bind_caller, BudgetExceededError
+from ..services.job_queue import quiz_jobs
+from ..services.quiz_store import quiz_job_response, question_by_number, graded_answer, record_live_answers
+from ..services.user_versions import user_versions
+
+router = APIRouter(
+    prefix="/ws",
+    tags=["Live Tutoring"]
+)
+
+# One live socket per student: username -> TutorSocketSession
+active_sessions = {}
+
+# Stop waiting on a quiz job after this long; the client can still poll it
+QUIZ_PUSH_TIMEOUT_SECONDS = 120
+
+
+class TutorSocketSession:
+    """
+    State for one student's live tutoring socket.
+
+    Handlers run concurrently, so each reads through a short-lived DB
+    session of its own. The socket's session (`db`) is only for queued
+    writes: they are staged and committed together every WS_FLUSH_SECONDS
+    (or once WS_FLUSH_BATCH_SIZE writes are waiting) instead of once per
+    message. Staging never spans an await, so a flush only ever commits
+    complete writes.
+    """
+
+    def __init__(self, websocket: WebSocket, user: User, db):
+        self.websocket = websocket
+        self.user = user
+        self.db = db
+        self._send_lock = asyncio.Lock()
+        self._slots = asyncio.Semaphore(settings.WS_MAX_CONCURRENT_MESSAGES)
+        self._staged = 0
+        self._answers = {}   # question id -> quiz answer, written on flush
+        self._tasks = set()
+        self._flusher = None
+
+    async def send(self, message_id, kind: str, data=None):
+        async with self._send_lock:
+            await self.websocket.send_json({"id": message_id, "type": kind, "data": data})
+
+    # ─── Batched writes ──────────────────────────────────────────
+
+    def stage(self, *objects):
+        """
+        Add rows to the pending batch. Call with no rows after changing
+        rows through another helper so the change still gets committed.
+        """
+        for obj in objects:
+            self.db.add(obj)
+        self._staged += len(objects) or 1
+        if self._staged >= settings.WS_FLUSH_BATCH_SIZE:
+            self.flush()
+
+    def stage_answer(self, quiz: QuizSession, question, user_answer: str, is_correct: bool):
+        """Queue a quiz answer; a later answer to the same question replaces it."""
+        self._answers[question.id] = {
+            "quiz_session_id": quiz.id,
+            "assignment": bool(quiz.assignment_id),
+            "user_answer": user_answer,
+            "answer": graded_answer(quiz, question, is_correct)
+        }
+        self.stage()
+
+    def flush(self):
+        if not self._staged:
+            return
+        try:
+            record_live_answers(self.db, self._answers)
+            self.db.commit()
+            user_versions.bump(self.user.id)
+        except Exception as e:
+            self.db.rollback()
+            print(f"Live session write failed for {self.user.username}: {e}")
+        self._answers = {}
+        self._staged = 0
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(settings.WS_FLUSH_SECONDS)
+            self.flush()
+
+    # ─── Message loop ────────────────────────────────────────────
+
+    async def run(self):
+        self._flusher = asyncio.create_task(self._flush_periodically())
+        try:
+            while True:
+                raw = await self.websocket.receive_text()
+                try:
+                    message = json.loads(raw)
+                except json.JSONDecodeError:
+                    await self.send(None, "error", "Messages must be JSON objects")
+                    continue
+                if not isinstance(message, dict):
+                    await self.send(None, "error", "Messages must be JSON objects")
+                    continue
+
+                # Handle messages concurrently so a long explanation
+                # doesn't hold up a quick quiz answer
+                task = asyncio.create_task(self._dispatch(message))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+        finally:
+            self._flusher.cancel()
+            for task in list(self._tasks):
+                task.cancel()
+            self.flush()
+
+    async def _dispatch(self, message: dict):
+        message_id = message.get("id")
+        handler = HANDLERS.get(message.get("type"))
+        if handler is None:
+            await self.send(message_id, "error", f"Unknown message type '{message.get('type')}'")
+            return
+
+        async with self._slots:
+            bind_caller(f"ws:{message.get('type')}", self.user.username)
+            try:
+                await handler(self, message_id, message)
+            except BudgetExceededError as e:
+                await self.send(message_id, "error", str(e))
+            except (KeyError, ValueError) as e:
+                await self.send(message_id, "error", f"Invalid message: {e}")
+            except WebSocketDisconnect:
+                pass
+            except Exception as e:
+                await self.send(message_id, "error", str(e))
+
+
+# ─── Message handlers ───────────────────────────────────────────
+
+async def handle_explain(live: TutorSocketSession, message_id, message: dict):
+    """Stream an explanation and record it as a LearningSession."""
+    topic = message["topic"]
+    level = message["level"]
+    learning_style = message.get("learning_style", "visual")
+
+    parts = []
+    async for chunk in ai_service.stream_explanation(topic, level, learning_style):
+        parts.append(chunk)
+        await live.send(message_id, "chunk", chunk)
+
+    result = ai_service.explanation_result(topic, level, "".join(parts))
+    session = LearningSession(
+        id=str(uuid.uuid4()),
+        user_id=live.user.id,
+        topic=topic,
+        level=level,
+        learning_style=learning_style,
+        explanation=result["explanation"],
+        word_count=result["word_count"],
+        estimated_reading_time=result["estimated_reading_time"]
+    )
+    if live.user.profile:
+        current = int(live.user.profile.total_sessions or "0")
+        live.user.profile.total_sessions = str(current + 1)
+    live.stage(session)
+
+    await live.send(message_id, "done", {
+        "learning_session_id": session.id,
+        "word_count": result["word_count"],
+        "estimated_reading_time": result["estimated_reading_time"],
+        "model_used": result["model_used"]
+    })
+
+
+async def handle_practice(live: TutorSocketSession, message_id, message: dict):
+    """Stream practice questions."""
+    num_questions = int(message.get("num_questions", 3))
+    if not 1 <= num_questions <= 5:
+        raise ValueError("num_questions must be between 1 and 5")
+
+    async for chunk in ai_service.stream_practice_questions(
+        message["topic"], message["level"], num_questions
+    ):
+        await live.send(message_id, "chunk", chunk)
+
+    await live.send(message_id, "done", {"count": num_questions})
+
+
+async def handle_quiz_answer(live: TutorSocketSession, message_id, message: dict):
+    """
+    Check one quiz answer immediately (own quizzes and class assignment
+    attempts). The write, and the mastery and review updates for a
+    question's first answer, are batched.
+    """
+    question_number = int(message["question_number"])
+    db = SessionLocal()
+    try:
+        quiz = db.query(QuizSession).filter(
+            QuizSession.id == message["quiz_session_id"],
+            QuizSession.user_id == live.user.id,
+            QuizSession.completed == False
+        ).first()
+        question = question_by_number(db, quiz, question_number) if quiz else None
+    finally:
+        db.close()
+    if not question:
+        await live.send(message_id, "error", "Question not found or quiz already submitted")
+        return
+
+    answer = message["answer"]
+    is_correct = answer == question.correct_answer
+    live.stage_answer(quiz, question, answer, is_correct)
+
+    await live.send(message_id, "done", {
+        "question_number": question.question_number,
+        "is_correct": is_correct,
+        "correct_answer": question.correct_answer,
+        "explanation": question.explanation
+    })
+
+
+async def handle_chat(live: TutorSocketSession, message_id, message: dict):
+    """
+    Stream a tutor chat reply (same conversations as /api/learning/chat).
+
+    The conversation is read and written across the whole LLM stream, so
+    it uses a session of its own and commits when the reply is complete.
+    """
+    # The reply may be grounded in a lesson that is still staged
+    live.flush()
+
+    db = SessionLocal()
+    try:
+        conversation_id = message.get("conversation_id")
+        if conversation_id:
+            conversation = db.query(Conversation).filter(
+                Conversation.id == conversation_id,
+                Conversation.user_id == live.user.id
+            ).first()
+            if not conversation:
+                await live.send(message_id, "error", "Conversation not found")
+                return
+        else:
+            learning_session = None
+            if message.get("learning_session_id"):
+                learning_session = db.query(LearningSession).filter(
+                    LearningSession.id == message["learning_session_id"],
+                    LearningSession.user_id == live.user.id
+                ).first()
+            topic = message.get("topic") or (learning_session.topic if learning_session else None)
+            if not topic:
+                await live.send(message_id, "error", "Send a topic or learning_session_id to start a conversation")
+                return
+            conversation = Conversation(
+                id=str(uuid.uuid4()),
+                user_id=live.user.id,
+                learning_session_id=learning_session.id if learning_session else None,
+                topic=topic,
+                level=message.get("level") or (learning_session.level if learning_session else "beginner"),
+                summarized_through=0,
+                turn_count=0
+            )
+            db.add(conversation)
+
+        async for chunk in conversation_manager.stream_reply(db, conversation, message["message"]):
+            await live.send(message_id, "chunk", chunk)
+        db.commit()
+
+        await live.send(message_id, "done", {
+            "conversation_id": conversation.id,
+            "turn_count": conversation.turn_count
+        })
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def handle_quiz_generate(live: TutorSocketSession, message_id, message: dict):
+    """Queue a quiz generation job and push the quiz when it is ready."""
+    num_questions = int(message.get("num_questions", 5))
+    if not 3 <= num_questions <= 10:
+        raise ValueError("num_questions must be between 3 and 10")
+
+    db = SessionLocal()
+    try:
+        job = quiz_jobs.enqueue(
+            db,
+            user=live.user,
+            topic=message["topic"],
+            level=message["level"],
+            num_questions=num_questions
+        )
+        job_id = job.id
+    finally:
+        db.close()
+    await live.send(message_id, "queued", {"job_id": job_id})
+
+    job = await quiz_jobs.wait_for(job_id, timeout=QUIZ_PUSH_TIMEOUT_SECONDS)
+    db = SessionLocal()
+    try:
+        response = quiz_job_response(db, job)
+    finally:
+        db.close()
+    kind = {"succeeded": "done", "failed": "error"}.get(job.status, "pending")
+    await live.send(message_id, kind, response.model_dump(mode="json"))
+
+
+HANDLERS = {
+    "explain": handle_explain,
+    "practice": handle_practice,
+    "quiz_answer": handle_quiz_answer,
+    "chat": handle_chat,
+    "quiz_generate": handle_quiz_generate
+}
+
+
+@router.websocket("/tutor/{username}")
+async def tutor_socket(websocket: WebSocket, username: str):
+    """
+    Live tutoring channel: one socket per student for the whole session.
+
+    Client messages are JSON objects with an "id" (echoed back), a
+    "type" (explain, practice, quiz_answer, chat or quiz_generate) and that type's
+    fields. Replies are {"id", "type", "data"} frames: streamed "chunk"
+    frames followed by "done", or a single "error".
+    """
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == username).first()
+        if not user or not user.is_active:
+            await websocket.close(code=4404, reason="User not found")
+            return
+
+        await websocket.accept()
+
+        # A student gets one live session; a new socket replaces the old one
+        previous = active_sessions.get(username)
+        if previous is not None:
+            await previous.websocket.close(code=4409, reason="Replaced by a newer connection")
+
+        live = TutorSocketSession(websocket, user, db)
+        active_sessions[username] = live
+        try:
+            await live.run()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            if active_sessions.get(username) is live:
+                del active_sessions[username]
+    finally:
+        db.close()
@@ -1,6 +1,7 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from typing import List
+import orjson
 from ..database import get_db
 from ..models.user import User
 from ..models.profile import StudentProfile
@@ -11,12 +12,19 @@ from ..schemas.profile import (
     UserResponse,
     ProfileResponse,
     FullProfileResponse,
-    LearningSessionResponse
+    LearningSessionResponse,
+    LearningSessionSearchResult,
+    LearningSessionSearchResponse
 )
+from ..services.search import search_sessions
+from ..services.history_json import json_response, learning_history
+from ..services.user_versions import user_versions
+from ..metrics import TimedRoute
 
 router = APIRouter(
     prefix="/api/profile",
-    tags=["Profile"]
+    tags=["Profile"],
+    route_class=TimedRoute
 )
 
 @router.post("/create", response_model=FullProfileResponse)
@@ -84,12 +92,15 @@ def create_profile(
 @router.get("/{username}", response_model=FullProfileResponse)
 def get_profile(
     username: str,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db)
 ):
     """
     Get a student's complete profile by username.
     
     Returns user info, profile settings, and learning history.
+    Send If-None-Match / If-Modified-Since to get a 304 if nothing changed.
     """
     
     # Find user
@@ -103,6 +114,12 @@ def get_profile(
             detail=f"User '{username}' not found!"
         )
     
+    # Unchanged since the client's copy: skip the queries below
+    validators = user_versions.validators(user.id, "profile")
+    if validators.matches(request):
+        return validators.not_modified()
+    validators.apply(response)
+    
     # Get profile
     profile = db.query(StudentProfile).filter(
         StudentProfile.user_id == user.id
@@ -169,12 +186,14 @@ def update_profile(
     
     db.commit()
     db.refresh(profile)
+    user_versions.bump(user.id)
     
     return ProfileResponse.model_validate(profile)
 
 @router.get("/{username}/history", response_model=List[LearningSessionResponse])
 def get_learning_history(
     username: str,
+    request: Request,
     limit: int = 10,
     db: Session = Depends(get_db)
 ):
@@ -182,6 +201,7 @@ def get_learning_history(
     Get a student's full learning history.
     
     Returns all topics they've studied, most recent first.
+    Send If-None-Match / If-Modified-Since to get a 304 if nothing changed.
     """
     
     # Find user
@@ -195,11 +215,54 @@ def get_learning_history(
             detail=f"User '{username}' not found!"
         )
     
-    # Get sessions
-    sessions = db.query(LearningSession).filter(
-        LearningSession.user_id == user.id
-    ).order_by(
-        LearningSession.created_at.desc()
-    ).limit(limit).all()
+    validators = user_versions.validators(user.id, f"learning-history:{limit}")
+    if validators.matches(request):
+        return validators.not_modified()
+    
+    # Encoded straight from row tuples (see services/history_json.py);
+    # UTC as "Z", like the response_model's serializer
+    return validators.apply(
+        json_response(learning_history(db, user.id, limit), option=orjson.OPT_UTC_Z)
+    )
+
+@router.get("/{username}/history/search", response_model=LearningSessionSearchResponse)
+def search_learning_history(
+    username: str,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    """
+    Search a student's past explanations by topic and content.
+    
+    Uses the database's full-text index (FTS5 on SQLite, tsvector on
+    Postgres) and returns the best matches with a highlighted snippet.
+    """
     
-    return [LearningSessionResponse.model_validate(s) for s in sessions]
\ No newline at end of file
+    # Find user
+    user = db.query(User).filter(
+        User.username == username
+    ).first()
+    
+    if not user:
+        raise HTTPException(
+            status_code=404,
+            detail=f"User '{username}' not found!"
+        )
+    
+    rows = search_sessions(db, user.id, q, limit=limit)
+    
+    return LearningSessionSearchResponse(
+        query=q,
+        results=[
+            LearningSessionSearchResult(
+                id=r.id,
+                topic=r.topic,
+                level=r.level,
+                created_at=r.created_at,
+                snippet=r.snippet or "",
+                rank=float(r.rank or 0.0)
+            )
+            for r in rows
+        ]
+    )
@@ -1,82 +1,161 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Header, Request
 from sqlalchemy.orm import Session
 from sqlalchemy.sql import func
-from typing import Dict
+from typing import Dict, Optional
+from datetime import datetime, timezone
 import json
 from ..database import get_db
 from ..models.user import User
 from ..models.quiz import QuizSession, QuizQuestion
+from ..models.job import QuizJob
+from ..models.assignment import QuizAssignment
+from ..models.review import ReviewItem
 from ..schemas.quiz import (
     QuizGenerateRequest,
     QuizAnswerSubmission,
     QuizSessionResponse,
-    QuizQuestionResponse,
+    QuizJobResponse,
     QuizResultsResponse,
-    QuizQuestionResult
+    QuizQuestionResult,
+    QuizQuestionResponse,
+    AssignmentCreateRequest,
+    AssignmentResponse,
+    AssignRequest,
+    AssignedAttempt,
+    AssignResponse,
+    BatchSubmissionRequest,
+    BatchSubmissionResponse,
+    BatchSubmissionError,
+    ConceptMasteryResponse,
+    MasteryResponse,
+    ReviewQuizResponse,
+    ReviewSubmission,
+    ReviewQuestionResult,
+    ReviewResultsResponse
+)
+from ..services.quiz_store import (
+    quiz_job_response,
+    quiz_session_response,
+    save_assignment,
+    load_quiz_questions,
+    graded_answer,
+    record_answer,
+    take_live_answers
 )
 from ..services.ai_service import ai_service
+from ..services.usage_ledger import bind_caller, BudgetExceededError
+from ..services.job_queue import quiz_jobs
+from ..services.idempotency import idempotency_store
+from ..services.grading import grade_batch, feedback_for, PASS_SCORE
+from ..services.mastery import update_mastery, weakest_concepts
+from ..services.review import schedule_missed, due_reviews, sm2, QUALITY_CORRECT, QUALITY_MISSED
+from ..services.history_json import json_response, quiz_history
+from ..services.user_versions import user_versions
+from ..metrics import TimedRoute
 
 router = APIRouter(
     prefix="/api/quiz",
-    tags=["Quiz"]
+    tags=["Quiz"],
+    route_class=TimedRoute
 )
 
-@router.post("/generate", response_model=QuizSessionResponse)
+@router.post("/generate", response_model=QuizJobResponse, status_code=202)
 async def generate_quiz(
     request: QuizGenerateRequest,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key")
 ):
     """  
-    Generate a new quiz for a topic.
+    Queue generation of a new quiz for a topic.
     
-    The AI creates questions based on student's level.
-    Questions are saved to database but correct answers are hidden from response.
+    Returns a job right away instead of holding the request open for the
+    LLM call. Poll GET /api/quiz/jobs/{job_id} (or use the live tutoring
+    socket) until the job succeeds; its `quiz` field then holds the
+    questions, with correct answers hidden.
+
+    Send an Idempotency-Key header so client retries return the same job
+    instead of generating another quiz.
     """
     
     # Find user
     user = db.query(User).filter(User.username == request.username).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    
+
+    async def enqueue():
+        job = quiz_jobs.enqueue(
+            db,
+            user=user,
+            topic=request.topic,
+            level=request.level,
+            num_questions=request.num_questions
+        )
+        return quiz_job_response(db, job)
+
+    return await idempotency_store.run(
+        idempotency_key, "/api/quiz/generate", user.id, request, enqueue, status_code=202
+    )
+
+@router.get("/jobs/{job_id}", response_model=QuizJobResponse)
+def get_quiz_job(
+    job_id: str,
+    db: Session = Depends(get_db)
+):
+    """Get the state of a quiz generation job, with the quiz once it is ready"""
+    job = db.query(QuizJob).filter(QuizJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Quiz job not found")
+    return quiz_job_response(db, job)
+
+@router.get("/session/{quiz_session_id}", response_model=QuizSessionResponse)
+def get_quiz_session(
+    quiz_session_id: str,
+    db: Session = Depends(get_db)
+):
+    """Get a quiz to take, e.g. a student's attempt at a class assignment"""
+    quiz = db.query(QuizSession).filter(QuizSession.id == quiz_session_id).first()
+    if not quiz:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    return quiz_session_response(quiz)
+
+@router.post("/assignments", response_model=AssignmentResponse)
+async def create_assignment(
+    request: AssignmentCreateRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Generate one quiz for a whole class.
+
+    The questions are generated and stored once; assign them to students
+    with /assignments/{assignment_id}/assign.
+    """
+    teacher = db.query(User).filter(User.username == request.teacher_username).first()
+    if not teacher:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    bind_caller("/api/quiz/assignments", request.teacher_username)
     try:
-        # Generate questions using AI
         questions_data = await ai_service.generate_quiz(
             topic=request.topic,
             level=request.level,
             num_questions=request.num_questions
         )
-        
-        # Create quiz session
-        quiz_session = QuizSession(
-            user_id=user.id,
+        assignment = save_assignment(
+            db,
+            teacher_id=teacher.id,
             topic=request.topic,
             level=request.level,
-            total_questions=len(questions_data)
+            questions_data=questions_data
         )
-        db.add(quiz_session)
-        db.flush()  # Get the ID
-        
-        # Save questions to database
-        for q_data in questions_data:
-            question = QuizQuestion(
-                quiz_session_id=quiz_session.id,
-                question_number=q_data["question_number"],
-                question_text=q_data["question_text"],
-                options=json.dumps(q_data["options"]),  # Store as JSON string
-                correct_answer=q_data["correct_answer"],
-                difficulty=q_data.get("difficulty", "medium"),
-                concept=q_data.get("concept", request.topic),
-                explanation=q_data.get("explanation", "")
-            )
-            db.add(question)
-        
         db.commit()
-        db.refresh(quiz_session)
-        
-        # Get questions without correct answers for response
-        questions_for_response = []
-        for q in quiz_session.questions:
-            questions_for_response.append(
+        db.refresh(assignment)
+
+        return AssignmentResponse(
+            id=assignment.id,
+            topic=assignment.topic,
+            level=assignment.level,
+            total_questions=assignment.total_questions,
+            questions=[
                 QuizQuestionResponse(
                     id=q.id,
                     question_number=q.question_number,
@@ -84,17 +163,13 @@ async def generate_quiz(
                     options=json.loads(q.options),
                     difficulty=q.difficulty
                 )
-            )
-        
-        return QuizSessionResponse(
-            id=quiz_session.id,
-            topic=quiz_session.topic,
-            level=quiz_session.level,
-            total_questions=quiz_session.total_questions,
-            questions=sorted(questions_for_response, key=lambda x: x.question_number),
-            started_at=quiz_session.started_at
+                for q in assignment.questions
+            ],
+            created_at=assignment.created_at
         )
-        
+
+    except BudgetExceededError as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -102,16 +177,84 @@ async def generate_quiz(
             detail=f"Failed to generate quiz: {str(e)}"
         )
 
+@router.post("/assignments/{assignment_id}/assign", response_model=AssignResponse)
+def assign_quiz(
+    assignment_id: str,
+    request: AssignRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Give each listed student an attempt at a shared quiz.
+
+    No LLM calls and no question copies: every attempt is a QuizSession
+    pointing at the shared questions. Students who already have an
+    attempt keep it.
+    """
+    assignment = db.query(QuizAssignment).filter(QuizAssignment.id == assignment_id).first()
+    if not assignment:
+        raise HTTPException(status_code=404, detail="Assignment not found")
+
+    usernames = list(dict.fromkeys(request.usernames))
+    users = db.query(User.id, User.username).filter(User.username.in_(usernames)).all()
+    user_ids = {u.username: u.id for u in users}
+
+    existing = dict(
+        db.query(QuizSession.user_id, QuizSession.id).filter(
+            QuizSession.assignment_id == assignment.id,
+            QuizSession.user_id.in_(user_ids.values())
+        ).all()
+    )
+
+    new_attempts = [
+        QuizSession(
+            user_id=user_id,
+            assignment_id=assignment.id,
+            topic=assignment.topic,
+            level=assignment.level,
+            total_questions=assignment.total_questions
+        )
+        for user_id in user_ids.values()
+        if user_id not in existing
+    ]
+    db.add_all(new_attempts)
+    db.commit()
+
+    attempt_ids = {**existing, **{a.user_id: a.id for a in new_attempts}}
+    return AssignResponse(
+        assignment_id=assignment.id,
+        assigned=[
+            AssignedAttempt(username=name, quiz_session_id=attempt_ids[user_ids[name]])
+            for name in usernames if name in user_ids
+        ],
+        not_found=[name for name in usernames if name not in user_ids]
+    )
+
 @router.post("/submit", response_model=QuizResultsResponse)
 async def submit_quiz(
     submission: QuizAnswerSubmission,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key")
 ):
     """
     Submit quiz answers and calculate score.
     
     Returns detailed results with correct answers and explanations.
+    A retry with the same Idempotency-Key gets the original results back.
     """
+    # Keys are per student: the quiz's owner is the one submitting it
+    owner_id = db.query(QuizSession.user_id).filter(
+        QuizSession.id == submission.quiz_session_id
+    ).scalar()
+    return await idempotency_store.run(
+        idempotency_key,
+        "/api/quiz/submit",
+        owner_id,
+        submission,
+        lambda: grade_quiz(submission, db)
+    )
+
+async def grade_quiz(submission: QuizAnswerSubmission, db: Session) -> QuizResultsResponse:
+    """Grade a submission and store the answers and score."""
     
     # Get quiz session
     quiz = db.query(QuizSession).filter(
@@ -121,13 +264,21 @@ async def submit_quiz(
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found")
     
-    if quiz.completed:
+    # Claim the quiz with a conditional update so two concurrent
+    # submissions can't both get past the completed check
+    claimed = db.query(QuizSession).filter(
+        QuizSession.id == quiz.id,
+        QuizSession.completed == False
+    ).update({"completed": True}, synchronize_session=False)
+    
+    if not claimed:
+        db.rollback()
         raise HTTPException(status_code=400, detail="Quiz already submitted")
     
-    # Get all questions
-    questions = db.query(QuizQuestion).filter(
-        QuizQuestion.quiz_session_id == quiz.id
-    ).order_by(QuizQuestion.question_number).all()
+    # Get all questions (shared ones for a class assignment)
+    questions = load_quiz_questions(db, quiz)
+    # Questions answered live already counted towards mastery and review
+    answered_live = take_live_answers(db, [quiz])
     
     # Grade the quiz
     correct_count = 0
@@ -139,6 +290,7 @@ async def submit_quiz(
     hard_total = 0
     
     question_results = []
+    mastery_answers = []
     
     for question in questions:
         # Frontend sends answers as {0: "B", 1: "A", 2: "C"}
@@ -148,9 +300,8 @@ async def submit_quiz(
         
         is_correct = user_answer == question.correct_answer
         
-        # Update question with user's answer
-        question.user_answer = user_answer
-        question.is_correct = is_correct
+        # Store the user's answer
+        record_answer(db, quiz, question, user_answer, is_correct)
         
         if is_correct:
             correct_count += 1
@@ -169,6 +320,9 @@ async def submit_quiz(
             if is_correct:
                 hard_correct += 1
         
+        if (quiz.id, question.id) not in answered_live:
+            mastery_answers.append(graded_answer(quiz, question, is_correct))
+        
         # Build result for this question
         question_results.append(
             QuizQuestionResult(
@@ -185,7 +339,7 @@ async def submit_quiz(
     
     # Calculate score
     score = (correct_count / len(questions)) * 100 if len(questions) > 0 else 0
-    passed = score >= 60
+    passed = score >= PASS_SCORE
     
     # Update quiz session
     quiz.correct_answers = correct_count
@@ -194,17 +348,13 @@ async def submit_quiz(
     quiz.completed = True
     quiz.completed_at = func.now()
     
-    db.commit()
+    # Update per-concept skill and per-question difficulty estimates
+    update_mastery(db, mastery_answers)
+    # Missed questions come back later in review sessions
+    schedule_missed(db, mastery_answers)
     
-    # Generate feedback
-    if score >= 90:
-        feedback = "🌟 Excellent! You have a strong understanding of this topic!"
-    elif score >= 70:
-        feedback = "👍 Good job! You're on the right track. Review the incorrect answers to improve."
-    elif score >= 60:
-        feedback = "✅ You passed! But there's room for improvement. Practice more on the concepts you missed."
-    else:
-        feedback = "📚 Keep practicing! Review the explanations and try studying this topic again."
+    db.commit()
+    await user_versions.abump(quiz.user_id)
     
     return QuizResultsResponse(
         quiz_id=quiz.id,
@@ -221,48 +371,206 @@ async def submit_quiz(
         medium_total=medium_total,
         hard_correct=hard_correct,
         hard_total=hard_total,
-        feedback=feedback
+        feedback=feedback_for(score)
     )
 
-@router.get("/{username}/history")
-async def get_quiz_history(
+@router.post("/submit/batch", response_model=BatchSubmissionResponse)
+def submit_quiz_batch(
+    request: BatchSubmissionRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Grade many quiz submissions in one request (e.g. a whole class at the
+    end of a period).
+
+    All questions are loaded together, graded with array comparisons and
+    written back in one bulk update. Quizzes that don't exist or were
+    already submitted are reported in `errors` instead of failing the batch.
+    """
+    try:
+        results, errors = grade_batch(db, request.submissions)
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Failed to grade batch: {str(e)}")
+
+    return BatchSubmissionResponse(
+        results=results,
+        errors=[BatchSubmissionError(**e) for e in errors]
+    )
+
+@router.get("/{username}/mastery", response_model=MasteryResponse)
+def get_mastery(
+    username: str,
+    topic: Optional[str] = None,
+    limit: int = 5,
+    db: Session = Depends(get_db)
+):
+    """Get a student's weakest concepts (lowest skill estimate first)"""
+    
+    user = db.query(User).filter(User.username == username).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    concepts = weakest_concepts(db, user.id, topic=topic, limit=limit)
+    
+    return MasteryResponse(
+        username=username,
+        weakest=[
+            ConceptMasteryResponse(
+                concept=m.concept,
+                topic=m.topic,
+                rating=round(m.rating, 1),
+                attempts=m.attempts,
+                correct=m.correct,
+                accuracy=round(m.correct / m.attempts * 100, 1) if m.attempts else 0.0
+            )
+            for m in concepts
+        ]
+    )
+
+@router.get("/{username}/review", response_model=ReviewQuizResponse)
+def get_review_quiz(
     username: str,
+    topic: Optional[str] = None,
     limit: int = 10,
     db: Session = Depends(get_db)
 ):
-    """Get user's quiz history"""
+    """
+    Get a review quiz of previously missed questions that are due.
+    
+    Built from stored questions only (no LLM call). Answer it with
+    POST /api/quiz/review/submit, keyed by each question's id.
+    """
+    
+    user = db.query(User).filter(User.username == username).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    items = due_reviews(db, user.id, limit=limit, topic=topic)
+    
+    return ReviewQuizResponse(
+        username=username,
+        total_questions=len(items),
+        questions=[
+            QuizQuestionResponse(
+                id=item.id,
+                question_number=i + 1,
+                question_text=item.question_text,
+                options=json.loads(item.options),
+                difficulty=item.difficulty
+            )
+            for i, item in enumerate(items)
+        ]
+    )
+
+@router.post("/review/submit", response_model=ReviewResultsResponse)
+def submit_review(submission: ReviewSubmission, db: Session = Depends(get_db)):
+    """
+    Submit answers to a review quiz.
+    
+    Each answer reschedules its question (SM-2): correct answers push the
+    next review further out, misses bring it back tomorrow.
+    """
+    
+    user = db.query(User).filter(User.username == submission.username).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    items = db.query(ReviewItem).filter(
+        ReviewItem.user_id == user.id,
+        ReviewItem.id.in_(list(submission.answers))
+    ).all()
+    
+    now = datetime.now(timezone.utc)
+    results = []
+    mastery_answers = []
+    for item in items:
+        user_answer = submission.answers.get(item.id)
+        is_correct = user_answer == item.correct_answer
+        sm2(item, QUALITY_CORRECT if is_correct else QUALITY_MISSED, now)
+        
+        mastery_answers.append({
+            "user_id": user.id,
+            "topic": item.topic,
+            "concept": item.concept,
+            "question_text": item.question_text,
+            "difficulty": item.difficulty,
+            "is_correct": is_correct
+        })
+        results.append(
+            ReviewQuestionResult(
+                id=item.id,
+                question_text=item.question_text,
+                options=json.loads(item.options),
+                user_answer=user_answer,
+                correct_answer=item.correct_answer,
+                is_correct=is_correct,
+                explanation=item.explanation,
+                difficulty=item.difficulty,
+                next_review_at=item.due_at
+            )
+        )
+    
+    update_mastery(db, mastery_answers)
+    db.commit()
+    
+    correct_count = sum(1 for r in results if r.is_correct)
+    return ReviewResultsResponse(
+        username=submission.username,
+        total_questions=len(results),
+        correct_answers=correct_count,
+        questions=results
+    )
+
+@router.get("/{username}/assignments")
+def get_open_assignments(
+    username: str,
+    db: Session = Depends(get_db)
+):
+    """Get a student's assigned class quizzes that are not submitted yet"""
     
     user = db.query(User).filter(User.username == username).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    quizzes = db.query(QuizSession).filter(
+    attempts = db.query(QuizSession).filter(
         QuizSession.user_id == user.id,
-        QuizSession.completed == True
+        QuizSession.assignment_id.isnot(None),
+        QuizSession.completed == False
     ).order_by(
-        QuizSession.completed_at.desc()
-    ).limit(limit).all()
+        QuizSession.started_at.desc()
+    ).all()
     
     return {
-        "quizzes": [{
-            "id": str(q.id),
-            "topic": q.topic,
-            "score": q.score,
-            "correct_answers": q.correct_answers,
-            "total_questions": q.total_questions,
-            "time_taken": q.time_taken,
-            "completed_at": q.completed_at,
-            "questions": [
-                {
-                    "question_text": qq.question_text,
-                    "user_answer": qq.user_answer,
-                    "correct_answer": qq.correct_answer,
-                    "is_correct": qq.is_correct,
-                    "difficulty": qq.difficulty,
-                    "explanation": qq.explanation,
-                    "options": json.loads(qq.options)
-                }
-                for qq in q.questions
-            ]
-        } for q in quizzes]
-    }
\ No newline at end of file
+        "assignments": [{
+            "quiz_session_id": a.id,
+            "assignment_id": a.assignment_id,
+            "topic": a.topic,
+            "level": a.level,
+            "total_questions": a.total_questions,
+            "assigned_at": a.started_at
+        } for a in attempts]
+    }
+
+@router.get("/{username}/history")
+async def get_quiz_history(
+    username: str,
+    request: Request,
+    limit: int = 10,
+    db: Session = Depends(get_db)
+):
+    """
+    Get user's quiz history, with every question of each quiz.
+    Send If-None-Match / If-Modified-Since to get a 304 if nothing changed.
+    """
+    
+    user = db.query(User).filter(User.username == username).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    validators = await user_versions.avalidators(user.id, f"quiz-history:{limit}")
+    if validators.matches(request):
+        return validators.not_modified()
+    
+    # Encoded straight from row tuples (see services/history_json.py)
+    return validators.apply(json_response(quiz_history(db, user.id, limit)))
@@ -0,0 +1,93 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func, case
+from datetime import datetime, timedelta, timezone
+from ..database import get_db
+from ..models.usage import LLMUsage
+from ..schemas.usage import UsageSummaryRow, UsageSummaryResponse, UserBudgetResponse, PregenerationReport
+from ..services.usage_ledger import usage_ledger
+from ..services.pregeneration import pregeneration
+from ..metrics import TimedRoute
+
+router = APIRouter(
+    prefix="/api/usage",
+    tags=["Usage"],
+    route_class=TimedRoute
+)
+
+GROUP_COLUMNS = {
+    "user": LLMUsage.username,
+    "endpoint": LLMUsage.endpoint,
+    "model": LLMUsage.model,
+    "day": func.date(LLMUsage.created_at)
+}
+
+@router.get("/summary", response_model=UsageSummaryResponse)
+def get_usage_summary(
+    group_by: str = Query("endpoint", pattern="^(user|endpoint|model|day)$"),
+    days: int = Query(7, ge=1, le=365),
+    db: Session = Depends(get_db)
+):
+    """
+    Break down LLM calls, tokens and latency from the usage ledger.
+
+    Grouped by user, endpoint, model or day, heaviest groups first.
+    """
+    group_column = GROUP_COLUMNS[group_by]
+    since = datetime.now(timezone.utc) - timedelta(days=days)
+
+    rows = db.query(
+        group_column.label("key"),
+        func.count(LLMUsage.id).label("calls"),
+        func.sum(case((LLMUsage.success == False, 1), else_=0)).label("failed_calls"),
+        func.sum(LLMUsage.prompt_tokens).label("prompt_tokens"),
+        func.sum(LLMUsage.completion_tokens).label("completion_tokens"),
+        func.sum(LLMUsage.total_tokens).label("total_tokens"),
+        func.avg(LLMUsage.latency_ms).label("avg_latency_ms")
+    ).filter(
+        LLMUsage.created_at >= since
+    ).group_by(
+        group_column
+    ).order_by(
+        func.sum(LLMUsage.total_tokens).desc()
+    ).all()
+
+    return UsageSummaryResponse(
+        group_by=group_by,
+        days=days,
+        rows=[
+            UsageSummaryRow(
+                key=str(r.key) if r.key is not None else None,
+                calls=r.calls,
+                failed_calls=r.failed_calls or 0,
+                prompt_tokens=r.prompt_tokens or 0,
+                completion_tokens=r.completion_tokens or 0,
+                total_tokens=r.total_tokens or 0,
+                avg_latency_ms=round(r.avg_latency_ms or 0.0, 1)
+            )
+            for r in rows
+        ]
+    )
+
+@router.get("/pregeneration/report", response_model=PregenerationReport)
+async def get_pregeneration_report():
+    """
+    Dry run of the nightly pregeneration: which keys it would generate,
+    the estimated token cost, and the expected cache hit rate before and
+    after (weighted by recent popularity).
+    """
+    return await pregeneration.run(dry_run=True)
+
+@router.get("/{username}/today", response_model=UserBudgetResponse)
+def get_user_budget(username: str):
+    """Get a user's token spend for today and what is left of the daily budget"""
+    budget = usage_ledger.daily_token_budget
+    used = usage_ledger.tokens_used_today(username)
+
+    return UserBudgetResponse(
+        username=username,
+        date=datetime.now(timezone.utc).date(),
+        tokens_used=used,
+        daily_budget=budget if budget > 0 else None,
+        tokens_remaining=max(0, budget - used) if budget > 0 else None
+    )
@@ -0,0 +1,44 @@
+from .database import Base, engine, SessionLocal
+
+
+def _run_once(name: str, migration):
+    """
+    Run a one-off data migration, `migration(db)`, unless this database
+    has already had it.
+
+    The marker row is inserted in the same transaction as the migration's
+    changes: with several workers starting at once only the first runs it
+    (the others wait on that row, then skip), and a failed run leaves no
+    marker behind.
+    """
+    from .models import AppliedMigration
+    from .services.mastery import insert_missing
+
+    db = SessionLocal()
+    try:
+        if insert_missing(db, AppliedMigration, {name: {"name": name}}):
+            migration(db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def create_schema():
+    """
+    Create any missing tables and the full-text search index, and run the
+    one-off data migrations this database hasn't had yet (queueing
+    questions missed before review scheduling existed).
+
+    Runs at startup when AUTO_CREATE_SCHEMA is set (or once in the
+    gunicorn master), never as a side effect of importing the app.
+    """
+    from . import models  # noqa: F401  (registers the tables)
+    from .services.search import ensure_search_index
+    from .services.review import backfill_missed
+
+    Base.metadata.create_all(bind=engine)
+    ensure_search_index()
+    _run_once("review_backfill_missed", backfill_missed)
@@ -1,5 +1,7 @@
 from pydantic import BaseModel, Field
-from typing import Literal, Optional
+from typing import List, Literal, Optional
+from datetime import datetime
+from .quiz import QuizSessionResponse
 
 
 class GreetingRequest(BaseModel):
@@ -64,3 +66,95 @@ class PracticeQuestionsResponse(BaseModel):
     level: str
     questions: str
     count: int
+
+
+class LessonRequest(BaseModel):
+    """Request for a full lesson (explanation + practice + quiz) in one call"""
+    username: str = Field(..., min_length=2)
+    topic: str = Field(..., min_length=2, max_length=200)
+    level: Literal["beginner", "intermediate", "advanced"]
+    learning_style: str = Field(default="visual")
+    num_practice_questions: int = Field(default=3, ge=1, le=5)
+    num_quiz_questions: int = Field(default=5, ge=3, le=10)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "username": "anshita",
+                "topic": "arrays",
+                "level": "beginner",
+                "learning_style": "visual",
+                "num_practice_questions": 3,
+                "num_quiz_questions": 5
+            }
+        }
+
+
+class LessonResponse(BaseModel):
+    """Explanation, practice questions and quiz generated together"""
+    learning_session_id: str
+    explanation: TopicResponse
+    practice: PracticeQuestionsResponse
+    quiz: QuizSessionResponse
+
+
+class ChatRequest(BaseModel):
+    """A student message in a multi-turn tutor chat"""
+    username: str = Field(..., min_length=2)
+    message: str = Field(..., min_length=1, max_length=2000)
+    conversation_id: Optional[str] = None      # continue an existing chat
+    learning_session_id: Optional[str] = None  # ground a new chat in a past explanation
+    topic: Optional[str] = Field(default=None, max_length=200)
+    level: Optional[Literal["beginner", "intermediate", "advanced"]] = None
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "username": "anshita",
+                "message": "Why is inserting at the start of an array slow?",
+                "learning_session_id": "uuid-here"
+            }
+        }
+
+
+class ChatResponse(BaseModel):
+    """Tutor reply in a multi-turn chat"""
+    conversation_id: str
+    reply: str
+    turn_count: int
+    summarized_turns: int
+    context_tokens: int   # estimated prompt size sent to the model
+
+
+class ConversationTurnResponse(BaseModel):
+    """One message of a tutor chat"""
+    turn_number: int
+    role: str
+    content: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ConversationResponse(BaseModel):
+    """A tutor chat with its rolling summary and latest messages"""
+    id: str
+    topic: str
+    level: str
+    learning_session_id: Optional[str]
+    summary: Optional[str]
+    turn_count: int
+    turns: List[ConversationTurnResponse]
+
+
+class TopicSuggestion(BaseModel):
+    """An autocomplete suggestion"""
+    topic: str
+    count: int         # How often students have studied it
+
+
+class TopicSuggestResponse(BaseModel):
+    """Topic autocomplete results, most popular first"""
+    query: str
+    suggestions: List[TopicSuggestion]
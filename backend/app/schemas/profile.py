@@ -85,4 +85,18 @@ class FullProfileResponse(BaseModel):
     user: UserResponse
     profile: ProfileResponse
     recent_sessions: List[LearningSessionResponse]
-    total_topics_studied: int
\ No newline at end of file
+    total_topics_studied: int
+
+class LearningSessionSearchResult(BaseModel):
+    """A learning session matching a search, with the matching passage"""
+    id: str
+    topic: str
+    level: str
+    created_at: datetime
+    snippet: str        # Matched words wrapped in <mark>...</mark>
+    rank: float         # Higher = better match
+
+class LearningSessionSearchResponse(BaseModel):
+    """Search results over a student's past explanations"""
+    query: str
+    results: List[LearningSessionSearchResult]
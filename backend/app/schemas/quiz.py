@@ -96,4 +96,127 @@ class QuizResultsResponse(BaseModel):
     hard_total: int
     
     # Feedback
-    feedback: str  # AI-generated feedback based on performance
\ No newline at end of file
+    feedback: str  # AI-generated feedback based on performance
+
+class QuizJobResponse(BaseModel):
+    """State of a background quiz generation job"""
+    id: str
+    status: Literal["queued", "running", "succeeded", "failed"]
+    topic: str
+    level: str
+    attempts: int
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    quiz: Optional[QuizSessionResponse] = None   # set once the job succeeded
+
+
+# ─── Class Assignments ────────────────────────────────────────────
+
+class AssignmentCreateRequest(BaseModel):
+    """Request to generate one quiz shared by a whole class"""
+    teacher_username: str = Field(..., min_length=2)
+    topic: str = Field(..., min_length=2, max_length=200)
+    level: Literal["beginner", "intermediate", "advanced"]
+    num_questions: int = Field(default=5, ge=3, le=10)
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "teacher_username": "ms_rao",
+                "topic": "linked lists",
+                "level": "intermediate",
+                "num_questions": 5
+            }
+        }
+
+class AssignmentResponse(BaseModel):
+    """A shared quiz (correct answers hidden)"""
+    id: str
+    topic: str
+    level: str
+    total_questions: int
+    questions: List[QuizQuestionResponse]
+    created_at: datetime
+
+class AssignRequest(BaseModel):
+    """Students to give an attempt at a shared quiz"""
+    usernames: List[str] = Field(..., min_length=1, max_length=500)
+
+class AssignedAttempt(BaseModel):
+    """One student's attempt at a shared quiz"""
+    username: str
+    quiz_session_id: str
+
+class AssignResponse(BaseModel):
+    """Result of assigning a shared quiz to a class"""
+    assignment_id: str
+    assigned: List[AssignedAttempt]
+    not_found: List[str]
+
+
+# ─── Batch Grading ────────────────────────────────────────────────
+
+class BatchSubmissionRequest(BaseModel):
+    """Many quiz submissions graded together"""
+    submissions: List[QuizAnswerSubmission] = Field(..., min_length=1, max_length=1000)
+
+class BatchSubmissionError(BaseModel):
+    """A submission in the batch that was not graded"""
+    quiz_session_id: str
+    detail: str
+
+class BatchSubmissionResponse(BaseModel):
+    """Results of a batch submission"""
+    results: List[QuizResultsResponse]
+    errors: List[BatchSubmissionError]
+
+
+# ─── Mastery ──────────────────────────────────────────────────────
+
+class ConceptMasteryResponse(BaseModel):
+    """Skill estimate for one concept"""
+    concept: str
+    topic: Optional[str]
+    rating: float      # Elo-style, starts at 1500
+    attempts: int
+    correct: int
+    accuracy: float    # Percentage
+
+class MasteryResponse(BaseModel):
+    """A student's weakest concepts"""
+    username: str
+    weakest: List[ConceptMasteryResponse]
+
+
+# ─── Review ───────────────────────────────────────────────────────
+
+class ReviewQuizResponse(BaseModel):
+    """Due review questions (correct answers hidden)"""
+    username: str
+    total_questions: int
+    questions: List[QuizQuestionResponse]  # id is the review item id
+
+class ReviewSubmission(BaseModel):
+    """Answers to a review quiz"""
+    username: str
+    answers: Dict[str, str]  # {review_item_id: "B"}
+
+class ReviewQuestionResult(BaseModel):
+    """Result for one review question"""
+    id: str
+    question_text: str
+    options: Dict[str, str]
+    user_answer: Optional[str]
+    correct_answer: str
+    is_correct: bool
+    explanation: Optional[str]
+    difficulty: str
+    next_review_at: datetime
+
+class ReviewResultsResponse(BaseModel):
+    """Results of a review quiz"""
+    username: str
+    total_questions: int
+    correct_answers: int
+    questions: List[ReviewQuestionResult]
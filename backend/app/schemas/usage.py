@@ -0,0 +1,47 @@
+from pydantic import BaseModel
+from typing import List, Literal, Optional
+from datetime import date
+
+class UsageSummaryRow(BaseModel):
+    """LLM usage aggregated over one group (user, endpoint, model or day)"""
+    key: Optional[str]
+    calls: int
+    failed_calls: int
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+    avg_latency_ms: float
+
+class UsageSummaryResponse(BaseModel):
+    """LLM usage breakdown for the last N days"""
+    group_by: Literal["user", "endpoint", "model", "day"]
+    days: int
+    rows: List[UsageSummaryRow]
+
+class UserBudgetResponse(BaseModel):
+    """A user's LLM token spend for today against the daily budget"""
+    username: str
+    date: date
+    tokens_used: int
+    daily_budget: Optional[int]      # None when budgets are disabled
+    tokens_remaining: Optional[int]
+
+
+class PregenerationItem(BaseModel):
+    """A key the nightly run would generate content for"""
+    kind: str               # "explain" or "quiz"
+    level: str
+    style: Optional[str]
+    topic: str
+
+
+class PregenerationReport(BaseModel):
+    """Dry run of the nightly pregeneration"""
+    keys_considered: int
+    already_fresh: int
+    to_generate: List[PregenerationItem]
+    estimated_tokens: int
+    token_budget: int
+    expected_hit_rate_before: float   # Share of requests answered from cache, by recent popularity
+    expected_hit_rate_after: float
+    observed_hit_rate: float          # Actual cache hit rate since startup
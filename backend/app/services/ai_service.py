@@ -1,9 +1,23 @@
-from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+from typing import TYPE_CHECKING
 from ..config import settings
+from .usage_ledger import usage_ledger, current_caller, estimate_tokens
+from .cassettes import cassettes
+from ..metrics import observe_llm
+from ..admission import admission
 import json
 import re
+import time
+
+# langchain is imported on first use, not at app import (it is most of
+# the cold-start time)
+if TYPE_CHECKING:
+    from langchain_core.prompts import ChatPromptTemplate
+
+
+def _prompt(messages: list) -> "ChatPromptTemplate":
+    """ChatPromptTemplate.from_messages, importing langchain on first use."""
+    from langchain_core.prompts import ChatPromptTemplate
+    return ChatPromptTemplate.from_messages(messages)
 
 
 class AITutorService:
@@ -16,17 +30,141 @@ class AITutorService:
     """
 
     def __init__(self):
-        self.llm = ChatGroq(
-            groq_api_key=settings.GROQ_API_KEY,
-            model_name="llama-3.3-70b-versatile",  # FIXED: Updated to current model
-            temperature=0.7
+        self.model_name = "llama-3.3-70b-versatile"  # FIXED: Updated to current model
+        self._llm = None
+
+    @property
+    def llm(self):
+        """
+        The chat model, built (and langchain imported) on first use: Groq,
+        or the offline fake when LLM_BACKEND=fake.
+        """
+        if self._llm is None and settings.LLM_BACKEND == "fake":
+            from .fake_llm import FakeChatModel, MODEL_NAME
+            self.model_name = MODEL_NAME
+            self._llm = FakeChatModel(
+                latency_ms=settings.FAKE_LLM_LATENCY_MS,
+                latency_sigma=settings.FAKE_LLM_LATENCY_SIGMA,
+                error_rate=settings.FAKE_LLM_ERROR_RATE,
+                seed=settings.FAKE_LLM_SEED
+            )
+            print(" AI Service using the offline fake LLM")
+        elif self._llm is None:
+            from langchain_groq import ChatGroq
+            self._llm = ChatGroq(
+                groq_api_key=settings.GROQ_API_KEY,
+                model_name=self.model_name,
+                temperature=0.7
+            )
+
+            print(" AI Service initialized with Groq (FREE!)")
+            print("   Model: Llama 3.3 70B Versatile")
+        return self._llm
+
+    def warm(self):
+        """Import langchain and build the client now instead of on the first request."""
+        _prompt([("user", "{text}")])
+        if not cassettes.replaying:
+            return self.llm
+
+    async def _invoke(self, method: str, prompt: "ChatPromptTemplate", inputs: dict, bind: dict = None) -> str:
+        """
+        Run prompt | llm and return the reply text. `bind` holds extra
+        model options for this call (e.g. response_format).
+
+        Every chain invocation goes through here so the caller's daily
+        budget is checked before the call, and token usage and latency
+        land in the usage ledger afterwards. With LLM_CASSETTE_MODE set,
+        replies are recorded to, or replayed from, the cassette store.
+        """
+        _, username = current_caller()
+        await usage_ledger.check_budget(username)
+
+        started = time.perf_counter()
+        try:
+            with admission.llm_call():
+                if cassettes.replaying:
+                    # The model client is never built while replaying
+                    message = await cassettes.replay(method, prompt, inputs, bind)
+                else:
+                    chain = prompt | (self.llm.bind(**bind) if bind else self.llm)
+                    message = await chain.ainvoke(inputs)
+        except Exception:
+            observe_llm(method, time.perf_counter() - started, success=False)
+            usage_ledger.record(
+                method=method,
+                model=self.model_name,
+                prompt_tokens=0,
+                completion_tokens=0,
+                latency_ms=(time.perf_counter() - started) * 1000,
+                success=False
+            )
+            raise
+        latency_ms = (time.perf_counter() - started) * 1000
+        observe_llm(method, latency_ms / 1000, success=True)
+        if cassettes.recording:
+            cassettes.record(method, prompt, inputs, message, latency_ms, bind)
+
+        text = message.content
+        metadata = getattr(message, "response_metadata", None) or {}
+        token_usage = metadata.get("token_usage") or {}
+        prompt_tokens = token_usage.get("prompt_tokens")
+        if prompt_tokens is None:
+            prompt_tokens = estimate_tokens(prompt.format(**inputs))
+
+        usage_ledger.record(
+            method=method,
+            model=metadata.get("model_name", self.model_name),
+            prompt_tokens=prompt_tokens,
+            completion_tokens=token_usage.get("completion_tokens", estimate_tokens(text)),
+            latency_ms=latency_ms
         )
-        
-        print(" AI Service initialized with Groq (FREE!)")
-        print("   Model: Llama 3.3 70B Versatile")
+        return text
+
+    async def _stream(self, method: str, prompt: "ChatPromptTemplate", inputs: dict):
+        """
+        Streaming counterpart of _invoke: yields reply text chunks.
+
+        Streams report no token usage, so the ledger entry uses estimates.
+        """
+        _, username = current_caller()
+        await usage_ledger.check_budget(username)
+
+        started = time.perf_counter()
+        parts = []
+        timed_parts = []
+        success = False
+        try:
+            with admission.llm_call():
+                if cassettes.replaying:
+                    async for text in cassettes.replay_stream(method, prompt, inputs):
+                        parts.append(text)
+                        yield text
+                else:
+                    chain = prompt | self.llm
+                    async for chunk in chain.astream(inputs):
+                        if chunk.content:
+                            parts.append(chunk.content)
+                            timed_parts.append(((time.perf_counter() - started) * 1000, chunk.content))
+                            yield chunk.content
+            success = True
+            if cassettes.recording:
+                cassettes.record_stream(
+                    method, prompt, inputs, timed_parts, (time.perf_counter() - started) * 1000
+                )
+        finally:
+            observe_llm(method, time.perf_counter() - started, success=success)
+            usage_ledger.record(
+                method=method,
+                model=self.model_name,
+                prompt_tokens=estimate_tokens(prompt.format(**inputs)),
+                completion_tokens=estimate_tokens("".join(parts)),
+                latency_ms=(time.perf_counter() - started) * 1000,
+                success=success
+            )
 
     async def generate_greeting(self, student_name: str, level: str) -> str:
-        prompt = ChatPromptTemplate.from_messages([
+        prompt = _prompt([
             ("system", """You are a friendly and encouraging AI tutor named "TutorBot".
 
 Your role:
@@ -43,15 +181,50 @@ Student Level: {level}
             ("user", "Generate a greeting for {name}")
         ])
 
-        chain = prompt | self.llm | StrOutputParser()
-
-        result = await chain.ainvoke({
+        result = await self._invoke("generate_greeting", prompt, {
             "name": student_name,
             "level": level
         })
 
         return result
 
+    async def generate_greeting_templates(self, level: str, count: int = 8) -> list:
+        """
+        Generate name-agnostic greeting templates for one level.
+
+        Each template contains a literal {name} placeholder that the
+        greeting engine fills in locally, so one LLM call serves many logins.
+        """
+        prompt = _prompt([
+            ("system", """You are a friendly and encouraging AI tutor named "TutorBot".
+
+Write {count} different greetings for students at the {level} level.
+
+Rules for every greeting:
+- 2-3 sentences, warm and enthusiastic about learning
+- Use the exact placeholder {{name}} where the student's name goes
+- Do not use any other placeholders or curly braces
+- Beginner: extra encouraging, simple language
+- Intermediate: supportive, acknowledge their progress
+- Advanced: respectful, challenge them appropriately
+
+Return ONLY valid JSON in this exact format (no markdown, no code blocks):
+
+{{
+  "greetings": ["Greeting one for {{name}}", "Greeting two for {{name}}"]
+}}
+"""),
+            ("user", "Generate the greetings now.")
+        ])
+
+        result = await self._invoke("generate_greeting_templates", prompt, {
+            "level": level,
+            "count": count
+        })
+
+        data = self._parse_json(result)
+        return [g.strip() for g in data.get("greetings", []) if isinstance(g, str)]
+
     async def explain_topic(
         self,
         topic: str,
@@ -59,14 +232,22 @@ Student Level: {level}
         learning_style: str = "visual"
     ) -> dict:
 
-        if level == "beginner":
-            complexity = "Use very simple language. Start with a real-world analogy. Avoid jargon."
-        elif level == "intermediate":
-            complexity = "Use some technical terms but explain them. Assume basic programming knowledge."
-        else:
-            complexity = "Use technical language. Discuss edge cases and optimizations."
+        prompt, inputs = self._explain_prompt(topic, level, learning_style)
 
-        prompt = ChatPromptTemplate.from_messages([
+        explanation = await self._invoke("explain_topic", prompt, inputs)
+
+        return self.explanation_result(topic, level, explanation)
+
+    async def stream_explanation(self, topic: str, level: str, learning_style: str = "visual"):
+        """Same as explain_topic, but yields the explanation text as it is generated."""
+        prompt, inputs = self._explain_prompt(topic, level, learning_style)
+        async for chunk in self._stream("explain_topic", prompt, inputs):
+            yield chunk
+
+    def _explain_prompt(self, topic: str, level: str, learning_style: str) -> tuple:
+        complexity = self._complexity_for(level)
+
+        prompt = _prompt([
             ("system", """You are an expert computer science tutor.
 
 Topic: {topic}
@@ -89,15 +270,16 @@ Use markdown formatting.
             ("user", "Explain {topic} to me.")
         ])
 
-        chain = prompt | self.llm | StrOutputParser()
-
-        explanation = await chain.ainvoke({
+        return prompt, {
             "topic": topic,
             "level": level,
             "learning_style": learning_style,
             "complexity": complexity
-        })
+        }
 
+    @staticmethod
+    def explanation_result(topic: str, level: str, explanation: str) -> dict:
+        """Explanation text plus the length stats stored on a LearningSession."""
         word_count = len(explanation.split())
         reading_time = max(1, word_count // 200)
 
@@ -117,7 +299,25 @@ Use markdown formatting.
         num_questions: int = 3
     ) -> dict:
 
-        prompt = ChatPromptTemplate.from_messages([
+        prompt, inputs = self._practice_prompt(topic, level, num_questions)
+
+        result = await self._invoke("generate_practice_questions", prompt, inputs)
+
+        return {
+            "topic": topic,
+            "level": level,
+            "questions": result,
+            "count": num_questions
+        }
+
+    async def stream_practice_questions(self, topic: str, level: str, num_questions: int = 3):
+        """Same as generate_practice_questions, but yields text as it is generated."""
+        prompt, inputs = self._practice_prompt(topic, level, num_questions)
+        async for chunk in self._stream("generate_practice_questions", prompt, inputs):
+            yield chunk
+
+    def _practice_prompt(self, topic: str, level: str, num_questions: int) -> tuple:
+        prompt = _prompt([
             ("system", """Generate {num_questions} practice questions about {topic}.
 
 Level: {level}
@@ -132,37 +332,33 @@ Format as a numbered list with hints below each question.
             ("user", "Generate practice questions")
         ])
 
-        chain = prompt | self.llm | StrOutputParser()
-
-        result = await chain.ainvoke({
+        return prompt, {
             "topic": topic,
             "level": level,
             "num_questions": num_questions
-        })
-
-        return {
-            "topic": topic,
-            "level": level,
-            "questions": result,
-            "count": num_questions
         }
 
     async def generate_quiz(
         self,
         topic: str,
         level: str,
-        num_questions: int = 5
+        num_questions: int = 5,
+        focus_concepts: list = None
     ) -> list:
 
-        if level == "beginner":
-            difficulty_mix = "60% easy, 30% medium, 10% hard"
-        elif level == "intermediate":
-            difficulty_mix = "20% easy, 60% medium, 20% hard"
+        difficulty_mix = self._difficulty_mix_for(level)
+
+        # Steer part of the quiz toward concepts the student is weakest at
+        if focus_concepts:
+            focus = (
+                "The student has struggled with: " + ", ".join(focus_concepts) +
+                ". Make about half of the questions target these concepts."
+            )
         else:
-            difficulty_mix = "10% easy, 30% medium, 60% hard"
+            focus = ""
 
         # FIXED: Escaped all curly braces in JSON template
-        prompt = ChatPromptTemplate.from_messages([
+        prompt = _prompt([
             ("system", """You are an expert quiz generator.
 
 Generate {num_questions} multiple choice questions about {topic} for a {level} level student.
@@ -189,33 +385,248 @@ Return ONLY valid JSON in this exact format (no markdown, no code blocks):
 }}
 
 Difficulty mix: {difficulty_mix}
+{focus}
 Return ONLY the JSON object, nothing else.
 """),
             ("user", "Generate the quiz now.")
         ])
 
-        chain = prompt | self.llm | StrOutputParser()
-
-        result = await chain.ainvoke({
+        result = await self._invoke("generate_quiz", prompt, {
             "topic": topic,
             "level": level,
             "num_questions": num_questions,
-            "difficulty_mix": difficulty_mix
+            "difficulty_mix": difficulty_mix,
+            "focus": focus
         })
 
+        quiz_data = self._parse_json(result, what="quiz")
+        return quiz_data.get("questions", [])
+
+    async def generate_lesson(
+        self,
+        topic: str,
+        level: str,
+        learning_style: str = "visual",
+        num_practice_questions: int = 3,
+        num_quiz_questions: int = 5
+    ) -> dict:
+        """
+        Generate a whole lesson in one structured LLM call.
+
+        Returns the explanation, practice questions and quiz questions that
+        explain_topic, generate_practice_questions and generate_quiz would
+        otherwise produce with three separate prompts.
+        """
+        complexity = self._complexity_for(level)
+        difficulty_mix = self._difficulty_mix_for(level)
+
+        prompt = _prompt([
+            ("system", """You are an expert computer science tutor building a complete lesson.
+
+Topic: {topic}
+Student Level: {level}
+Learning Style: {learning_style}
+
+Instructions:
+{complexity}
+
+The lesson has three parts:
+
+1. "explanation": a markdown explanation (400-600 words) structured as
+   **Real-World Analogy**, **What It Is**, **How It Works**,
+   **Practical Example** and **Key Points**.
+2. "practice_questions": {num_practice_questions} practical practice questions,
+   adjusted to the level, each with a helpful hint.
+3. "quiz": {num_quiz_questions} multiple choice questions.
+   Difficulty mix: {difficulty_mix}
+
+Return ONLY valid JSON in this exact format (no markdown around it, no code blocks):
+
+{{
+  "explanation": "Markdown explanation here",
+  "practice_questions": [
+    {{"question": "Practice question", "hint": "Helpful hint"}}
+  ],
+  "quiz": [
+    {{
+      "question_number": 1,
+      "question_text": "Your question here",
+      "options": {{
+        "A": "Option A text",
+        "B": "Option B text",
+        "C": "Option C text",
+        "D": "Option D text"
+      }},
+      "correct_answer": "B",
+      "difficulty": "medium",
+      "concept": "Brief concept name",
+      "explanation": "Why this answer is correct"
+    }}
+  ]
+}}
+"""),
+            ("user", "Build the lesson on {topic} now.")
+        ])
+
+        result = await self._invoke("generate_lesson", prompt, {
+            "topic": topic,
+            "level": level,
+            "learning_style": learning_style,
+            "complexity": complexity,
+            "difficulty_mix": difficulty_mix,
+            "num_practice_questions": num_practice_questions,
+            "num_quiz_questions": num_quiz_questions
+        }, bind={"response_format": {"type": "json_object"}})
+
+        lesson_data = self._parse_json(result, what="lesson")
+
+        explanation = lesson_data.get("explanation", "")
+
+        # Same numbered-list-with-hints format as generate_practice_questions
+        practice = lesson_data.get("practice_questions", [])
+        practice_text = "\n\n".join(
+            f"{i}. {p.get('question', '')}\n   Hint: {p.get('hint', '')}"
+            for i, p in enumerate(practice, start=1)
+        )
+
+        return {
+            "explanation": self.explanation_result(topic, level, explanation),
+            "practice": {
+                "topic": topic,
+                "level": level,
+                "questions": practice_text,
+                "count": len(practice)
+            },
+            "quiz_questions": lesson_data.get("quiz", [])
+        }
+
+    async def chat(
+        self,
+        topic: str,
+        level: str,
+        grounding: str,
+        summary: str,
+        history: list,
+        message: str
+    ) -> str:
+        """
+        Answer a follow-up question in an ongoing tutor conversation.
+
+        `history` holds the recent turns as ("human"/"ai", text) tuples;
+        anything older is already folded into `summary`.
+        """
+        prompt, inputs = self._chat_prompt(topic, level, grounding, summary, history, message)
+        return await self._invoke("chat", prompt, inputs)
+
+    async def stream_chat(
+        self,
+        topic: str,
+        level: str,
+        grounding: str,
+        summary: str,
+        history: list,
+        message: str
+    ):
+        """Same as chat, but yields the reply text as it is generated."""
+        prompt, inputs = self._chat_prompt(topic, level, grounding, summary, history, message)
+        async for chunk in self._stream("chat", prompt, inputs):
+            yield chunk
+
+    def _chat_prompt(
+        self,
+        topic: str,
+        level: str,
+        grounding: str,
+        summary: str,
+        history: list,
+        message: str
+    ) -> tuple:
+        from langchain_core.prompts import MessagesPlaceholder
+        prompt = _prompt([
+            ("system", """You are a friendly expert computer science tutor in an ongoing conversation.
+
+Topic: {topic}
+Student Level: {level}
+
+Lesson the student is working from:
+{grounding}
+
+Summary of the conversation so far:
+{summary}
+
+Answer the student's latest message. Build on what was already discussed,
+adapt to their level, and keep answers focused (under 250 words).
+Use markdown formatting.
+"""),
+            MessagesPlaceholder("history"),
+            ("user", "{message}")
+        ])
+
+        return prompt, {
+            "topic": topic,
+            "level": level,
+            "grounding": grounding or "(none)",
+            "summary": summary or "(this is the start of the conversation)",
+            "history": history,
+            "message": message
+        }
+
+    async def summarize_conversation(self, previous_summary: str, turns: list, max_words: int = 150) -> str:
+        """Fold older conversation turns into the rolling summary."""
+        transcript = "\n".join(f"{role}: {text}" for role, text in turns)
+
+        prompt = _prompt([
+            ("system", """You maintain a running summary of a tutoring conversation.
+
+Merge the previous summary and the new transcript into one summary of at most
+{max_words} words. Keep what the student already understands, what they
+struggled with, and any open questions. Return only the summary text.
+"""),
+            ("user", """Previous summary:
+{previous_summary}
+
+New transcript:
+{transcript}""")
+        ])
+
+        return await self._invoke("summarize_conversation", prompt, {
+            "previous_summary": previous_summary or "(none)",
+            "transcript": transcript,
+            "max_words": max_words
+        })
+
+    @staticmethod
+    def _complexity_for(level: str) -> str:
+        if level == "beginner":
+            return "Use very simple language. Start with a real-world analogy. Avoid jargon."
+        elif level == "intermediate":
+            return "Use some technical terms but explain them. Assume basic programming knowledge."
+        else:
+            return "Use technical language. Discuss edge cases and optimizations."
+
+    @staticmethod
+    def _difficulty_mix_for(level: str) -> str:
+        if level == "beginner":
+            return "60% easy, 30% medium, 10% hard"
+        elif level == "intermediate":
+            return "20% easy, 60% medium, 20% hard"
+        else:
+            return "10% easy, 30% medium, 60% hard"
+
+    @staticmethod
+    def _parse_json(result: str, what: str = "response") -> dict:
+        """Strip markdown code fences from an LLM reply and parse it as JSON."""
         # Clean up markdown code blocks if present
         result = re.sub(r'```json\s*', '', result)
         result = re.sub(r'\s*```', '', result)
         result = result.strip()
 
         try:
-            quiz_data = json.loads(result)
-            questions = quiz_data.get("questions", [])
-            return questions
+            return json.loads(result)
         except json.JSONDecodeError as e:
-            print(f"Failed to parse quiz JSON: {e}")
+            print(f"Failed to parse {what} JSON: {e}")
             print(f"Raw response: {result}")
-            raise Exception(f"Failed to generate valid quiz JSON: {str(e)}")
+            raise Exception(f"Failed to generate valid {what} JSON: {str(e)}")
 
 
 # Singleton instance
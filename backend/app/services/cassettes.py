@@ -0,0 +1,128 @@
+import asyncio
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from ..config import settings
+
+MODES = ("off", "record", "replay")
+
+
+class CassetteMissError(Exception):
+    """Replay mode found no recording for a prompt."""
+
+
+class CassetteStore:
+    """
+    Record/replay store for LLM calls made by AITutorService.
+
+    record: calls go to the model as usual and each reply is saved, with
+            its latency (and chunk timings for streams), as one JSON file
+            per prompt under `directory/<method>/`.
+    replay: no model is called; the reply recorded for the same method,
+            rendered prompt and model options (`bind`) is returned, after the recorded latency
+            multiplied by `time_scale` (1 = original timing, 0.1 = ten
+            times faster, 0 = instant). A missing recording raises
+            CassetteMissError.
+
+    Cassettes are plain JSON, so a recorded set doubles as a regression
+    and benchmark corpus (see benchmarks/bench_replay.py).
+    """
+
+    def __init__(self, directory: str, mode: str = "off", time_scale: float = 1.0):
+        if mode not in MODES:
+            raise ValueError(f"Unsupported LLM_CASSETTE_MODE: {mode}")
+        self.directory = directory
+        self.mode = mode
+        self.time_scale = time_scale
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    @staticmethod
+    def _messages(prompt, inputs: dict) -> list:
+        return [[m.type, m.content] for m in prompt.format_messages(**inputs)]
+
+    def _path(self, method: str, messages: list, bind: dict = None) -> str:
+        # Calls without model options keep the key they always had
+        key_parts = [method, messages, bind] if bind else [method, messages]
+        key = hashlib.sha1(json.dumps(key_parts, sort_keys=True).encode()).hexdigest()
+        return os.path.join(self.directory, method, f"{key}.json")
+
+    def _save(self, method: str, messages: list, cassette: dict, bind: dict = None):
+        path = self._path(method, messages, bind)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        cassette.update(
+            method=method,
+            messages=messages,
+            bind=bind,
+            recorded_at=datetime.now(timezone.utc).isoformat()
+        )
+        # Write then rename, so a concurrent replay never reads half a file
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(cassette, f, indent=2)
+        os.replace(tmp, path)
+
+    def _load(self, method: str, prompt, inputs: dict, bind: dict = None) -> dict:
+        path = self._path(method, self._messages(prompt, inputs), bind)
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise CassetteMissError(f"No recorded {method} reply for this prompt ({path})")
+
+    async def _wait(self, milliseconds: float):
+        if self.time_scale > 0 and milliseconds > 0:
+            await asyncio.sleep(milliseconds / 1000 * self.time_scale)
+
+    # ─── Whole replies (AITutorService._invoke) ──────────────────────
+
+    def record(self, method: str, prompt, inputs: dict, message, latency_ms: float, bind: dict = None):
+        self._save(method, self._messages(prompt, inputs), {
+            "text": message.content,
+            "response_metadata": getattr(message, "response_metadata", None) or {},
+            "latency_ms": latency_ms
+        }, bind)
+
+    async def replay(self, method: str, prompt, inputs: dict, bind: dict = None):
+        """The recorded reply as an AIMessage, after the (scaled) recorded latency."""
+        from langchain_core.messages import AIMessage
+        cassette = self._load(method, prompt, inputs, bind)
+        await self._wait(cassette["latency_ms"])
+        return AIMessage(content=cassette["text"], response_metadata=cassette["response_metadata"])
+
+    # ─── Streams (AITutorService._stream) ────────────────────────────
+
+    def record_stream(self, method: str, prompt, inputs: dict, chunks: list, latency_ms: float):
+        """`chunks` holds (milliseconds since the call started, text) pairs."""
+        self._save(method, self._messages(prompt, inputs), {
+            "text": "".join(text for _, text in chunks),
+            "chunks": [[round(offset, 1), text] for offset, text in chunks],
+            "response_metadata": {},
+            "latency_ms": latency_ms
+        })
+
+    async def replay_stream(self, method: str, prompt, inputs: dict):
+        """Yield the recorded chunks with their (scaled) original spacing."""
+        cassette = self._load(method, prompt, inputs)
+        # A reply recorded by _invoke can still be replayed as one chunk
+        chunks = cassette.get("chunks") or [[cassette["latency_ms"], cassette["text"]]]
+        previous = 0.0
+        for offset, text in chunks:
+            await self._wait(offset - previous)
+            previous = offset
+            yield text
+
+
+# Singleton instance
+cassettes = CassetteStore(
+    settings.LLM_CASSETTE_DIR,
+    settings.LLM_CASSETTE_MODE,
+    settings.LLM_CASSETTE_TIME_SCALE
+)
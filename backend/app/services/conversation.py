@@ -0,0 +1,159 @@
+from sqlalchemy.orm import Session
+from ..config import settings
+from ..models.conversation import Conversation, ConversationTurn
+from .ai_service import ai_service
+from .usage_ledger import estimate_tokens
+
+# LangChain message roles for stored turn roles
+ROLE_TO_MESSAGE = {"student": "human", "tutor": "ai"}
+
+# Room for the fixed instructions of the chat prompt
+PROMPT_OVERHEAD_TOKENS = 150
+
+
+class ConversationContextManager:
+    """
+    Keeps tutor chat prompts under a fixed token budget.
+
+    The last `recent_turns` messages are sent verbatim. Older messages,
+    and recent ones that would push the prompt over `token_budget`, are
+    folded into the conversation's rolling summary. Only turns not yet
+    summarized are ever loaded, so the work per reply stays constant no
+    matter how long the conversation gets.
+    """
+
+    def __init__(self, recent_turns: int, token_budget: int, grounding_tokens: int):
+        self.recent_turns = recent_turns
+        self.token_budget = token_budget
+        self.grounding_tokens = grounding_tokens
+
+    def grounding_for(self, conversation: Conversation) -> str:
+        """The originating lesson's explanation, trimmed to its share of the budget."""
+        session = conversation.learning_session
+        if not session or not session.explanation:
+            return ""
+        max_chars = self.grounding_tokens * 4
+        explanation = session.explanation
+        if len(explanation) > max_chars:
+            explanation = explanation[:max_chars].rsplit(" ", 1)[0] + " ..."
+        return explanation
+
+    async def build_context(self, db: Session, conversation: Conversation, message: str) -> dict:
+        """
+        Work out grounding, summary and verbatim history for the next reply,
+        summarizing older turns first if needed.
+        """
+        grounding = self.grounding_for(conversation)
+
+        turns = db.query(ConversationTurn).filter(
+            ConversationTurn.conversation_id == conversation.id,
+            ConversationTurn.turn_number > (conversation.summarized_through or 0)
+        ).order_by(ConversationTurn.turn_number).all()
+
+        split = max(0, len(turns) - self.recent_turns)
+        to_fold, recent = turns[:split], turns[split:]
+
+        fixed_tokens = (
+            PROMPT_OVERHEAD_TOKENS
+            + estimate_tokens(grounding)
+            + estimate_tokens(conversation.summary or "")
+            + estimate_tokens(message)
+        )
+        recent_tokens = sum(t.token_count or 0 for t in recent)
+        while recent and fixed_tokens + recent_tokens > self.token_budget:
+            oldest = recent.pop(0)
+            recent_tokens -= oldest.token_count or 0
+            to_fold.append(oldest)
+
+        if to_fold:
+            conversation.summary = await ai_service.summarize_conversation(
+                previous_summary=conversation.summary,
+                turns=[(t.role, t.content) for t in to_fold]
+            )
+            conversation.summarized_through = to_fold[-1].turn_number
+
+        history = [(ROLE_TO_MESSAGE[t.role], t.content) for t in recent]
+
+        return {
+            "grounding": grounding,
+            "summary": conversation.summary,
+            "history": history,
+            "context_tokens": (
+                PROMPT_OVERHEAD_TOKENS
+                + estimate_tokens(grounding)
+                + estimate_tokens(conversation.summary or "")
+                + recent_tokens
+                + estimate_tokens(message)
+            )
+        }
+
+    def add_turn(self, db: Session, conversation: Conversation, role: str, content: str) -> ConversationTurn:
+        """Append one message to the conversation (not committed)."""
+        conversation.turn_count = (conversation.turn_count or 0) + 1
+        turn = ConversationTurn(
+            conversation_id=conversation.id,
+            turn_number=conversation.turn_count,
+            role=role,
+            content=content,
+            token_count=estimate_tokens(content)
+        )
+        db.add(turn)
+        return turn
+
+    async def reply(self, db: Session, conversation: Conversation, message: str) -> dict:
+        """
+        Generate the tutor's reply to a student message and store both turns.
+
+        Flushes but does not commit.
+        """
+        context = await self.build_context(db, conversation, message)
+
+        answer = await ai_service.chat(
+            topic=conversation.topic,
+            level=conversation.level,
+            grounding=context["grounding"],
+            summary=context["summary"],
+            history=context["history"],
+            message=message
+        )
+
+        self.add_turn(db, conversation, "student", message)
+        self.add_turn(db, conversation, "tutor", answer)
+        db.flush()
+
+        return {
+            "reply": answer,
+            "context_tokens": context["context_tokens"]
+        }
+
+    async def stream_reply(self, db: Session, conversation: Conversation, message: str):
+        """
+        Streaming counterpart of reply: yields the tutor's answer in chunks.
+
+        Both turns are added to the session once the answer is complete,
+        but nothing is flushed so callers can batch the write.
+        """
+        context = await self.build_context(db, conversation, message)
+
+        parts = []
+        async for chunk in ai_service.stream_chat(
+            topic=conversation.topic,
+            level=conversation.level,
+            grounding=context["grounding"],
+            summary=context["summary"],
+            history=context["history"],
+            message=message
+        ):
+            parts.append(chunk)
+            yield chunk
+
+        self.add_turn(db, conversation, "student", message)
+        self.add_turn(db, conversation, "tutor", "".join(parts))
+
+
+# Singleton instance
+conversation_manager = ConversationContextManager(
+    recent_turns=settings.CHAT_RECENT_TURNS,
+    token_budget=settings.CHAT_CONTEXT_TOKEN_BUDGET,
+    grounding_tokens=settings.CHAT_GROUNDING_TOKENS
+)
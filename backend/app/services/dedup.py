@@ -0,0 +1,154 @@
+import hashlib
+import json
+import zlib
+import numpy as np
+from sqlalchemy.orm import Session
+from ..models.quiz import QuizSession, QuizQuestion
+from ..models.dedup import QuestionSignature, QuestionBucket
+from .mastery import normalize
+
+# 32 bands of 4 rows: pairs at the duplicate threshold share a bucket
+# with >99.9% probability, pairs below ~0.2 similarity in <5% of cases
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+
+SHINGLE_SIZE = 3
+
+# Estimated Jaccard similarity at which two questions count as the same
+DUPLICATE_THRESHOLD = 0.7
+
+# Fixed hash family, so signatures stay comparable across processes
+_PRIME = (1 << 31) - 1
+_rng = np.random.RandomState(20240101)
+_A = _rng.randint(1, _PRIME, size=NUM_PERM).astype(np.uint64)
+_B = _rng.randint(0, _PRIME, size=NUM_PERM).astype(np.uint64)
+
+
+def _shingles(question_text: str, options: dict) -> set:
+    """Word 3-grams of the question followed by its options in key order."""
+    parts = [question_text] + [str(options[key]) for key in sorted(options or {})]
+    words = normalize(" ".join(parts)).split()
+    if len(words) < SHINGLE_SIZE:
+        return {" ".join(words)}
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def minhash(question_text: str, options: dict) -> np.ndarray:
+    """MinHash signature (NUM_PERM uint32 values) of a question."""
+    hashes = np.fromiter(
+        (zlib.crc32(s.encode()) % _PRIME for s in _shingles(question_text, options)),
+        dtype=np.uint64
+    )
+    # (a * x + b) mod p for every permutation and shingle, min per permutation
+    permuted = (np.outer(_A, hashes) + _B[:, None]) % _PRIME
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def bucket_keys(signature: np.ndarray) -> list:
+    """One LSH bucket key per band of the signature."""
+    return [
+        f"{band}:{hashlib.blake2b(signature[band * ROWS:(band + 1) * ROWS].tobytes(), digest_size=8).hexdigest()}"
+        for band in range(BANDS)
+    ]
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return float(np.count_nonzero(a == b)) / NUM_PERM
+
+
+def index_questions(db: Session, questions: list):
+    """
+    Store signatures and bucket entries for newly added QuizQuestions.
+
+    Questions must already be flushed (so they have ids). Does not commit.
+    """
+    signatures, buckets = [], []
+    for question in questions:
+        signature = minhash(question.question_text, json.loads(question.options))
+        signatures.append({"question_id": question.id, "signature": signature.tobytes()})
+        buckets.extend(
+            {"bucket_key": key, "question_id": question.id}
+            for key in set(bucket_keys(signature))
+        )
+
+    if signatures:
+        db.bulk_insert_mappings(QuestionSignature, signatures)
+        db.bulk_insert_mappings(QuestionBucket, buckets)
+
+
+def find_duplicates(db: Session, questions_data: list, user_id: str = None) -> list:
+    """
+    For each generated question (dict with question_text and options),
+    the id of a stored near-duplicate or None.
+
+    Candidates come from the LSH buckets in one indexed query, and only
+    those are compared. With `user_id`, only that student's past questions
+    count.
+    """
+    return _find_duplicates(db, [_signature_of(q) for q in questions_data], user_id)
+
+
+def _signature_of(q_data: dict) -> np.ndarray:
+    return minhash(q_data["question_text"], q_data.get("options") or {})
+
+
+def _find_duplicates(db: Session, signatures: list, user_id: str = None) -> list:
+    keys_per_question = [bucket_keys(signature) for signature in signatures]
+    all_keys = {key for keys in keys_per_question for key in keys}
+    if not all_keys:
+        return []
+
+    query = db.query(
+        QuestionBucket.bucket_key,
+        QuestionBucket.question_id,
+        QuestionSignature.signature
+    ).join(
+        QuestionSignature, QuestionSignature.question_id == QuestionBucket.question_id
+    ).filter(QuestionBucket.bucket_key.in_(all_keys))
+    if user_id:
+        query = query.join(
+            QuizQuestion, QuizQuestion.id == QuestionBucket.question_id
+        ).join(
+            QuizSession, QuizSession.id == QuizQuestion.quiz_session_id
+        ).filter(QuizSession.user_id == user_id)
+
+    candidates_by_key = {}
+    stored = {}
+    for key, question_id, signature in query.all():
+        candidates_by_key.setdefault(key, set()).add(question_id)
+        stored[question_id] = np.frombuffer(signature, dtype=np.uint32)
+
+    duplicates = []
+    for signature, keys in zip(signatures, keys_per_question):
+        candidates = set().union(*(candidates_by_key.get(key, ()) for key in keys))
+        best_id, best = None, DUPLICATE_THRESHOLD
+        for question_id in candidates:
+            score = similarity(signature, stored[question_id])
+            if score >= best:
+                best_id, best = question_id, score
+        duplicates.append(best_id)
+    return duplicates
+
+
+def drop_duplicates(db: Session, questions_data: list, user_id: str = None) -> list:
+    """
+    Remove generated questions that repeat each other or (with `user_id`)
+    a question the student has already been asked. Returns renumbered
+    copies; `questions_data` is left as is.
+    """
+    signatures = [_signature_of(q) for q in questions_data]
+    stored_duplicates = _find_duplicates(db, signatures, user_id)
+
+    kept, kept_signatures = [], []
+    for q_data, signature, duplicate_of in zip(questions_data, signatures, stored_duplicates):
+        if duplicate_of is not None:
+            continue
+        if any(similarity(signature, other) >= DUPLICATE_THRESHOLD for other in kept_signatures):
+            continue
+        kept.append(dict(q_data, question_number=len(kept) + 1))
+        kept_signatures.append(signature)
+
+    return kept
+
@@ -0,0 +1,246 @@
+"""
+Offline stand-in for the Groq chat model (LLM_BACKEND=fake).
+
+Replies are built from the prompt itself, so every AITutorService method
+gets a payload of the shape it expects: markdown explanations, numbered
+practice questions, quiz/lesson/greeting JSON, chat replies and
+summaries. The same prompt always gets the same reply; latency and
+failures are drawn from an RNG seeded by the prompt and how many times
+it has been sent, so load-test runs are repeatable however requests
+interleave.
+
+Only imported when the fake backend is selected (it imports langchain).
+"""
+import asyncio
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from .usage_ledger import estimate_tokens
+
+MODEL_NAME = "fake-llm"
+
+# Share of a streamed reply's latency spent before the first chunk
+FIRST_CHUNK_SHARE = 0.2
+# Words per streamed chunk
+CHUNK_WORDS = 6
+
+LETTERS = ["A", "B", "C", "D"]
+
+WORDS = [
+    "value", "pointer", "index", "node", "memory", "function", "loop", "condition",
+    "input", "output", "structure", "element", "reference", "operation", "state",
+    "step", "result", "case", "pattern", "program", "call", "list", "key", "order",
+]
+
+# Times each prompt (by hash) has been sent: the nth call with a prompt
+# draws the same latency and error in every run, whatever ran before it
+_prompt_calls = {}
+_prompt_calls_lock = threading.Lock()
+
+
+class FakeLLMError(Exception):
+    """A simulated provider failure (FAKE_LLM_ERROR_RATE)."""
+
+
+def _sentence(rng: random.Random, topic: str) -> str:
+    words = rng.sample(WORDS, rng.randint(5, 9))
+    words.insert(rng.randrange(len(words)), topic)
+    return " ".join(words).capitalize() + "."
+
+
+def _paragraph(rng: random.Random, topic: str, sentences: int) -> str:
+    return " ".join(_sentence(rng, topic) for _ in range(sentences))
+
+
+def _find(pattern: str, text: str, default: str) -> str:
+    match = re.search(pattern, text)
+    return match.group(1).strip() if match else default
+
+
+def _explanation(rng: random.Random, topic: str) -> str:
+    sections = ["Real-World Analogy", "What It Is", "How It Works", "Practical Example", "Key Points"]
+    parts = []
+    for section in sections:
+        parts.append(f"## **{section}**\n\n{_paragraph(rng, topic, rng.randint(8, 11))}")
+    parts[-1] += "\n\n" + "\n".join(f"- {_sentence(rng, topic)}" for _ in range(4))
+    return "\n\n".join(parts)
+
+
+def _practice(rng: random.Random, topic: str, count: int) -> list:
+    return [
+        {"question": f"How would you use {topic} to {_sentence(rng, topic).lower()}",
+         "hint": _sentence(rng, topic)}
+        for _ in range(count)
+    ]
+
+
+def _quiz(rng: random.Random, topic: str, count: int) -> list:
+    difficulties = ["easy", "medium", "hard"]
+    return [
+        {
+            "question_number": n,
+            "question_text": _sentence(rng, topic)[:-1] + "?",
+            "options": {letter: _sentence(rng, topic) for letter in LETTERS},
+            "correct_answer": rng.choice(LETTERS),
+            "difficulty": rng.choice(difficulties),
+            "concept": f"{topic} {rng.choice(WORDS)}s",
+            "explanation": _sentence(rng, topic)
+        }
+        for n in range(1, count + 1)
+    ]
+
+
+def fake_reply(system: str, user: str) -> str:
+    """A realistic reply to a prompt, chosen by which AITutorService prompt it is."""
+    rng = random.Random(hashlib.sha1(f"{system}\n{user}".encode()).digest())
+
+    if '"greetings"' in system:
+        count = int(_find(r"Write (\d+) different greetings", system, "8"))
+        return json.dumps({"greetings": [
+            f"Hi {{name}}! {_sentence(rng, 'learning')} Let's get started!" for _ in range(count)
+        ]})
+
+    if '"practice_questions"' in system:
+        topic = _find(r"Topic: (.+)", system, "programming")
+        num_practice = int(_find(r"(\d+) practical practice questions", system, "3"))
+        num_quiz = int(_find(r"(\d+) multiple choice questions", system, "5"))
+        return json.dumps({
+            "explanation": _explanation(rng, topic),
+            "practice_questions": _practice(rng, topic, num_practice),
+            "quiz": _quiz(rng, topic, num_quiz)
+        })
+
+    if '"questions"' in system:
+        # Same shape as the real model: sometimes wrapped in a code fence
+        count = int(_find(r"Generate (\d+) multiple choice", system, "5"))
+        topic = _find(r"questions about (.+?) for a ", system, "programming")
+        body = json.dumps({"questions": _quiz(rng, topic, count)}, indent=2)
+        return f"```json\n{body}\n```" if rng.random() < 0.3 else body
+
+    if "Structure your explanation" in system:
+        return _explanation(rng, _find(r"Topic: (.+)", system, "programming"))
+
+    if "practice questions about" in system:
+        count = int(_find(r"Generate (\d+) practice", system, "3"))
+        topic = _find(r"practice questions about (.+?)\.\n", system, "programming")
+        return "\n\n".join(
+            f"{i}. {p['question']}\n   Hint: {p['hint']}"
+            for i, p in enumerate(_practice(rng, topic, count), start=1)
+        )
+
+    if "running summary" in system:
+        return _paragraph(rng, "the topic", 4)
+
+    if "ongoing conversation" in system:
+        return _paragraph(rng, _find(r"Topic: (.+)", system, "programming"), rng.randint(4, 8))
+
+    name = _find(r"Generate a greeting for (.+)", user, "there")
+    return f"Welcome, {name}! {_sentence(rng, 'learning')} I'm TutorBot, and I'm excited to learn with you."
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Chat model that answers locally after a simulated delay.
+
+    latency_ms is the median delay; latency_sigma spreads it log-normally
+    (0 = always exactly latency_ms). error_rate is the share of calls
+    that fail with FakeLLMError after the delay.
+    """
+
+    latency_ms: float = 1500.0
+    latency_sigma: float = 0.4
+    error_rate: float = 0.0
+    seed: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return MODEL_NAME
+
+    def _draw(self, messages: List[BaseMessage]) -> tuple:
+        """(delay in seconds, whether this call fails)"""
+        system, user = self._prompt(messages)
+        digest = hashlib.sha1(f"{system}\n{user}".encode()).hexdigest()
+        with _prompt_calls_lock:
+            count = _prompt_calls.get(digest, 0)
+            _prompt_calls[digest] = count + 1
+        rng = random.Random(f"{self.seed}:{digest}:{count}")
+        delay = self.latency_ms / 1000
+        if self.latency_sigma > 0:
+            delay *= rng.lognormvariate(0.0, self.latency_sigma)
+        return delay, rng.random() < self.error_rate
+
+    @staticmethod
+    def _prompt(messages: List[BaseMessage]) -> tuple:
+        """(system prompt, last message) as fake_reply takes them"""
+        system = "\n".join(m.content for m in messages if m.type == "system")
+        user = messages[-1].content if messages else ""
+        return system, user
+
+    @classmethod
+    def _reply(cls, messages: List[BaseMessage]) -> str:
+        return fake_reply(*cls._prompt(messages))
+
+    @staticmethod
+    def _result(messages: List[BaseMessage], text: str) -> ChatResult:
+        prompt_tokens = sum(estimate_tokens(m.content) for m in messages)
+        message = AIMessage(content=text, response_metadata={
+            "model_name": MODEL_NAME,
+            "token_usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": estimate_tokens(text)
+            }
+        })
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    @staticmethod
+    def _chunks(text: str) -> list:
+        words = text.split(" ")
+        return [
+            " ".join(words[i:i + CHUNK_WORDS]) + (" " if i + CHUNK_WORDS < len(words) else "")
+            for i in range(0, len(words), CHUNK_WORDS)
+        ]
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        delay, fail = self._draw(messages)
+        time.sleep(delay)
+        if fail:
+            raise FakeLLMError("Error code: 503 - simulated provider failure")
+        return self._result(messages, self._reply(messages))
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        delay, fail = self._draw(messages)
+        await asyncio.sleep(delay)
+        if fail:
+            raise FakeLLMError("Error code: 503 - simulated provider failure")
+        return self._result(messages, self._reply(messages))
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        delay, fail = self._draw(messages)
+        chunks = self._chunks(self._reply(messages))
+        time.sleep(delay * FIRST_CHUNK_SHARE)
+        if fail:
+            raise FakeLLMError("Error code: 503 - simulated provider failure")
+        for chunk in chunks:
+            yield ChatGenerationChunk(message=AIMessageChunk(content=chunk))
+            time.sleep(delay * (1 - FIRST_CHUNK_SHARE) / len(chunks))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Any = None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        delay, fail = self._draw(messages)
+        chunks = self._chunks(self._reply(messages))
+        await asyncio.sleep(delay * FIRST_CHUNK_SHARE)
+        if fail:
+            raise FakeLLMError("Error code: 503 - simulated provider failure")
+        for chunk in chunks:
+            yield ChatGenerationChunk(message=AIMessageChunk(content=chunk))
+            await asyncio.sleep(delay * (1 - FIRST_CHUNK_SHARE) / len(chunks))
@@ -0,0 +1,276 @@
+import json
+import uuid
+from datetime import datetime, timezone
+import numpy as np
+from sqlalchemy.orm import Session
+from ..models.quiz import QuizSession, QuizQuestion
+from ..models.assignment import AssignmentQuestion, AssignmentAnswer
+from ..schemas.quiz import QuizResultsResponse, QuizQuestionResult
+from .mastery import update_mastery
+from .review import schedule_missed
+from .quiz_store import take_live_answers
+from .user_versions import user_versions
+
+# Column index of each difficulty in the per-quiz breakdown ("other" is ignored)
+DIFFICULTY_CODES = {"easy": 0, "medium": 1, "hard": 2}
+OTHER_DIFFICULTY = 3
+
+PASS_SCORE = 60
+
+# How often to retry claiming a batch that raced with single submissions
+CLAIM_ATTEMPTS = 3
+
+
+def feedback_for(score: float) -> str:
+    """Feedback message shown with the quiz results."""
+    if score >= 90:
+        return "🌟 Excellent! You have a strong understanding of this topic!"
+    elif score >= 70:
+        return "👍 Good job! You're on the right track. Review the incorrect answers to improve."
+    elif score >= 60:
+        return "✅ You passed! But there's room for improvement. Practice more on the concepts you missed."
+    else:
+        return "📚 Keep practicing! Review the explanations and try studying this topic again."
+
+
+def _claim_quizzes(db: Session, quiz_ids: list) -> dict:
+    """
+    Mark every not-yet-submitted quiz in `quiz_ids` as completed with one
+    conditional UPDATE and return them by id.
+
+    If a single submission completes one of them between our SELECT and
+    UPDATE, the row counts differ: roll back and try again without it.
+    """
+    for _ in range(CLAIM_ATTEMPTS):
+        open_quizzes = db.query(QuizSession).filter(
+            QuizSession.id.in_(quiz_ids),
+            QuizSession.completed == False
+        ).with_for_update().all()
+        if not open_quizzes:
+            return {}
+
+        claimed = db.query(QuizSession).filter(
+            QuizSession.id.in_([q.id for q in open_quizzes]),
+            QuizSession.completed == False
+        ).update({"completed": True}, synchronize_session=False)
+
+        if claimed == len(open_quizzes):
+            return {q.id: q for q in open_quizzes}
+        db.rollback()
+
+    raise RuntimeError("Could not claim quizzes for batch grading, please retry")
+
+
+def _load_questions(db: Session, quizzes: list) -> dict:
+    """
+    All questions for the batch in at most two queries (own questions and
+    shared assignment questions), as plain row tuples keyed by owner id.
+    """
+    own_ids = [q.id for q in quizzes if not q.assignment_id]
+    assignment_ids = list({q.assignment_id for q in quizzes if q.assignment_id})
+    by_owner = {}
+
+    if own_ids:
+        rows = db.query(
+            QuizQuestion.quiz_session_id,
+            QuizQuestion.id,
+            QuizQuestion.question_number,
+            QuizQuestion.question_text,
+            QuizQuestion.options,
+            QuizQuestion.correct_answer,
+            QuizQuestion.difficulty,
+            QuizQuestion.explanation,
+            QuizQuestion.concept
+        ).filter(
+            QuizQuestion.quiz_session_id.in_(own_ids)
+        ).order_by(QuizQuestion.quiz_session_id, QuizQuestion.question_number).all()
+        for row in rows:
+            by_owner.setdefault(row[0], []).append(row[1:])
+
+    if assignment_ids:
+        rows = db.query(
+            AssignmentQuestion.assignment_id,
+            AssignmentQuestion.id,
+            AssignmentQuestion.question_number,
+            AssignmentQuestion.question_text,
+            AssignmentQuestion.options,
+            AssignmentQuestion.correct_answer,
+            AssignmentQuestion.difficulty,
+            AssignmentQuestion.explanation,
+            AssignmentQuestion.concept
+        ).filter(
+            AssignmentQuestion.assignment_id.in_(assignment_ids)
+        ).order_by(AssignmentQuestion.assignment_id, AssignmentQuestion.question_number).all()
+        for row in rows:
+            by_owner.setdefault(row[0], []).append(row[1:])
+
+    return by_owner
+
+
+def grade_batch(db: Session, submissions: list) -> tuple:
+    """
+    Grade many submissions at once.
+
+    Questions for the whole batch are loaded in one pass, answers are
+    compared as NumPy arrays, per-quiz and per-difficulty counts come from
+    np.bincount, and all answers and scores are written back with bulk
+    updates in a single commit.
+
+    Returns (results, errors): QuizResultsResponse per graded quiz, and
+    {"quiz_session_id", "detail"} for submissions that were skipped.
+    """
+    errors = []
+    unique = {}
+    for submission in submissions:
+        if submission.quiz_session_id in unique:
+            errors.append({"quiz_session_id": submission.quiz_session_id, "detail": "Duplicate submission in batch"})
+        else:
+            unique[submission.quiz_session_id] = submission
+
+    claimed = _claim_quizzes(db, list(unique))
+    for quiz_id in unique:
+        if quiz_id not in claimed:
+            errors.append({"quiz_session_id": quiz_id, "detail": "Quiz not found or already submitted"})
+
+    graded = [unique[quiz_id] for quiz_id in unique if quiz_id in claimed]
+    if not graded:
+        db.commit()
+        return [], errors
+
+    quizzes = [claimed[s.quiz_session_id] for s in graded]
+    questions_by_owner = _load_questions(db, quizzes)
+    # Questions answered live already counted towards mastery and review
+    answered_live = take_live_answers(db, quizzes)
+
+    # Flatten every (quiz, question) pair into parallel arrays
+    quiz_index, rows, user_answers = [], [], []
+    for i, (quiz, submission) in enumerate(zip(quizzes, graded)):
+        for row in questions_by_owner.get(quiz.assignment_id or quiz.id, []):
+            quiz_index.append(i)
+            rows.append(row)
+            # Frontend sends answers keyed by 0-based question index
+            user_answers.append(submission.answers.get(str(row[1] - 1)) or "")
+
+    n = len(quizzes)
+    quiz_index = np.asarray(quiz_index, dtype=np.int64)
+    correct = np.asarray([row[4] for row in rows], dtype=str)
+    answered = np.asarray(user_answers, dtype=str)
+    difficulty = np.asarray(
+        [DIFFICULTY_CODES.get(row[5], OTHER_DIFFICULTY) for row in rows],
+        dtype=np.int64
+    )
+
+    is_correct = (answered == correct) & (answered != "")
+
+    totals = np.bincount(quiz_index, minlength=n)
+    correct_counts = np.bincount(quiz_index, weights=is_correct, minlength=n).astype(np.int64)
+    scores = np.divide(
+        correct_counts * 100.0, totals,
+        out=np.zeros(n, dtype=np.float64), where=totals > 0
+    )
+    cells = quiz_index * 4 + difficulty
+    difficulty_totals = np.bincount(cells, minlength=n * 4).reshape(n, 4)
+    difficulty_correct = np.bincount(cells, weights=is_correct, minlength=n * 4).reshape(n, 4).astype(np.int64)
+
+    # Read before the commit expires the loaded rows
+    topics = [quiz.topic for quiz in quizzes]
+    user_ids = [quiz.user_id for quiz in quizzes]
+
+    # ─── Bulk write-back ─────────────────────────────────────────
+    now = datetime.now(timezone.utc)
+    is_correct_list = is_correct.tolist()
+    question_updates, assignment_answers = [], []
+    for k, row in enumerate(rows):
+        quiz = quizzes[quiz_index[k]]
+        user_answer = user_answers[k] or None
+        if quiz.assignment_id:
+            assignment_answers.append({
+                "id": str(uuid.uuid4()),
+                "quiz_session_id": quiz.id,
+                "question_id": row[0],
+                "user_answer": user_answer,
+                "is_correct": is_correct_list[k]
+            })
+        else:
+            question_updates.append({
+                "id": row[0],
+                "user_answer": user_answer,
+                "is_correct": is_correct_list[k]
+            })
+
+    if question_updates:
+        db.bulk_update_mappings(QuizQuestion, question_updates)
+    if assignment_answers:
+        db.bulk_insert_mappings(AssignmentAnswer, assignment_answers)
+    mastery_answers = [
+        {
+            "user_id": user_ids[quiz_index[k]],
+            "topic": topics[quiz_index[k]],
+            "concept": row[7],
+            "question_text": row[2],
+            "difficulty": row[5],
+            "options": row[3],
+            "correct_answer": row[4],
+            "explanation": row[6],
+            "is_correct": is_correct_list[k]
+        }
+        for k, row in enumerate(rows)
+        if (quizzes[quiz_index[k]].id, row[0]) not in answered_live
+    ]
+    update_mastery(db, mastery_answers)
+    schedule_missed(db, mastery_answers)
+    db.bulk_update_mappings(QuizSession, [
+        {
+            "id": quiz.id,
+            "correct_answers": int(correct_counts[i]),
+            "score": float(scores[i]),
+            "time_taken": submission.time_taken,
+            "completed": True,
+            "completed_at": now
+        }
+        for i, (quiz, submission) in enumerate(zip(quizzes, graded))
+    ])
+    db.commit()
+    for user_id in set(user_ids):
+        user_versions.bump(user_id)
+
+    # ─── Responses ───────────────────────────────────────────────
+    question_results = [[] for _ in range(n)]
+    for k, row in enumerate(rows):
+        question_results[quiz_index[k]].append(
+            QuizQuestionResult(
+                question_number=row[1],
+                question_text=row[2],
+                options=json.loads(row[3]),
+                user_answer=user_answers[k] or None,
+                correct_answer=row[4],
+                is_correct=is_correct_list[k],
+                explanation=row[6],
+                difficulty=row[5]
+            )
+        )
+
+    results = []
+    for i, submission in enumerate(graded):
+        score = float(scores[i])
+        results.append(
+            QuizResultsResponse(
+                quiz_id=submission.quiz_session_id,
+                topic=topics[i],
+                total_questions=int(totals[i]),
+                correct_answers=int(correct_counts[i]),
+                score=score,
+                time_taken=submission.time_taken,
+                passed=score >= PASS_SCORE,
+                questions=question_results[i],
+                easy_correct=int(difficulty_correct[i, 0]),
+                easy_total=int(difficulty_totals[i, 0]),
+                medium_correct=int(difficulty_correct[i, 1]),
+                medium_total=int(difficulty_totals[i, 1]),
+                hard_correct=int(difficulty_correct[i, 2]),
+                hard_total=int(difficulty_totals[i, 2]),
+                feedback=feedback_for(score)
+            )
+        )
+
+    return results, errors
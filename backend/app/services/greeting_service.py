@@ -0,0 +1,145 @@
+import asyncio
+import os
+import time
+from ..config import settings
+from .ai_service import ai_service
+from .shared_state import shared_state
+from .usage_ledger import bind_caller
+
+NAME_PLACEHOLDER = "{name}"
+LEVELS = ("beginner", "intermediate", "advanced")
+
+# A refresh that takes longer than this is assumed dead and can be retried
+REFRESH_LOCK_SECONDS = 300
+
+# Served until the first LLM refresh of a level finishes (and if it ever fails)
+DEFAULT_TEMPLATES = {
+    "beginner": [
+        "Hi {name}, welcome to TutorBot! Every expert started exactly where you are, so let's take it one friendly step at a time.",
+        "Welcome, {name}! I'm so glad you're here. There are no silly questions, so ask me anything as we learn together.",
+        "Hello {name}! Learning something new is exciting, and I'll be right here to help you every step of the way.",
+    ],
+    "intermediate": [
+        "Welcome back, {name}! You've already built a solid foundation, so let's keep that momentum going.",
+        "Hi {name}, great to see you again! Your progress shows, and today is a good day to go a little deeper.",
+        "Hello {name}! You know the basics well, so let's connect the pieces and sharpen your skills.",
+    ],
+    "advanced": [
+        "Welcome, {name}. You're ready for the hard problems, so let's dig into the details that matter.",
+        "Good to see you, {name}. Let's push past the textbook answers and explore trade-offs and edge cases.",
+        "Hello {name}. Time to challenge what you know and refine it into real expertise.",
+    ],
+}
+
+
+class GreetingEngine:
+    """
+    Serves personalized greetings without an LLM round-trip.
+
+    Keeps a rotating pool of name-agnostic templates per level and fills in
+    the student's name locally. The LLM is only used in the background to
+    refresh a pool once it is older than GREETING_REFRESH_SECONDS.
+    """
+
+    def __init__(self, pool_size: int, refresh_seconds: int):
+        self.pool_size = pool_size
+        self.refresh_seconds = refresh_seconds
+        self._pools = {level: list(DEFAULT_TEMPLATES[level]) for level in LEVELS}
+        self._cursor = {level: 0 for level in LEVELS}
+        self._refreshed_at = {level: None for level in LEVELS}
+        self._refreshing = {}
+
+    def get_greeting(self, student_name: str, level: str) -> str:
+        """Pick the next template for this level and fill in the name."""
+        pool = self._pools[level]
+        index = self._cursor[level] % len(pool)
+        self._cursor[level] = index + 1
+
+        self._schedule_refresh(level)
+
+        return pool[index].replace(NAME_PLACEHOLDER, student_name)
+
+    def _is_stale(self, level: str) -> bool:
+        refreshed_at = self._refreshed_at[level]
+        return refreshed_at is None or time.monotonic() - refreshed_at >= self.refresh_seconds
+
+    def _schedule_refresh(self, level: str):
+        """Start a background refresh for a stale pool (at most one per level)."""
+        task = self._refreshing.get(level)
+        if (task and not task.done()) or not self._is_stale(level):
+            return
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        self._refreshing[level] = loop.create_task(self.refresh(level))
+
+    async def _adopt_shared(self, level: str) -> bool:
+        """Use a pool another worker refreshed recently, if there is one."""
+        shared = await shared_state.aget(f"greeting:pool:{level}")
+        if not shared:
+            return False
+        age = time.time() - shared["at"]
+        if age >= self.refresh_seconds:
+            return False
+        self._pools[level] = shared["templates"]
+        self._cursor[level] = 0
+        self._refreshed_at[level] = time.monotonic() - age
+        return True
+
+    async def refresh(self, level: str):
+        """
+        Replace one level's pool with freshly generated templates.
+
+        With several worker processes only one of them calls the LLM; the
+        others pick its pool up from the shared state store.
+        """
+        if await self._adopt_shared(level):
+            return
+
+        lock = f"greeting:refreshing:{level}"
+        if not await shared_state.aadd(lock, os.getpid(), ttl=REFRESH_LOCK_SECONDS):
+            # Another worker is on it; look for its pool in about a minute
+            self._refreshed_at[level] = time.monotonic() - self.refresh_seconds + 60
+            return
+
+        bind_caller("greeting_pool_refresh")
+        try:
+            templates = await ai_service.generate_greeting_templates(
+                level=level,
+                count=self.pool_size
+            )
+            # Only keep templates we can fill safely
+            valid = [
+                t for t in templates
+                if NAME_PLACEHOLDER in t and t.count("{") == t.count(NAME_PLACEHOLDER)
+            ]
+            if valid:
+                self._pools[level] = valid[:self.pool_size]
+                self._cursor[level] = 0
+                await shared_state.aset(
+                    f"greeting:pool:{level}",
+                    {"templates": self._pools[level], "at": time.time()},
+                    ttl=self.refresh_seconds
+                )
+            self._refreshed_at[level] = time.monotonic()
+        except Exception as e:
+            print(f"Greeting pool refresh failed for {level}: {e}")
+            # Keep serving the old pool and retry in about a minute
+            self._refreshed_at[level] = time.monotonic() - self.refresh_seconds + 60
+        finally:
+            await shared_state.adelete(lock)
+
+    async def warm(self):
+        """Refresh every stale pool in the background, e.g. right after startup."""
+        for level in LEVELS:
+            self._schedule_refresh(level)
+
+
+# Singleton instance
+greeting_engine = GreetingEngine(
+    pool_size=settings.GREETING_POOL_SIZE,
+    refresh_seconds=settings.GREETING_REFRESH_SECONDS
+)
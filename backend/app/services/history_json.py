@@ -0,0 +1,147 @@
+import time
+from collections import defaultdict
+import orjson
+from fastapi import Response
+from sqlalchemy.orm import Session
+from ..models.quiz import QuizSession, QuizQuestion
+from ..models.assignment import AssignmentQuestion, AssignmentAnswer
+from ..models.session import LearningSession
+from ..metrics import observe_render
+
+# History lists skip ORM objects, Pydantic validation and jsonable_encoder:
+# rows are selected as tuples, turned into plain dicts and encoded to bytes
+# by orjson in one pass. Stored `options` strings are already JSON, so they
+# are embedded as-is (orjson.Fragment) instead of parsed and re-encoded.
+
+
+def json_response(payload, option: int = 0) -> Response:
+    """Encode `payload` with orjson and return it as an application/json response."""
+    started = time.perf_counter()
+    body = orjson.dumps(payload, option=option)
+    observe_render(time.perf_counter() - started)
+    return Response(content=body, media_type="application/json")
+
+
+def _question(question_text, user_answer, correct_answer, is_correct, difficulty, explanation, options) -> dict:
+    return {
+        "question_text": question_text,
+        "user_answer": user_answer,
+        "correct_answer": correct_answer,
+        "is_correct": is_correct,
+        "difficulty": difficulty,
+        "explanation": explanation,
+        "options": orjson.Fragment(options)
+    }
+
+
+def quiz_history(db: Session, user_id: str, limit: int) -> dict:
+    """
+    Body of GET /api/quiz/{username}/history: the last `limit` finished
+    quizzes with every question, in at most four queries however many
+    quizzes there are.
+    """
+    quizzes = db.query(
+        QuizSession.id,
+        QuizSession.topic,
+        QuizSession.score,
+        QuizSession.correct_answers,
+        QuizSession.total_questions,
+        QuizSession.time_taken,
+        QuizSession.completed_at,
+        QuizSession.assignment_id
+    ).filter(
+        QuizSession.user_id == user_id,
+        QuizSession.completed == True
+    ).order_by(
+        QuizSession.completed_at.desc()
+    ).limit(limit).all()
+
+    questions = defaultdict(list)
+
+    own_ids = [q.id for q in quizzes if not q.assignment_id]
+    if own_ids:
+        rows = db.query(
+            QuizQuestion.quiz_session_id,
+            QuizQuestion.question_text,
+            QuizQuestion.user_answer,
+            QuizQuestion.correct_answer,
+            QuizQuestion.is_correct,
+            QuizQuestion.difficulty,
+            QuizQuestion.explanation,
+            QuizQuestion.options
+        ).filter(
+            QuizQuestion.quiz_session_id.in_(own_ids)
+        ).order_by(QuizQuestion.quiz_session_id, QuizQuestion.question_number)
+        for quiz_id, *fields in rows:
+            questions[quiz_id].append(_question(*fields))
+
+    # Class assignment attempts: shared questions plus this attempt's answers
+    attempts = [q for q in quizzes if q.assignment_id]
+    if attempts:
+        answers = {
+            (quiz_id, question_id): (user_answer, is_correct)
+            for quiz_id, question_id, user_answer, is_correct in db.query(
+                AssignmentAnswer.quiz_session_id,
+                AssignmentAnswer.question_id,
+                AssignmentAnswer.user_answer,
+                AssignmentAnswer.is_correct
+            ).filter(AssignmentAnswer.quiz_session_id.in_([a.id for a in attempts]))
+        }
+        shared = defaultdict(list)
+        for row in db.query(
+            AssignmentQuestion.assignment_id,
+            AssignmentQuestion.id,
+            AssignmentQuestion.question_text,
+            AssignmentQuestion.correct_answer,
+            AssignmentQuestion.difficulty,
+            AssignmentQuestion.explanation,
+            AssignmentQuestion.options
+        ).filter(
+            AssignmentQuestion.assignment_id.in_({a.assignment_id for a in attempts})
+        ).order_by(AssignmentQuestion.assignment_id, AssignmentQuestion.question_number):
+            shared[row.assignment_id].append(row)
+        for attempt in attempts:
+            for q in shared[attempt.assignment_id]:
+                user_answer, is_correct = answers.get((attempt.id, q.id), (None, None))
+                questions[attempt.id].append(_question(
+                    q.question_text, user_answer, q.correct_answer, is_correct,
+                    q.difficulty, q.explanation, q.options
+                ))
+
+    return {
+        "quizzes": [{
+            "id": str(q.id),
+            "topic": q.topic,
+            "score": q.score,
+            "correct_answers": q.correct_answers,
+            "total_questions": q.total_questions,
+            "time_taken": q.time_taken,
+            "completed_at": q.completed_at,
+            "questions": questions[q.id]
+        } for q in quizzes]
+    }
+
+
+def learning_history(db: Session, user_id: str, limit: int) -> list:
+    """Body of GET /api/profile/{username}/history (LearningSessionResponse fields)."""
+    rows = db.query(
+        LearningSession.id,
+        LearningSession.topic,
+        LearningSession.level,
+        LearningSession.word_count,
+        LearningSession.estimated_reading_time,
+        LearningSession.created_at
+    ).filter(
+        LearningSession.user_id == user_id
+    ).order_by(
+        LearningSession.created_at.desc()
+    ).limit(limit)
+
+    return [{
+        "id": r.id,
+        "topic": r.topic,
+        "level": r.level,
+        "word_count": r.word_count,
+        "estimated_reading_time": r.estimated_reading_time,
+        "created_at": r.created_at
+    } for r in rows]
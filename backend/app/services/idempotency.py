@@ -0,0 +1,158 @@
+import asyncio
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import IntegrityError
+from ..config import settings
+from ..database import SessionLocal
+from ..models.idempotency import IdempotencyRecord
+from .shared_state import shared_state
+
+# How long a request may hold its key before another worker may run it
+IN_FLIGHT_TTL_SECONDS = 60
+IN_FLIGHT_POLL_SECONDS = 0.25
+
+
+class IdempotencyStore:
+    """
+    Makes retried POSTs with the same Idempotency-Key safe.
+
+    - A finished request's response is stored for `ttl_seconds` and
+      replayed to any retry with the same key.
+    - A retry that arrives while the original is still running attaches
+      to it and gets the same response, instead of starting a second run
+      (in another worker process: waits for the stored response).
+    - Reusing a key with a different request body is rejected with 422.
+
+    Keys are scoped per endpoint and per caller, so two students who
+    happen to pick the same key never get each other's responses.
+
+    Server errors (5xx) are not stored, so those can be retried for real.
+    """
+
+    def __init__(self, ttl_seconds: int):
+        self.ttl_seconds = ttl_seconds
+        self._in_flight = {}   # scope -> Future of (status_code, body)
+
+    @staticmethod
+    def fingerprint(payload) -> str:
+        encoded = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(encoded.encode()).hexdigest()
+
+    async def run(self, key: str, endpoint: str, caller: str, payload, producer, status_code: int = 200):
+        """
+        Run `producer` (an async callable returning the response model)
+        at most once per key, and return a JSONResponse. `caller` is the
+        id of the user the request is made for.
+        """
+        if not key:
+            return JSONResponse(jsonable_encoder(await producer()), status_code=status_code)
+
+        scope = f"{endpoint}:{caller}:{key}"
+        request_hash = self.fingerprint(payload)
+
+        stored = self._lookup(scope)
+        if stored is not None:
+            return self._replay(stored["request_hash"], request_hash, stored["status_code"], stored["body"])
+
+        in_flight = self._in_flight.get(scope)
+        if in_flight is not None:
+            first_hash, code, body = await asyncio.shield(in_flight)
+            return self._replay(first_hash, request_hash, code, body)
+
+        # Claim the key across worker processes. If another worker holds
+        # it, wait for its stored response (or for the claim to be freed)
+        claim = f"idempotency:{scope}"
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + IN_FLIGHT_TTL_SECONDS
+        while not await shared_state.aadd(claim, os.getpid(), ttl=IN_FLIGHT_TTL_SECONDS):
+            if loop.time() >= deadline:
+                raise HTTPException(
+                    status_code=409,
+                    detail="A request with this Idempotency-Key is still in progress"
+                )
+            await asyncio.sleep(IN_FLIGHT_POLL_SECONDS)
+            stored = self._lookup(scope)
+            if stored is not None:
+                return self._replay(stored["request_hash"], request_hash, stored["status_code"], stored["body"])
+
+        future = loop.create_future()
+        self._in_flight[scope] = future
+        try:
+            try:
+                body = jsonable_encoder(await producer())
+                code = status_code
+            except HTTPException as e:
+                body = {"detail": e.detail}
+                code = e.status_code
+                if code >= 500:
+                    raise
+
+            if code < 500:
+                self._store(scope, request_hash, code, body)
+            future.set_result((request_hash, code, body))
+            return JSONResponse(body, status_code=code)
+        except BaseException as e:
+            if not future.done():
+                future.set_exception(e)
+                future.exception()   # retrieved here so nobody has to wait on it
+            raise
+        finally:
+            self._in_flight.pop(scope, None)
+            await shared_state.adelete(claim)
+
+    @staticmethod
+    def _replay(first_hash: str, request_hash: str, code: int, body) -> JSONResponse:
+        if first_hash != request_hash:
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key was already used for a different request"
+            )
+        return JSONResponse(body, status_code=code, headers={"Idempotent-Replayed": "true"})
+
+    def _lookup(self, scope: str):
+        db = SessionLocal()
+        try:
+            record = db.query(IdempotencyRecord).filter(
+                IdempotencyRecord.scope == scope,
+                IdempotencyRecord.expires_at > datetime.now(timezone.utc)
+            ).first()
+            if record is None:
+                return None
+            return {
+                "request_hash": record.request_hash,
+                "status_code": record.status_code,
+                "body": json.loads(record.response_body)
+            }
+        finally:
+            db.close()
+
+    def _store(self, scope: str, request_hash: str, code: int, body):
+        now = datetime.now(timezone.utc)
+        db = SessionLocal()
+        try:
+            # Expired keys can be reused, so clear them out as we go
+            db.query(IdempotencyRecord).filter(
+                IdempotencyRecord.expires_at <= now
+            ).delete(synchronize_session=False)
+            db.add(IdempotencyRecord(
+                scope=scope,
+                request_hash=request_hash,
+                status_code=code,
+                response_body=json.dumps(body),
+                expires_at=now + timedelta(seconds=self.ttl_seconds)
+            ))
+            db.commit()
+        except IntegrityError:
+            # Another process stored this key first; theirs wins
+            db.rollback()
+        finally:
+            db.close()
+
+
+# Singleton instance
+idempotency_store = IdempotencyStore(ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS)
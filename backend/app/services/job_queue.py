@@ -0,0 +1,367 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import or_
+from ..config import settings
+from ..database import SessionLocal
+from ..models.job import QuizJob
+from .ai_service import ai_service
+from .quiz_store import save_quiz
+from .mastery import weakest_concepts
+from .dedup import drop_duplicates
+from .pregeneration import content_cache
+from .usage_ledger import bind_caller, BudgetExceededError
+
+FINISHED_STATUSES = ("succeeded", "failed")
+
+# Fewest questions a quiz may shrink to when repeats are dropped
+MIN_FRESH_QUESTIONS = 3
+
+
+class QuizJobQueue:
+    """
+    Runs quiz generation in the background instead of inside the request.
+
+    Jobs are rows in the quiz_jobs table. A bounded pool of `workers`
+    async workers, each running up to `concurrency` jobs at once, claims
+    queued jobs with a conditional update. Workers are woken right away
+    when a job is enqueued in this process, and re-check the table every
+    QUIZ_JOB_POLL_SECONDS for jobs enqueued elsewhere.
+
+    A claimed job is leased for `lease_seconds` and the lease is renewed
+    while it runs. Jobs whose lease ran out were left behind by a process
+    that died; idle workers put them back in the queue. Jobs running in
+    other live processes are left alone.
+
+    All DB work runs in threads; only the LLM call is awaited on the
+    event loop.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        concurrency: int,
+        max_attempts: int,
+        poll_seconds: float,
+        lease_seconds: float
+    ):
+        self.workers = workers
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self._wakeup = None
+        self._worker_tasks = []
+        self._running = {}   # job_id -> task, for the jobs this process is running
+        self._waiters = {}   # job_id -> [Future] for callers awaiting the result
+
+    # ─── Producer side ───────────────────────────────────────────
+
+    def enqueue(self, db, user, topic: str, level: str, num_questions: int) -> QuizJob:
+        """Store a new job and wake a worker."""
+        job = QuizJob(
+            user_id=user.id,
+            username=user.username,
+            topic=topic,
+            level=level,
+            num_questions=num_questions,
+            status="queued",
+            attempts=0
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job
+
+    async def wait_for(self, job_id: str, timeout: float) -> QuizJob:
+        """
+        Wait until a job finishes (or the timeout passes) and return its row.
+
+        Used to push results to clients that hold a connection open. Jobs
+        finished in this process resolve immediately; others are picked up
+        by re-checking the table every QUIZ_JOB_POLL_SECONDS.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            job = await asyncio.to_thread(self._load, job_id)
+            remaining = deadline - loop.time()
+            if job is None or job.status in FINISHED_STATUSES or remaining <= 0:
+                return job
+
+            future = loop.create_future()
+            self._waiters.setdefault(job_id, []).append(future)
+            try:
+                await asyncio.wait_for(future, min(remaining, self.poll_seconds))
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                waiters = self._waiters.get(job_id, [])
+                if future in waiters:
+                    waiters.remove(future)
+                if not waiters:
+                    self._waiters.pop(job_id, None)
+
+    def _load(self, job_id: str) -> QuizJob:
+        db = SessionLocal()
+        try:
+            job = db.query(QuizJob).filter(QuizJob.id == job_id).first()
+            if job is not None:
+                db.expunge(job)
+            return job
+        finally:
+            db.close()
+
+    # ─── Worker side ─────────────────────────────────────────────
+
+    async def start(self):
+        """Requeue jobs left behind by a stopped process and start the workers."""
+        requeued = await asyncio.to_thread(self._requeue_expired)
+        if requeued:
+            print(f"Requeued {requeued} interrupted quiz job(s)")
+
+        self._wakeup = asyncio.Event()
+        self._worker_tasks = [
+            asyncio.create_task(self._worker(n)) for n in range(self.workers)
+        ]
+
+    async def stop(self):
+        """Stop the workers and hand their unfinished jobs back to the queue."""
+        interrupted = list(self._running)
+        tasks = self._worker_tasks + list(self._running.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+        if interrupted:
+            await asyncio.to_thread(self._requeue_interrupted, interrupted)
+
+    def _requeue_interrupted(self, job_ids: list):
+        db = SessionLocal()
+        try:
+            db.query(QuizJob).filter(
+                QuizJob.id.in_(job_ids),
+                QuizJob.status == "running"
+            ).update({
+                "status": "queued",
+                "lease_expires_at": None,
+                # An interrupted attempt doesn't count
+                "attempts": QuizJob.attempts - 1
+            }, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def _lease_until(self) -> datetime:
+        return datetime.now(timezone.utc) + timedelta(seconds=self.lease_seconds)
+
+    def _requeue_expired(self, db=None) -> int:
+        """
+        Queue again the running jobs whose lease has run out (or that
+        were claimed before jobs had leases), or fail them if they are
+        out of attempts. Returns how many were requeued.
+        """
+        own_session = db is None
+        db = db or SessionLocal()
+        try:
+            now = datetime.now(timezone.utc)
+            expired = db.query(QuizJob).filter(
+                QuizJob.status == "running",
+                or_(QuizJob.lease_expires_at.is_(None), QuizJob.lease_expires_at < now)
+            )
+            expired.filter(QuizJob.attempts >= self.max_attempts).update({
+                "status": "failed",
+                "error": "Worker stopped while running the job",
+                "lease_expires_at": None,
+                "finished_at": now
+            }, synchronize_session=False)
+            requeued = expired.update(
+                {"status": "queued", "lease_expires_at": None},
+                synchronize_session=False
+            )
+            db.commit()
+            return requeued
+        finally:
+            if own_session:
+                db.close()
+
+    def _renew_lease(self, job_id: str):
+        db = SessionLocal()
+        try:
+            db.query(QuizJob).filter(
+                QuizJob.id == job_id,
+                QuizJob.status == "running"
+            ).update({"lease_expires_at": self._lease_until()}, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    async def _keep_lease(self, job_id: str):
+        """Renew a running job's lease well before it runs out."""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            await asyncio.to_thread(self._renew_lease, job_id)
+
+    def _claim(self):
+        """Atomically move the oldest queued job to running; None if the queue is empty."""
+        db = SessionLocal()
+        try:
+            while True:
+                candidate = db.query(QuizJob.id).filter(
+                    QuizJob.status == "queued"
+                ).order_by(QuizJob.created_at).first()
+                if candidate is None:
+                    # Nothing queued: pick up jobs a dead process left behind
+                    if self._requeue_expired(db):
+                        continue
+                    return None
+
+                claimed = db.query(QuizJob).filter(
+                    QuizJob.id == candidate.id,
+                    QuizJob.status == "queued"
+                ).update({
+                    "status": "running",
+                    "started_at": datetime.now(timezone.utc),
+                    "lease_expires_at": self._lease_until(),
+                    "attempts": QuizJob.attempts + 1
+                }, synchronize_session=False)
+                db.commit()
+
+                # Another worker got there first: try the next one
+                if claimed == 1:
+                    return candidate.id
+        finally:
+            db.close()
+
+    async def _worker(self, number: int):
+        slots = asyncio.Semaphore(self.concurrency)
+        while True:
+            await slots.acquire()
+            # Clear before claiming so an enqueue during the claim isn't missed
+            self._wakeup.clear()
+            job_id = await asyncio.to_thread(self._claim)
+            if job_id is None:
+                slots.release()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            task = asyncio.create_task(self._run(job_id))
+            self._running[job_id] = task
+            task.add_done_callback(lambda _, job_id=job_id: self._running.pop(job_id, None))
+            task.add_done_callback(lambda _: slots.release())
+
+    async def _run(self, job_id: str):
+        lease = asyncio.create_task(self._keep_lease(job_id))
+        try:
+            try:
+                job, questions_data, focus_concepts = await asyncio.to_thread(self._prepare, job_id)
+                generated = questions_data is None
+                if generated:
+                    bind_caller("/api/quiz/generate", job.username)
+                    questions_data = await ai_service.generate_quiz(
+                        topic=job.topic,
+                        level=job.level,
+                        num_questions=job.num_questions,
+                        focus_concepts=focus_concepts
+                    )
+                await asyncio.to_thread(self._succeed, job_id, questions_data, generated)
+            except Exception as e:
+                if await asyncio.to_thread(self._fail, job_id, e):
+                    self._wakeup.set()
+        finally:
+            lease.cancel()
+            await self._notify(job_id)
+
+    def _prepare(self, job_id: str) -> tuple:
+        """
+        Load a job and look for its questions in the pregenerated pool.
+        Returns (job, questions or None, concepts the LLM should focus on).
+        """
+        db = SessionLocal()
+        try:
+            job = db.query(QuizJob).filter(QuizJob.id == job_id).first()
+            db.expunge(job)
+            # Popular topics have a pregenerated question pool; use it
+            # if it still has enough questions this student hasn't seen
+            pool = content_cache.get(db, "quiz", job.level, None, job.topic)
+            fresh = drop_duplicates(db, pool, user_id=job.user_id) if pool else []
+            if len(fresh) >= job.num_questions:
+                return job, fresh[:job.num_questions], None
+            weak = weakest_concepts(db, job.user_id, topic=job.topic, limit=3)
+            return job, None, [m.concept for m in weak]
+        finally:
+            db.close()
+
+    def _succeed(self, job_id: str, questions_data: list, generated: bool):
+        """Save the quiz and mark the job succeeded."""
+        db = SessionLocal()
+        try:
+            job = db.query(QuizJob).filter(QuizJob.id == job_id).first()
+            if generated:
+                # Skip questions this student has effectively seen before,
+                # unless that would leave too short a quiz
+                fresh = drop_duplicates(db, questions_data, user_id=job.user_id)
+                if len(fresh) >= MIN_FRESH_QUESTIONS:
+                    questions_data = fresh
+            quiz_session = save_quiz(
+                db,
+                user_id=job.user_id,
+                topic=job.topic,
+                level=job.level,
+                questions_data=questions_data
+            )
+            job.status = "succeeded"
+            job.lease_expires_at = None
+            job.quiz_session_id = quiz_session.id
+            job.error = None
+            job.finished_at = datetime.now(timezone.utc)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _fail(self, job_id: str, error: Exception) -> bool:
+        """Record a failed attempt. True if the job went back in the queue."""
+        db = SessionLocal()
+        try:
+            job = db.query(QuizJob).filter(QuizJob.id == job_id).first()
+            job.error = str(error)[:1000]
+            job.lease_expires_at = None
+            if isinstance(error, BudgetExceededError) or job.attempts >= self.max_attempts:
+                job.status = "failed"
+                job.finished_at = datetime.now(timezone.utc)
+            else:
+                job.status = "queued"
+            db.commit()
+            print(f"Quiz job {job_id} attempt {job.attempts} failed: {error}")
+            return job.status == "queued"
+        finally:
+            db.close()
+
+    async def _notify(self, job_id: str):
+        if job_id not in self._waiters:
+            return
+        job = await asyncio.to_thread(self._load, job_id)
+        if job is None or job.status not in FINISHED_STATUSES:
+            return
+        for future in self._waiters.pop(job_id, []):
+            if not future.done():
+                future.set_result(job)
+
+
+# Singleton instance
+quiz_jobs = QuizJobQueue(
+    workers=settings.QUIZ_JOB_WORKERS,
+    concurrency=settings.QUIZ_JOB_CONCURRENCY,
+    max_attempts=settings.QUIZ_JOB_MAX_ATTEMPTS,
+    poll_seconds=settings.QUIZ_JOB_POLL_SECONDS,
+    lease_seconds=settings.QUIZ_JOB_LEASE_SECONDS
+)
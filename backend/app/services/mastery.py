@@ -0,0 +1,127 @@
+import hashlib
+import re
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from ..models.mastery import ConceptMastery, QuestionRating
+
+INITIAL_RATING = 1500.0
+
+# Starting difficulty of a question we have no answers for yet
+DIFFICULTY_PRIOR = {"easy": 1300.0, "medium": 1500.0, "hard": 1700.0}
+
+# How far one answer moves each estimate
+STUDENT_K = 32.0
+QUESTION_K = 16.0
+
+
+def normalize(text: str) -> str:
+    """Lowercase and collapse whitespace so spelling variants share a key."""
+    return re.sub(r"\s+", " ", (text or "").strip().lower())
+
+
+def question_fingerprint(question_text: str) -> str:
+    return hashlib.sha1(normalize(question_text).encode()).hexdigest()
+
+
+def expected_score(student_rating: float, question_rating: float) -> float:
+    """Probability that the student answers the question correctly (Elo)."""
+    return 1.0 / (1.0 + 10 ** ((question_rating - student_rating) / 400.0))
+
+
+def insert_missing(db: Session, model, rows: dict):
+    """
+    INSERT the rows (keyed by a unique key of the table) that don't exist
+    yet, skipping any that do, including ones another transaction is
+    inserting at the same time. Returns how many were inserted.
+    """
+    if not rows:
+        return 0
+    # Same key order in every transaction, so two of them can't deadlock
+    values = [rows[key] for key in sorted(rows)]
+    if db.get_bind().dialect.name == "postgresql":
+        statement = postgresql_insert(model).values(values)
+    else:
+        statement = sqlite_insert(model).values(values)
+    return db.execute(statement.on_conflict_do_nothing()).rowcount
+
+
+def update_mastery(db: Session, answers: list):
+    """
+    Apply one Elo update per answered question.
+
+    `answers` holds dicts with user_id, topic, concept, question_text,
+    difficulty and is_correct. Existing estimates are loaded with one query
+    per table, and each answer is O(1) from there. Does not commit.
+
+    Rows for new concepts and questions are inserted up front, skipping
+    any another transaction created first, and all rows are then loaded
+    FOR UPDATE: concurrent submissions wait on each other instead of
+    failing with an IntegrityError or losing an update.
+    """
+    if not answers:
+        return
+
+    for a in answers:
+        a["concept_key"] = normalize(a["concept"] or a["topic"])
+        a["fingerprint"] = question_fingerprint(a["question_text"])
+
+    user_ids = {a["user_id"] for a in answers}
+    concept_keys = {a["concept_key"] for a in answers}
+    fingerprints = {a["fingerprint"] for a in answers}
+
+    new_masteries, new_ratings = {}, {}
+    for a in answers:
+        new_masteries.setdefault((a["user_id"], a["concept_key"]), {
+            "user_id": a["user_id"],
+            "concept": a["concept_key"],
+            "rating": INITIAL_RATING,
+            "attempts": 0,
+            "correct": 0
+        })
+        new_ratings.setdefault(a["fingerprint"], {
+            "fingerprint": a["fingerprint"],
+            "rating": DIFFICULTY_PRIOR.get(a["difficulty"], INITIAL_RATING),
+            "attempts": 0,
+            "correct": 0
+        })
+    insert_missing(db, ConceptMastery, new_masteries)
+    insert_missing(db, QuestionRating, new_ratings)
+
+    masteries = {
+        (m.user_id, m.concept): m
+        for m in db.query(ConceptMastery).filter(
+            ConceptMastery.user_id.in_(user_ids),
+            ConceptMastery.concept.in_(concept_keys)
+        ).with_for_update().all()
+    }
+    ratings = {
+        r.fingerprint: r
+        for r in db.query(QuestionRating).filter(
+            QuestionRating.fingerprint.in_(fingerprints)
+        ).with_for_update().all()
+    }
+
+    for a in answers:
+        mastery = masteries[a["user_id"], a["concept_key"]]
+        rating = ratings[a["fingerprint"]]
+
+        score = 1.0 if a["is_correct"] else 0.0
+        surprise = score - expected_score(mastery.rating, rating.rating)
+
+        mastery.rating += STUDENT_K * surprise
+        mastery.attempts += 1
+        mastery.correct += int(score)
+        mastery.topic = normalize(a["topic"])
+
+        rating.rating -= QUESTION_K * surprise
+        rating.attempts += 1
+        rating.correct += int(score)
+
+
+def weakest_concepts(db: Session, user_id: str, topic: str = None, limit: int = 5) -> list:
+    """A student's lowest-rated concepts (optionally within one topic)."""
+    query = db.query(ConceptMastery).filter(ConceptMastery.user_id == user_id)
+    if topic:
+        query = query.filter(ConceptMastery.topic == normalize(topic))
+    return query.order_by(ConceptMastery.rating).limit(limit).all()
@@ -0,0 +1,93 @@
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from ..config import settings
+from ..database import SessionLocal
+from ..events import on_insert_committed
+from ..models.session import LearningSession
+from ..models.quiz import QuizSession
+from .mastery import normalize
+
+
+class PopularityTracker:
+    """
+    Exponentially decayed request counts per content key.
+
+    Keys are (kind, level, style, normalized topic): ("explain", level,
+    learning_style, topic) for LearningSession writes and ("quiz", level,
+    None, topic) for QuizSession writes. A request counts 1 when made and
+    half as much every `half_life_hours` after, so the ranking follows
+    what students ask for now rather than all-time totals.
+
+    Scores are kept relative to a fixed epoch (log form), so adding a
+    request is O(1) and nothing has to be decayed in place.
+    """
+
+    def __init__(self, half_life_hours: float):
+        self.rate = math.log(2) / (half_life_hours * 3600)
+        self._epoch = time.time()
+        self._scores = {}     # key -> score at epoch
+        self._display = {}    # key -> topic as first spelled
+        self._lock = threading.Lock()
+
+    def add(self, kind: str, level: str, style, topic: str, at: float = None):
+        """Count one request (at unix time `at`, default now)."""
+        key = (kind, level, style, normalize(topic))
+        weight = math.exp(self.rate * ((at or time.time()) - self._epoch))
+        with self._lock:
+            self._scores[key] = self._scores.get(key, 0.0) + weight
+            self._display.setdefault(key, " ".join(topic.split()))
+
+    def top(self, k: int) -> list:
+        """The `k` most popular keys right now as (key, topic, decayed score)."""
+        decay = math.exp(-self.rate * (time.time() - self._epoch))
+        with self._lock:
+            ranked = sorted(self._scores.items(), key=lambda item: -item[1])[:k]
+            return [(key, self._display[key], score * decay) for key, score in ranked]
+
+    def total(self) -> float:
+        """Sum of all decayed scores (expected requests, by the same weighting)."""
+        decay = math.exp(-self.rate * (time.time() - self._epoch))
+        with self._lock:
+            return sum(self._scores.values()) * decay
+
+    def load(self, half_lives: int = 5):
+        """Replay recent sessions (older ones have decayed to almost nothing)."""
+        since = datetime.now(timezone.utc) - timedelta(seconds=half_lives * math.log(2) / self.rate)
+        db = SessionLocal()
+        try:
+            for topic, level, style, created_at in db.query(
+                LearningSession.topic, LearningSession.level,
+                LearningSession.learning_style, LearningSession.created_at
+            ).filter(LearningSession.created_at >= since).yield_per(1000):
+                self.add("explain", level, style, topic, at=_timestamp(created_at))
+            for topic, level, created_at in db.query(
+                QuizSession.topic, QuizSession.level, QuizSession.started_at
+            ).filter(QuizSession.started_at >= since).yield_per(1000):
+                self.add("quiz", level, None, topic, at=_timestamp(created_at))
+        finally:
+            db.close()
+        print(f"Popularity tracker loaded {len(self._scores)} keys")
+
+
+def _timestamp(value: datetime) -> float:
+    if value is None:
+        return None
+    # SQLite hands back naive datetimes; they are stored in UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+# Singleton instance
+popularity = PopularityTracker(half_life_hours=settings.POPULARITY_HALF_LIFE_HOURS)
+
+on_insert_committed(
+    LearningSession,
+    lambda values: popularity.add("explain", values["level"], values.get("learning_style"), values["topic"])
+)
+on_insert_committed(
+    QuizSession,
+    lambda values: popularity.add("quiz", values["level"], None, values["topic"])
+)
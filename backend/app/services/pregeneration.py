@@ -0,0 +1,224 @@
+import asyncio
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func
+from ..config import settings
+from ..database import SessionLocal
+from ..models.pregenerated import PregeneratedContent
+from ..models.usage import LLMUsage
+from .ai_service import ai_service
+from .mastery import normalize
+from .popularity import popularity
+from .shared_state import shared_state
+from .usage_ledger import bind_caller
+
+# Token cost assumed per item when the ledger has no history yet
+DEFAULT_TOKENS = {"explain": 1500, "quiz": 2500}
+
+# Ledger method behind each kind of content
+LLM_METHODS = {"explain": "explain_topic", "quiz": "generate_quiz"}
+
+
+def cache_key(kind: str, level: str, style, topic: str) -> str:
+    return f"{kind}|{level}|{style or ''}|{normalize(topic)}"
+
+
+class ContentCache:
+    """
+    Read side of the pregenerated content: one primary-key lookup per
+    request, plus in-memory hit/miss counts for the report.
+    """
+
+    def __init__(self):
+        self.hits = {"explain": 0, "quiz": 0}
+        self.misses = {"explain": 0, "quiz": 0}
+
+    def get(self, db, kind: str, level: str, style, topic: str):
+        """The cached payload for a key, or None."""
+        row = db.query(PregeneratedContent).filter(
+            PregeneratedContent.cache_key == cache_key(kind, level, style, topic),
+            PregeneratedContent.expires_at > datetime.now(timezone.utc)
+        ).first()
+        if row is None:
+            self.misses[kind] += 1
+            return None
+        self.hits[kind] += 1
+        row.hits = (row.hits or 0) + 1
+        return json.loads(row.payload)
+
+    def hit_rate(self) -> float:
+        hits = sum(self.hits.values())
+        total = hits + sum(self.misses.values())
+        return hits / total if total else 0.0
+
+
+class PregenerationScheduler:
+    """
+    Once a night, pregenerates content for the most popular keys.
+
+    Takes the top `top_k` keys from the popularity tracker, skips those
+    whose content is still fresh, and generates the rest (most popular
+    first) until the night's estimated token budget is spent.
+    """
+
+    def __init__(self, top_k: int, token_budget: int, ttl_hours: int, quiz_pool_size: int, hour_utc: int):
+        self.top_k = top_k
+        self.token_budget = token_budget
+        self.ttl_hours = ttl_hours
+        self.quiz_pool_size = quiz_pool_size
+        self.hour_utc = hour_utc
+        self._task = None
+
+    # ─── Planning ────────────────────────────────────────────────
+
+    def plan(self) -> dict:
+        """
+        What a run would do now, without calling the LLM.
+
+        Expected hit rates weight each key by its decayed popularity, i.e.
+        assume tomorrow's requests look like the recent ones.
+        """
+        candidates = popularity.top(self.top_k)
+        total = popularity.total()
+        costs = self._token_costs()
+
+        db = SessionLocal()
+        try:
+            keys = [cache_key(*key) for key, _, _ in candidates]
+            fresh = {
+                k for (k,) in db.query(PregeneratedContent.cache_key).filter(
+                    PregeneratedContent.cache_key.in_(keys),
+                    PregeneratedContent.expires_at > datetime.now(timezone.utc) + timedelta(hours=self.ttl_hours / 2)
+                ).all()
+            } if keys else set()
+        finally:
+            db.close()
+
+        covered_before = covered_after = 0.0
+        tokens = 0
+        to_generate = []
+        for (key, topic, score), k in zip(candidates, keys):
+            if k in fresh:
+                covered_before += score
+                covered_after += score
+                continue
+            cost = costs[key[0]]
+            if tokens + cost > self.token_budget:
+                continue
+            tokens += cost
+            covered_after += score
+            to_generate.append({"kind": key[0], "level": key[1], "style": key[2], "topic": topic})
+
+        return {
+            "keys_considered": len(candidates),
+            "already_fresh": len(fresh),
+            "to_generate": to_generate,
+            "estimated_tokens": tokens,
+            "token_budget": self.token_budget,
+            "expected_hit_rate_before": round(covered_before / total, 4) if total else 0.0,
+            "expected_hit_rate_after": round(covered_after / total, 4) if total else 0.0,
+            "observed_hit_rate": round(content_cache.hit_rate(), 4)
+        }
+
+    @staticmethod
+    def _token_costs() -> dict:
+        """Average tokens per call of each kind over the last week of the ledger."""
+        db = SessionLocal()
+        try:
+            rows = db.query(LLMUsage.method, func.avg(LLMUsage.total_tokens)).filter(
+                LLMUsage.method.in_(list(LLM_METHODS.values())),
+                LLMUsage.success == True,
+                LLMUsage.created_at >= datetime.now(timezone.utc) - timedelta(days=7)
+            ).group_by(LLMUsage.method).all()
+        finally:
+            db.close()
+        averages = {method: avg for method, avg in rows if avg}
+        return {
+            kind: int(averages.get(method) or DEFAULT_TOKENS[kind])
+            for kind, method in LLM_METHODS.items()
+        }
+
+    # ─── Running ─────────────────────────────────────────────────
+
+    async def run(self, dry_run: bool = False) -> dict:
+        """Generate everything in the plan (or just return it on a dry run)."""
+        plan = await asyncio.to_thread(self.plan)
+        if dry_run:
+            return plan
+
+        bind_caller("pregeneration")
+        generated = failed = 0
+        for item in plan["to_generate"]:
+            kind, level, style, topic = item["kind"], item["level"], item["style"], item["topic"]
+            try:
+                if kind == "explain":
+                    payload = await ai_service.explain_topic(topic=topic, level=level, learning_style=style)
+                else:
+                    payload = await ai_service.generate_quiz(
+                        topic=topic, level=level, num_questions=self.quiz_pool_size
+                    )
+                await asyncio.to_thread(self._store, cache_key(kind, level, style, topic), kind, payload)
+                generated += 1
+            except Exception as e:
+                failed += 1
+                print(f"Pregeneration of {kind} '{topic}' ({level}) failed: {e}")
+
+        print(f"Pregeneration done: {generated} generated, {failed} failed")
+        return dict(plan, generated=generated, failed=failed)
+
+    def _store(self, key: str, kind: str, payload):
+        expires_at = datetime.now(timezone.utc) + timedelta(hours=self.ttl_hours)
+        db = SessionLocal()
+        try:
+            db.merge(PregeneratedContent(
+                cache_key=key,
+                kind=kind,
+                payload=json.dumps(payload),
+                hits=0,
+                expires_at=expires_at
+            ))
+            db.commit()
+        finally:
+            db.close()
+
+    # ─── Scheduling ──────────────────────────────────────────────
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._nightly())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _nightly(self):
+        while True:
+            now = datetime.now(timezone.utc)
+            next_run = now.replace(hour=self.hour_utc, minute=0, second=0, microsecond=0)
+            if next_run <= now:
+                next_run += timedelta(days=1)
+            await asyncio.sleep((next_run - now).total_seconds())
+            # Every worker wakes up; only the first to claim the night runs
+            if not await shared_state.aadd(f"pregeneration:{next_run.date().isoformat()}", os.getpid(), ttl=20 * 60 * 60):
+                continue
+            try:
+                await self.run()
+            except Exception as e:
+                print(f"Nightly pregeneration failed: {e}")
+
+
+# Singleton instances
+content_cache = ContentCache()
+pregeneration = PregenerationScheduler(
+    top_k=settings.PREGEN_TOP_K,
+    token_budget=settings.PREGEN_TOKEN_BUDGET,
+    ttl_hours=settings.PREGEN_TTL_HOURS,
+    quiz_pool_size=settings.PREGEN_QUIZ_POOL_SIZE,
+    hour_utc=settings.PREGEN_HOUR_UTC
+)
@@ -0,0 +1,302 @@
+import json
+import uuid
+from sqlalchemy.orm import Session
+from ..models.quiz import QuizSession, QuizQuestion
+from ..models.job import QuizJob
+from ..models.assignment import QuizAssignment, AssignmentQuestion, AssignmentAnswer
+from ..schemas.quiz import QuizSessionResponse, QuizQuestionResponse, QuizJobResponse
+from .dedup import index_questions
+from .mastery import update_mastery
+from .review import schedule_missed
+
+
+def save_quiz(
+    db: Session,
+    user_id: str,
+    topic: str,
+    level: str,
+    questions_data: list,
+    learning_session_id: str = None
+) -> QuizSession:
+    """
+    Store a generated quiz and its questions.
+
+    Flushes but does not commit, so callers can save related rows
+    (e.g. the LearningSession of a lesson) in the same transaction.
+    """
+    quiz_session = QuizSession(
+        user_id=user_id,
+        learning_session_id=learning_session_id,
+        topic=topic,
+        level=level,
+        total_questions=len(questions_data)
+    )
+    db.add(quiz_session)
+    db.flush()  # Get the ID
+
+    questions = []
+    for q_data in questions_data:
+        question = QuizQuestion(
+            quiz_session_id=quiz_session.id,
+            question_number=q_data["question_number"],
+            question_text=q_data["question_text"],
+            options=json.dumps(q_data["options"]),  # Store as JSON string
+            correct_answer=q_data["correct_answer"],
+            difficulty=q_data.get("difficulty", "medium"),
+            concept=q_data.get("concept", topic),
+            explanation=q_data.get("explanation", "")
+        )
+        db.add(question)
+        questions.append(question)
+
+    db.flush()
+    # Near-duplicate index entries, so later generations can skip repeats
+    index_questions(db, questions)
+    return quiz_session
+
+
+def save_assignment(
+    db: Session,
+    teacher_id: str,
+    topic: str,
+    level: str,
+    questions_data: list
+) -> QuizAssignment:
+    """Store a shared quiz's questions once. Flushes but does not commit."""
+    assignment = QuizAssignment(
+        teacher_id=teacher_id,
+        topic=topic,
+        level=level,
+        total_questions=len(questions_data)
+    )
+    db.add(assignment)
+    db.flush()  # Get the ID
+
+    for q_data in questions_data:
+        db.add(AssignmentQuestion(
+            assignment_id=assignment.id,
+            question_number=q_data["question_number"],
+            question_text=q_data["question_text"],
+            options=json.dumps(q_data["options"]),
+            correct_answer=q_data["correct_answer"],
+            difficulty=q_data.get("difficulty", "medium"),
+            concept=q_data.get("concept", topic),
+            explanation=q_data.get("explanation", "")
+        ))
+
+    db.flush()
+    return assignment
+
+
+def quiz_questions(quiz_session: QuizSession) -> list:
+    """
+    The questions of a quiz attempt: its own QuizQuestions, or the shared
+    AssignmentQuestions for an attempt at a class assignment.
+    """
+    if quiz_session.assignment_id:
+        return quiz_session.assignment.questions
+    return quiz_session.questions
+
+
+def load_quiz_questions(db: Session, quiz_session: QuizSession) -> list:
+    """Like quiz_questions, but one ordered query instead of lazy loading."""
+    if quiz_session.assignment_id:
+        return db.query(AssignmentQuestion).filter(
+            AssignmentQuestion.assignment_id == quiz_session.assignment_id
+        ).order_by(AssignmentQuestion.question_number).all()
+    return db.query(QuizQuestion).filter(
+        QuizQuestion.quiz_session_id == quiz_session.id
+    ).order_by(QuizQuestion.question_number).all()
+
+
+def question_by_number(db: Session, quiz_session: QuizSession, question_number: int):
+    """One question of an attempt: its own QuizQuestion or the shared AssignmentQuestion."""
+    if quiz_session.assignment_id:
+        return db.query(AssignmentQuestion).filter(
+            AssignmentQuestion.assignment_id == quiz_session.assignment_id,
+            AssignmentQuestion.question_number == question_number
+        ).first()
+    return db.query(QuizQuestion).filter(
+        QuizQuestion.quiz_session_id == quiz_session.id,
+        QuizQuestion.question_number == question_number
+    ).first()
+
+
+def graded_answer(quiz_session: QuizSession, question, is_correct: bool) -> dict:
+    """One answer as update_mastery and schedule_missed take it."""
+    return {
+        "user_id": quiz_session.user_id,
+        "topic": quiz_session.topic,
+        "concept": question.concept,
+        "question_text": question.question_text,
+        "difficulty": question.difficulty,
+        "options": question.options,
+        "correct_answer": question.correct_answer,
+        "explanation": question.explanation,
+        "is_correct": is_correct
+    }
+
+
+def record_answer(db: Session, quiz_session: QuizSession, question, user_answer: str, is_correct: bool):
+    """Store a student's answer on their own question or as an assignment answer."""
+    if quiz_session.assignment_id:
+        db.add(AssignmentAnswer(
+            quiz_session_id=quiz_session.id,
+            question_id=question.id,
+            user_answer=user_answer,
+            is_correct=is_correct
+        ))
+    else:
+        question.user_answer = user_answer
+        question.is_correct = is_correct
+
+
+def record_live_answers(db: Session, answers: dict):
+    """
+    Write answers given over the live socket before the quiz is submitted.
+
+    `answers` maps question id -> {"quiz_session_id", "assignment",
+    "user_answer", "answer"}, where "answer" is the graded_answer dict.
+    Answers to quizzes submitted in the meantime are dropped, so they
+    never overwrite graded results.
+
+    A question's first answer also updates mastery and schedules it for
+    review if missed; changing the answer later doesn't count again, and
+    neither does submitting the quiz (see take_live_answers). Does not
+    commit.
+    """
+    open_ids = {
+        quiz_id for (quiz_id,) in db.query(QuizSession.id).filter(
+            QuizSession.id.in_({a["quiz_session_id"] for a in answers.values()}),
+            QuizSession.completed == False
+        )
+    } if answers else set()
+    answers = {question_id: a for question_id, a in answers.items() if a["quiz_session_id"] in open_ids}
+    if not answers:
+        return
+
+    own = {question_id: a for question_id, a in answers.items() if not a["assignment"]}
+    shared = {(a["quiz_session_id"], question_id): a for question_id, a in answers.items() if a["assignment"]}
+
+    answered_before = set()
+    if own:
+        answered_before.update(
+            question_id for (question_id,) in db.query(QuizQuestion.id).filter(
+                QuizQuestion.id.in_(own),
+                QuizQuestion.user_answer.isnot(None)
+            )
+        )
+        db.bulk_update_mappings(QuizQuestion, [
+            {"id": question_id, "user_answer": a["user_answer"], "is_correct": a["answer"]["is_correct"]}
+            for question_id, a in own.items()
+        ])
+    if shared:
+        existing = {
+            (quiz_id, question_id): answer_id
+            for answer_id, quiz_id, question_id in db.query(
+                AssignmentAnswer.id,
+                AssignmentAnswer.quiz_session_id,
+                AssignmentAnswer.question_id
+            ).filter(
+                AssignmentAnswer.quiz_session_id.in_({quiz_id for quiz_id, _ in shared}),
+                AssignmentAnswer.question_id.in_({question_id for _, question_id in shared})
+            )
+        }
+        answered_before.update(question_id for quiz_id, question_id in existing if (quiz_id, question_id) in shared)
+        rows = [
+            {
+                "id": existing.get(key) or str(uuid.uuid4()),
+                "quiz_session_id": key[0],
+                "question_id": key[1],
+                "user_answer": a["user_answer"],
+                "is_correct": a["answer"]["is_correct"]
+            }
+            for key, a in shared.items()
+        ]
+        db.bulk_update_mappings(AssignmentAnswer, [row for key, row in zip(shared, rows) if key in existing])
+        db.bulk_insert_mappings(AssignmentAnswer, [row for key, row in zip(shared, rows) if key not in existing])
+
+    first_answers = [a["answer"] for question_id, a in answers.items() if question_id not in answered_before]
+    update_mastery(db, first_answers)
+    schedule_missed(db, first_answers)
+
+
+def take_live_answers(db: Session, quizzes: list) -> set:
+    """
+    (quiz_session_id, question_id) of the questions in `quizzes` already
+    answered over the live socket. Mastery and review counted those at
+    the live answer, so grading skips them.
+
+    Live answers to assignment questions are deleted here, because
+    grading stores the submitted answers afresh. Does not commit.
+    """
+    own_ids = [q.id for q in quizzes if not q.assignment_id]
+    attempt_ids = [q.id for q in quizzes if q.assignment_id]
+    answered = set()
+    if own_ids:
+        answered.update(db.query(QuizQuestion.quiz_session_id, QuizQuestion.id).filter(
+            QuizQuestion.quiz_session_id.in_(own_ids),
+            QuizQuestion.user_answer.isnot(None)
+        ).all())
+    if attempt_ids:
+        live_answers = db.query(AssignmentAnswer).filter(AssignmentAnswer.quiz_session_id.in_(attempt_ids))
+        answered.update(live_answers.with_entities(AssignmentAnswer.quiz_session_id, AssignmentAnswer.question_id).all())
+        live_answers.delete(synchronize_session=False)
+    return {tuple(pair) for pair in answered}
+
+
+def answered_questions(quiz_session: QuizSession) -> list:
+    """(question, user_answer, is_correct) for every question of a finished attempt."""
+    if quiz_session.assignment_id:
+        answers = {a.question_id: a for a in quiz_session.answers}
+        return [
+            (q, answers[q.id].user_answer, answers[q.id].is_correct) if q.id in answers else (q, None, None)
+            for q in quiz_session.assignment.questions
+        ]
+    return [(q, q.user_answer, q.is_correct) for q in quiz_session.questions]
+
+
+def quiz_session_response(quiz_session: QuizSession) -> QuizSessionResponse:
+    """Build the quiz response with correct answers hidden."""
+    questions_for_response = [
+        QuizQuestionResponse(
+            id=q.id,
+            question_number=q.question_number,
+            question_text=q.question_text,
+            options=json.loads(q.options),
+            difficulty=q.difficulty
+        )
+        for q in quiz_questions(quiz_session)
+    ]
+
+    return QuizSessionResponse(
+        id=quiz_session.id,
+        topic=quiz_session.topic,
+        level=quiz_session.level,
+        total_questions=quiz_session.total_questions,
+        questions=sorted(questions_for_response, key=lambda x: x.question_number),
+        started_at=quiz_session.started_at
+    )
+
+
+def quiz_job_response(db: Session, job: QuizJob) -> QuizJobResponse:
+    """Build a job status response, including the quiz once it is ready."""
+    quiz = None
+    if job.status == "succeeded" and job.quiz_session_id:
+        quiz_session = db.query(QuizSession).filter(
+            QuizSession.id == job.quiz_session_id
+        ).first()
+        if quiz_session:
+            quiz = quiz_session_response(quiz_session)
+
+    return QuizJobResponse(
+        id=job.id,
+        status=job.status,
+        topic=job.topic,
+        level=job.level,
+        attempts=job.attempts or 0,
+        error=job.error,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+        quiz=quiz
+    )
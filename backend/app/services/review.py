@@ -0,0 +1,175 @@
+from datetime import datetime, timedelta, timezone
+import uuid
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from ..models.review import ReviewItem
+from ..models.quiz import QuizSession, QuizQuestion
+from ..models.assignment import AssignmentQuestion, AssignmentAnswer
+from .mastery import insert_missing, normalize, question_fingerprint
+
+# SM-2 answer quality (0-5) for a multiple-choice answer
+QUALITY_CORRECT = 4
+QUALITY_MISSED = 1
+
+MIN_EASE_FACTOR = 1.3
+
+
+def sm2(item: ReviewItem, quality: int, now: datetime):
+    """Apply one SM-2 step to a review item and set its next due date."""
+    if quality >= 3:
+        if item.repetitions == 0:
+            item.interval_days = 1
+        elif item.repetitions == 1:
+            item.interval_days = 6
+        else:
+            item.interval_days = round(item.interval_days * item.ease_factor)
+        item.repetitions += 1
+    else:
+        item.repetitions = 0
+        item.interval_days = 1
+        item.lapses += 1
+
+    item.ease_factor = max(
+        MIN_EASE_FACTOR,
+        item.ease_factor + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)
+    )
+    item.last_reviewed_at = now
+    item.due_at = now + timedelta(days=item.interval_days)
+
+
+def schedule_missed(db: Session, answers: list):
+    """
+    Schedule every missed question in `answers` for review.
+
+    Takes the same answer dicts as update_mastery, plus options,
+    correct_answer and explanation. A question the student already has in
+    their queue counts as a lapse instead of a second copy. Does not commit.
+
+    Like update_mastery, items for new questions are inserted up front
+    (skipping any another transaction created first) and all items are
+    then loaded FOR UPDATE with one query, so two submissions missing the
+    same question can't fail with an IntegrityError.
+    """
+    missed = [a for a in answers if not a["is_correct"]]
+    if not missed:
+        return
+
+    for a in missed:
+        a["fingerprint"] = question_fingerprint(a["question_text"])
+
+    now = datetime.now(timezone.utc)
+    new_items = {}
+    for a in missed:
+        new_items.setdefault((a["user_id"], a["fingerprint"]), {
+            "id": str(uuid.uuid4()),
+            "user_id": a["user_id"],
+            "fingerprint": a["fingerprint"],
+            "topic": normalize(a["topic"]),
+            "question_text": a["question_text"],
+            "options": a["options"],
+            "correct_answer": a["correct_answer"],
+            "difficulty": a["difficulty"],
+            "concept": a["concept"],
+            "explanation": a["explanation"],
+            "ease_factor": 2.5,
+            "interval_days": 0,
+            "repetitions": 0,
+            "lapses": 0,
+            "due_at": now
+        })
+    insert_missing(db, ReviewItem, new_items)
+
+    items = {
+        (item.user_id, item.fingerprint): item
+        for item in db.query(ReviewItem).filter(
+            ReviewItem.user_id.in_({a["user_id"] for a in missed}),
+            ReviewItem.fingerprint.in_({a["fingerprint"] for a in missed})
+        ).with_for_update().all()
+    }
+    for a in missed:
+        sm2(items[a["user_id"], a["fingerprint"]], QUALITY_MISSED, now)
+
+
+def due_reviews(db: Session, user_id: str, limit: int = 10, topic: str = None) -> list:
+    """A student's review items that are due now, most overdue first."""
+    query = db.query(ReviewItem).filter(
+        ReviewItem.user_id == user_id,
+        ReviewItem.due_at <= datetime.now(timezone.utc)
+    )
+    if topic:
+        query = query.filter(ReviewItem.topic == normalize(topic))
+    return query.order_by(ReviewItem.due_at).limit(limit).all()
+
+
+def backfill_missed(db: Session) -> int:
+    """
+    Schedule questions missed in quizzes submitted before schedule_missed
+    existed, and normalize the topic of items stored before topics were.
+    A one-off migration (create_schema runs it once per database); returns
+    the number of items created. Does not commit.
+
+    Misses since then are already queued, so only quizzes finished before
+    the oldest review item are scanned. Backfilled items take the time of
+    their last miss as created_at. Each (student, question) gets one item,
+    with one SM-2 lapse per time it was missed.
+    """
+    oldest = db.query(func.min(ReviewItem.created_at)).scalar()
+    missed_at = func.coalesce(QuizSession.completed_at, QuizSession.started_at)
+
+    sources = [
+        db.query(QuizSession.user_id, QuizSession.topic, missed_at, QuizQuestion).join(
+            QuizQuestion, QuizQuestion.quiz_session_id == QuizSession.id
+        ).filter(QuizQuestion.is_correct == False),
+        db.query(QuizSession.user_id, QuizSession.topic, missed_at, AssignmentQuestion).join(
+            AssignmentAnswer, AssignmentAnswer.quiz_session_id == QuizSession.id
+        ).join(
+            AssignmentQuestion, AssignmentQuestion.id == AssignmentAnswer.question_id
+        ).filter(AssignmentAnswer.is_correct == False),
+    ]
+    misses = []
+    for query in sources:
+        query = query.filter(QuizSession.completed == True)
+        if oldest is not None:
+            query = query.filter(missed_at < oldest)
+        misses.extend(query.all())
+    misses.sort(key=lambda miss: miss[2])
+
+    queued = {
+        (user_id, fingerprint)
+        for user_id, fingerprint in db.query(ReviewItem.user_id, ReviewItem.fingerprint).filter(
+            ReviewItem.user_id.in_({miss[0] for miss in misses})
+        )
+    } if misses else set()
+
+    created = {}
+    for user_id, topic, when, question in misses:
+        key = (user_id, question_fingerprint(question.question_text))
+        if key in queued:
+            continue
+        item = created.get(key)
+        if item is None:
+            item = created[key] = ReviewItem(
+                user_id=user_id,
+                fingerprint=key[1],
+                topic=normalize(topic),
+                question_text=question.question_text,
+                options=question.options,
+                correct_answer=question.correct_answer,
+                difficulty=question.difficulty,
+                concept=question.concept,
+                explanation=question.explanation,
+                ease_factor=2.5,
+                interval_days=0,
+                repetitions=0,
+                lapses=0
+            )
+            db.add(item)
+        sm2(item, QUALITY_MISSED, when)
+        item.created_at = when
+
+    db.bulk_update_mappings(ReviewItem, [
+        {"id": item_id, "topic": normalize(topic)}
+        for item_id, topic in db.query(ReviewItem.id, ReviewItem.topic)
+        if topic != normalize(topic)
+    ])
+    return len(created)
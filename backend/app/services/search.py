@@ -0,0 +1,163 @@
+import re
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from ..database import engine
+
+# Highlight markers around matched words in snippets
+MARK_START = "<mark>"
+MARK_END = "</mark>"
+
+# Topic matches rank above matches deep in an explanation
+TOPIC_WEIGHT = 4.0
+EXPLANATION_WEIGHT = 1.0
+
+# ─── SQLite: FTS5 table kept in sync by triggers ────────────────────
+# Stores its own copy of the text and the session id. learning_sessions
+# has a TEXT primary key, so an external-content index would have to key
+# on its implicit rowid, which VACUUM is free to renumber.
+
+SQLITE_SETUP = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS learning_sessions_fts USING fts5(
+        session_id UNINDEXED, topic, explanation,
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS learning_sessions_fts_insert AFTER INSERT ON learning_sessions BEGIN
+        INSERT INTO learning_sessions_fts(session_id, topic, explanation)
+        VALUES (new.id, new.topic, new.explanation);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS learning_sessions_fts_delete AFTER DELETE ON learning_sessions BEGIN
+        DELETE FROM learning_sessions_fts WHERE session_id = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS learning_sessions_fts_update
+    AFTER UPDATE OF id, topic, explanation ON learning_sessions BEGIN
+        UPDATE learning_sessions_fts
+        SET session_id = new.id, topic = new.topic, explanation = new.explanation
+        WHERE session_id = old.id;
+    END
+    """,
+]
+
+SQLITE_BACKFILL = """
+    INSERT INTO learning_sessions_fts(session_id, topic, explanation)
+    SELECT id, topic, explanation FROM learning_sessions
+"""
+
+# Indexes created before the index stored session ids
+SQLITE_DROP_ROWID_INDEX = [
+    "DROP TRIGGER IF EXISTS learning_sessions_fts_insert",
+    "DROP TRIGGER IF EXISTS learning_sessions_fts_delete",
+    "DROP TRIGGER IF EXISTS learning_sessions_fts_update",
+    "DROP TABLE IF EXISTS learning_sessions_fts",
+]
+
+# Columns: 0 session_id (unindexed), 1 topic, 2 explanation
+SQLITE_SEARCH = f"""
+    SELECT s.id, s.topic, s.level, s.created_at,
+           snippet(learning_sessions_fts, 2, '{MARK_START}', '{MARK_END}', '…', 24) AS snippet,
+           -bm25(learning_sessions_fts, 0.0, {TOPIC_WEIGHT}, {EXPLANATION_WEIGHT}) AS rank
+    FROM learning_sessions_fts
+    JOIN learning_sessions s ON s.id = learning_sessions_fts.session_id
+    WHERE learning_sessions_fts MATCH :query AND s.user_id = :user_id
+    ORDER BY rank DESC
+    LIMIT :limit
+"""
+
+# ─── Postgres: generated tsvector column with a GIN index ────────────
+
+POSTGRES_SETUP = [
+    """
+    ALTER TABLE learning_sessions ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(topic, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(explanation, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_learning_sessions_search ON learning_sessions USING GIN (search_vector)",
+]
+
+# Rank and limit first, so headlines are only built for the rows returned
+POSTGRES_SEARCH = f"""
+    SELECT hit.id, hit.topic, hit.level, hit.created_at,
+           ts_headline('english', coalesce(s.explanation, ''), hit.query,
+                       'StartSel={MARK_START}, StopSel={MARK_END}, MaxWords=30, MinWords=12') AS snippet,
+           hit.rank
+    FROM (
+        SELECT id, topic, level, created_at, query,
+               ts_rank(search_vector, query) AS rank
+        FROM learning_sessions, websearch_to_tsquery('english', :query) AS query
+        WHERE user_id = :user_id AND search_vector @@ query
+        ORDER BY rank DESC
+        LIMIT :limit
+    ) AS hit
+    JOIN learning_sessions s ON s.id = hit.id
+    ORDER BY hit.rank DESC
+"""
+
+
+def _dialect() -> str:
+    return engine.dialect.name
+
+
+def ensure_search_index():
+    """
+    Create the full-text index if it is missing (safe to run on every
+    start). On SQLite, rows written before the index existed are indexed
+    once here, as is everything when replacing an older rowid-keyed
+    index; after that the triggers keep it up to date.
+    """
+    dialect = _dialect()
+    with engine.begin() as conn:
+        if dialect == "sqlite":
+            existing = conn.execute(text(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'learning_sessions_fts'"
+            )).scalar()
+            if existing and "session_id" not in existing:
+                for statement in SQLITE_DROP_ROWID_INDEX:
+                    conn.execute(text(statement))
+                existing = None
+            for statement in SQLITE_SETUP:
+                conn.execute(text(statement))
+            if not existing:
+                conn.execute(text(SQLITE_BACKFILL))
+        elif dialect == "postgresql":
+            for statement in POSTGRES_SETUP:
+                conn.execute(text(statement))
+
+
+def _fts5_query(query: str) -> str:
+    """
+    Turn free text into a safe FTS5 query: every word must match, the
+    last one as a prefix (so results show up while typing).
+    """
+    words = re.findall(r"\w+", query)
+    if not words:
+        return ""
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search_sessions(db: Session, user_id: str, query: str, limit: int = 10) -> list:
+    """
+    A student's learning sessions matching `query`, best match first, as
+    rows of (id, topic, level, created_at, snippet, rank), where a higher
+    rank is a better match. Only the snippet of each explanation leaves
+    the database.
+    """
+    if _dialect() == "postgresql":
+        sql, params = POSTGRES_SEARCH, {"query": query}
+    else:
+        match = _fts5_query(query)
+        if not match:
+            return []
+        sql, params = SQLITE_SEARCH, {"query": match}
+
+    params.update(user_id=user_id, limit=limit)
+    return db.execute(text(sql), params).all()
@@ -0,0 +1,261 @@
+from abc import ABC, abstractmethod
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from ..config import settings
+
+
+class SharedState(ABC):
+    """
+    Small key-value store for state every worker process must agree on:
+    LLM quota counters, cached greeting pools, in-flight request claims
+    and once-per-night locks.
+
+    Values are anything JSON-serializable. `ttl` is in seconds; expired
+    keys read as missing.
+
+    The plain methods block on the backend (a SQLite lock held by another
+    worker, a Redis round-trip). Async code uses the `a`-prefixed
+    versions, which run them in a thread.
+    """
+
+    # False for backends that never wait on I/O: their async versions run inline
+    blocking = True
+
+    @abstractmethod
+    def get(self, key: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    def set(self, key: str, value, ttl: float = None):
+        raise NotImplementedError
+
+    @abstractmethod
+    def add(self, key: str, value, ttl: float = None) -> bool:
+        """Set `key` only if it is missing. True if this call set it."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def incr(self, key: str, amount: int = 1, ttl: float = None) -> int:
+        """Add to an integer value (missing counts as 0) and return the result."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    # ─── From async code ─────────────────────────────────────────
+
+    async def run(self, method, *args, **kwargs):
+        """
+        Call `method` (a store method, or a function making several store
+        calls) from async code, in a thread if this backend can block.
+        """
+        if not self.blocking:
+            return method(*args, **kwargs)
+        return await asyncio.to_thread(method, *args, **kwargs)
+
+    async def aget(self, key: str):
+        return await self.run(self.get, key)
+
+    async def aset(self, key: str, value, ttl: float = None):
+        return await self.run(self.set, key, value, ttl)
+
+    async def aadd(self, key: str, value, ttl: float = None) -> bool:
+        return await self.run(self.add, key, value, ttl)
+
+    async def aincr(self, key: str, amount: int = 1, ttl: float = None) -> int:
+        return await self.run(self.incr, key, amount, ttl)
+
+    async def adelete(self, key: str):
+        return await self.run(self.delete, key)
+
+
+class MemoryState(SharedState):
+    """In-process store: only consistent within a single worker process."""
+
+    blocking = False
+
+    def __init__(self):
+        self._data = {}    # key -> (value, expires_at or None)
+        self._lock = threading.Lock()
+
+    def _live(self, key: str):
+        entry = self._data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.time():
+            del self._data[key]
+            return None
+        return entry
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._live(key)
+            return entry[0] if entry else None
+
+    def set(self, key: str, value, ttl: float = None):
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl if ttl else None)
+
+    def add(self, key: str, value, ttl: float = None) -> bool:
+        with self._lock:
+            if self._live(key) is not None:
+                return False
+            self._data[key] = (value, time.time() + ttl if ttl else None)
+            return True
+
+    def incr(self, key: str, amount: int = 1, ttl: float = None) -> int:
+        with self._lock:
+            entry = self._live(key)
+            value = (int(entry[0]) if entry else 0) + amount
+            expires_at = entry[1] if entry else (time.time() + ttl if ttl else None)
+            self._data[key] = (value, expires_at)
+            return value
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class SQLiteState(SharedState):
+    """
+    Store in a local SQLite file (WAL mode), shared by all worker
+    processes on one machine. Connections are opened lazily per thread
+    and per process, so it is safe to create before workers fork.
+
+    A write waits up to 5 s for another process's lock, so async code
+    must go through the `a`-prefixed methods.
+    """
+
+    # Expired rows are deleted every this many writes
+    PURGE_EVERY = 1000
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS shared_state "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _wrote(self, conn: sqlite3.Connection):
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            conn.execute("DELETE FROM shared_state WHERE expires_at <= ?", (time.time(),))
+
+    def get(self, key: str):
+        row = self._conn().execute(
+            "SELECT value FROM shared_state WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, value, ttl: float = None):
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO shared_state (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value), time.time() + ttl if ttl else None)
+        )
+        self._wrote(conn)
+
+    def add(self, key: str, value, ttl: float = None) -> bool:
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM shared_state WHERE key = ? AND expires_at <= ?", (key, now))
+            added = conn.execute(
+                "INSERT OR IGNORE INTO shared_state (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), now + ttl if ttl else None)
+            ).rowcount == 1
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._wrote(conn)
+        return added
+
+    def incr(self, key: str, amount: int = 1, ttl: float = None) -> int:
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT value, expires_at FROM shared_state WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (key, now)
+            ).fetchone()
+            value = (int(json.loads(row[0])) if row else 0) + amount
+            expires_at = row[1] if row else (now + ttl if ttl else None)
+            conn.execute(
+                "INSERT OR REPLACE INTO shared_state (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._wrote(conn)
+        return value
+
+    def delete(self, key: str):
+        self._conn().execute("DELETE FROM shared_state WHERE key = ?", (key,))
+
+
+class RedisState(SharedState):
+    """
+    Store in Redis, for workers spread over several machines.
+    Needs the `redis` package, which is only imported when this is used.
+    """
+
+    def __init__(self, url: str):
+        import redis
+        self._redis = redis.Redis.from_url(url)
+
+    def get(self, key: str):
+        value = self._redis.get(key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key: str, value, ttl: float = None):
+        self._redis.set(key, json.dumps(value), px=int(ttl * 1000) if ttl else None)
+
+    def add(self, key: str, value, ttl: float = None) -> bool:
+        return bool(self._redis.set(key, json.dumps(value), nx=True, px=int(ttl * 1000) if ttl else None))
+
+    def incr(self, key: str, amount: int = 1, ttl: float = None) -> int:
+        pipe = self._redis.pipeline()
+        pipe.incrby(key, amount)
+        if ttl:
+            # Only sets an expiry on a new counter, like the other backends
+            pipe.expire(key, int(ttl), nx=True)
+        return int(pipe.execute()[0])
+
+    def delete(self, key: str):
+        self._redis.delete(key)
+
+
+def create_shared_state(url: str) -> SharedState:
+    """memory://, sqlite:///path/to/file.db or redis://host:port/db"""
+    if url.startswith("memory://"):
+        return MemoryState()
+    if url.startswith("sqlite:///"):
+        return SQLiteState(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://")):
+        return RedisState(url)
+    raise ValueError(f"Unsupported SHARED_STATE_URL: {url}")
+
+
+# Singleton instance
+shared_state = create_shared_state(settings.SHARED_STATE_URL)
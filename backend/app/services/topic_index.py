@@ -0,0 +1,134 @@
+import threading
+from sqlalchemy import func
+from ..database import SessionLocal
+from ..events import on_insert_committed
+from ..models.session import LearningSession
+from ..models.quiz import QuizSession
+from .mastery import normalize
+
+# Most popular topics kept at every trie node
+TOP_K = 10
+
+
+class _Node:
+    __slots__ = ("children", "top", "key")
+
+    def __init__(self):
+        self.children = {}
+        self.top = []      # Keys of the most popular topics below this node
+        self.key = None    # Set if a topic ends here
+
+
+class TopicIndex:
+    """
+    In-memory prefix trie over every topic students have studied or been
+    quizzed on, for autocomplete.
+
+    Each node keeps its TOP_K most popular topics, so a prefix lookup is a
+    walk down the query's characters. When the prefix matches too little,
+    a bounded edit-distance walk finds close spellings ("pythn" ->
+    "python"). Counts grow as new sessions are committed.
+    """
+
+    def __init__(self):
+        self._root = _Node()
+        self._counts = {}     # normalized topic -> times used
+        self._display = {}    # normalized topic -> spelling shown to users
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Build the index from the stored learning and quiz sessions."""
+        db = SessionLocal()
+        try:
+            rows = db.query(LearningSession.topic, func.count()).group_by(LearningSession.topic).all()
+            rows += db.query(QuizSession.topic, func.count()).group_by(QuizSession.topic).all()
+        finally:
+            db.close()
+        for topic, count in rows:
+            self.add(topic, count)
+        print(f"Topic index loaded {len(self._counts)} topics")
+
+    def add(self, topic: str, count: int = 1):
+        """Count `count` more uses of a topic."""
+        key = normalize(topic)
+        if not key:
+            return
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + count
+            self._display.setdefault(key, " ".join(topic.split()))
+
+            node = self._root
+            self._promote(node, key)
+            for char in key:
+                node = node.children.setdefault(char, _Node())
+                self._promote(node, key)
+            node.key = key
+
+    def _promote(self, node: _Node, key: str):
+        top = node.top
+        if key not in top:
+            if len(top) >= TOP_K and self._counts[top[-1]] >= self._counts[key]:
+                return
+            top.append(key)
+        top.sort(key=lambda k: -self._counts[k])
+        del top[TOP_K:]
+
+    def suggest(self, query: str, limit: int = 8) -> list:
+        """
+        Up to `limit` (display topic, count) pairs: topics starting with
+        the query by popularity, then close misspellings.
+        """
+        key = normalize(query)
+        limit = min(limit, TOP_K)
+
+        # add() reorders node.top lists and grows children dicts from
+        # other threads, so read under the same lock
+        with self._lock:
+            node = self._root
+            for char in key:
+                node = node.children.get(char)
+                if node is None:
+                    break
+            found = list(node.top) if node is not None else []
+
+            if len(found) < limit and len(key) >= 3:
+                max_edits = 1 if len(key) <= 5 else 2
+                fuzzy = []
+                row = list(range(len(key) + 1))
+                for char, child in self._root.children.items():
+                    self._fuzzy(child, char, key, row, max_edits, fuzzy)
+                for _, matched in sorted(fuzzy, key=lambda m: m[0]):
+                    for candidate in matched:
+                        if candidate not in found:
+                            found.append(candidate)
+
+            return [(self._display[k], self._counts[k]) for k in found[:limit]]
+
+    def _fuzzy(self, node: _Node, char: str, query: str, previous: list, max_edits: int, out: list):
+        """
+        Levenshtein walk: `previous` is the edit-distance row for the
+        parent's prefix. A node whose prefix is within `max_edits` of the
+        whole query contributes its popular topics; branches that can no
+        longer get that close are pruned. Called with the lock held.
+        """
+        row = [previous[0] + 1]
+        for i, query_char in enumerate(query, start=1):
+            row.append(min(
+                row[i - 1] + 1,
+                previous[i] + 1,
+                previous[i - 1] + (query_char != char)
+            ))
+
+        if row[-1] <= max_edits:
+            out.append((row[-1], node.top))
+            return
+        if min(row) <= max_edits:
+            for next_char, child in node.children.items():
+                self._fuzzy(child, next_char, query, row, max_edits, out)
+
+
+# Singleton instance
+topic_index = TopicIndex()
+
+on_insert_committed(LearningSession, lambda values: topic_index.add(values["topic"]))
+on_insert_committed(QuizSession, lambda values: topic_index.add(values["topic"]))
@@ -0,0 +1,213 @@
+import asyncio
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from sqlalchemy.sql import func
+from ..config import settings
+from ..database import SessionLocal
+from ..models.usage import LLMUsage
+from .shared_state import shared_state
+
+# Daily token counters outlive their day a little, then expire
+COUNTER_TTL_SECONDS = 2 * 24 * 60 * 60
+
+# (endpoint, username) the current LLM calls are made for
+_caller: ContextVar = ContextVar("llm_caller", default=(None, None))
+
+
+class BudgetExceededError(Exception):
+    """Raised before an LLM call when the user has spent their daily budget."""
+
+
+def bind_caller(endpoint: str, username: str = None):
+    """
+    Attribute LLM calls made from the current request (or task) to a
+    user and endpoint. Tasks created afterwards inherit the binding.
+    """
+    _caller.set((endpoint, username))
+
+
+def current_caller() -> tuple:
+    return _caller.get()
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) for when the provider reports none."""
+    return max(1, len(text) // 4) if text else 0
+
+
+class UsageLedger:
+    """
+    Append-only accounting of every LLM call.
+
+    record() is non-blocking: entries go onto a queue and a background
+    writer inserts them in batches of USAGE_BATCH_SIZE (or every
+    USAGE_FLUSH_SECONDS), so the ledger adds no DB round-trip to requests.
+
+    Also keeps per-user token totals for the current day in the shared
+    state store (so every worker process sees the same totals), and the
+    daily budget can be checked before a call without querying the ledger.
+    The writer adds each batch to those totals, off the event loop, so
+    they trail the calls by at most USAGE_FLUSH_SECONDS.
+    """
+
+    def __init__(self, batch_size: int, flush_seconds: float, daily_token_budget: int):
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.daily_token_budget = daily_token_budget
+        self._queue = None
+        self._writer = None
+
+    # ─── Budgets ─────────────────────────────────────────────────
+
+    @staticmethod
+    def _counter_key(username: str, at: datetime = None) -> str:
+        day = (at or datetime.now(timezone.utc)).date().isoformat()
+        return f"tokens:{day}:{username}"
+
+    def tokens_used_today(self, username: str) -> int:
+        """Tokens spent by a user today (loaded from the ledger once per day)."""
+        key = self._counter_key(username)
+        spent = shared_state.get(key)
+        if spent is None:
+            day_start = datetime.combine(datetime.now(timezone.utc).date(), datetime.min.time(), tzinfo=timezone.utc)
+            db = SessionLocal()
+            try:
+                spent = db.query(func.coalesce(func.sum(LLMUsage.total_tokens), 0)).filter(
+                    LLMUsage.username == username,
+                    LLMUsage.created_at >= day_start
+                ).scalar()
+            finally:
+                db.close()
+            # From here on record() keeps the shared total up to date. If
+            # another worker got there first, its counter wins.
+            shared_state.add(key, int(spent), ttl=COUNTER_TTL_SECONDS)
+            spent = shared_state.get(key)
+        return int(spent or 0)
+
+    async def check_budget(self, username: str):
+        """
+        Raise BudgetExceededError if the user has no tokens left today.
+
+        Usually one shared_state read; the first check of the day loads
+        the total from the ledger in a thread, off the event loop.
+        """
+        if self.daily_token_budget <= 0 or not username:
+            return
+        used = await shared_state.aget(self._counter_key(username))
+        if used is None:
+            used = await asyncio.to_thread(self.tokens_used_today, username)
+        if int(used) >= self.daily_token_budget:
+            raise BudgetExceededError(
+                f"Daily AI budget of {self.daily_token_budget} tokens used up "
+                f"for '{username}'. Try again tomorrow!"
+            )
+
+    # ─── Recording ───────────────────────────────────────────────
+
+    def record(
+        self,
+        method: str,
+        model: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        latency_ms: float,
+        success: bool = True
+    ):
+        """Queue one ledger entry for the current caller."""
+        endpoint, username = current_caller()
+        total_tokens = prompt_tokens + completion_tokens
+
+        entry = {
+            "created_at": datetime.now(timezone.utc),
+            "username": username,
+            "endpoint": endpoint,
+            "method": method,
+            "model": model,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": total_tokens,
+            "latency_ms": latency_ms,
+            "success": success
+        }
+
+        self._ensure_writer()
+        if self._queue is not None:
+            self._queue.put_nowait(entry)
+        else:
+            # No event loop (scripts): write straight away
+            self._write([entry])
+
+    def _ensure_writer(self):
+        if self._writer is not None and not self._writer.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        self._writer = loop.create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            entry = await self._queue.get()
+            if entry is None:
+                break
+            batch = [entry]
+            deadline = loop.time() + self.flush_seconds
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if entry is None:
+                    stopping = True
+                    break
+                batch.append(entry)
+            await asyncio.to_thread(self._write, batch)
+
+    def _count_tokens(self, batch: list):
+        """Add a batch's tokens to the daily counters of users whose counter is loaded."""
+        totals = {}
+        for entry in batch:
+            if entry["username"]:
+                key = self._counter_key(entry["username"], entry["created_at"])
+                totals[key] = totals.get(key, 0) + entry["total_tokens"]
+        for key, tokens in totals.items():
+            if shared_state.get(key) is not None:
+                shared_state.incr(key, tokens)
+
+    def _write(self, batch: list):
+        self._count_tokens(batch)
+        db = SessionLocal()
+        try:
+            db.bulk_insert_mappings(LLMUsage, batch)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Failed to write {len(batch)} usage ledger entries: {e}")
+        finally:
+            db.close()
+
+    async def start(self):
+        self._ensure_writer()
+
+    async def stop(self):
+        """Flush whatever is still queued and stop the writer."""
+        if self._writer is not None and not self._writer.done():
+            self._queue.put_nowait(None)
+            await self._writer
+        self._writer = None
+
+
+# Singleton instance
+usage_ledger = UsageLedger(
+    batch_size=settings.USAGE_BATCH_SIZE,
+    flush_seconds=settings.USAGE_FLUSH_SECONDS,
+    daily_token_budget=settings.LLM_DAILY_TOKEN_BUDGET
+)
@@ -0,0 +1,108 @@
+import asyncio
+import hashlib
+import time
+import uuid
+from email.utils import formatdate, parsedate_to_datetime
+from fastapi import Request, Response
+from .shared_state import shared_state
+
+# A user with no writes for this long gets a fresh version (one extra full response)
+VERSION_TTL_SECONDS = 30 * 24 * 60 * 60
+
+# Clients must revalidate every time, but may keep the body to reuse on a 304
+CACHE_CONTROL = "private, no-cache"
+
+
+class Validators:
+    """ETag and Last-Modified for one representation of a user's data."""
+
+    def __init__(self, etag: str, last_modified: int):
+        self.etag = etag
+        self.last_modified = last_modified
+
+    @property
+    def headers(self) -> dict:
+        return {
+            "ETag": self.etag,
+            "Last-Modified": formatdate(self.last_modified, usegmt=True),
+            "Cache-Control": CACHE_CONTROL
+        }
+
+    def matches(self, request: Request) -> bool:
+        """True if the client's cached copy is still current (answer with 304)."""
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            # Weak comparison: a gzip and a brotli copy of the same body both match
+            wanted = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            return "*" in wanted or self.etag.removeprefix("W/") in wanted
+
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return self.last_modified <= since
+        return False
+
+    def not_modified(self) -> Response:
+        return Response(status_code=304, headers=self.headers)
+
+    def apply(self, response: Response) -> Response:
+        response.headers.update(self.headers)
+        return response
+
+
+class UserVersions:
+    """
+    Per-user version of everything the profile and history endpoints
+    show, kept in shared_state so every worker agrees.
+
+    Write paths call bump() after they commit. Reads take the version
+    before querying, so a write that lands mid-request only costs the
+    client one extra full response, never a stale 304.
+    """
+
+    KEY = "user_version:{user_id}"
+
+    def _new(self, previous_modified: int = 0) -> dict:
+        # Whole seconds (HTTP dates have no fractions) that always move forward
+        return {"token": uuid.uuid4().hex, "modified": max(int(time.time()), previous_modified + 1)}
+
+    def current(self, user_id: str) -> dict:
+        key = self.KEY.format(user_id=user_id)
+        version = shared_state.get(key)
+        if version is None:
+            # Unknown (first read, or expired): start from a fresh token so
+            # an ETag from before can never match
+            shared_state.add(key, self._new(), ttl=VERSION_TTL_SECONDS)
+            version = shared_state.get(key)
+        return version
+
+    def bump(self, user_id: str):
+        """Invalidate every cached response for this user."""
+        key = self.KEY.format(user_id=user_id)
+        previous = shared_state.get(key) or {"modified": 0}
+        shared_state.set(key, self._new(previous["modified"]), ttl=VERSION_TTL_SECONDS)
+
+    def validators(self, user_id: str, variant: str) -> Validators:
+        """
+        Validators for one endpoint's view of the user's data. `variant`
+        names the endpoint and any query parameters that change the body.
+        """
+        version = self.current(user_id)
+        digest = hashlib.sha1(f"{version['token']}:{variant}".encode()).hexdigest()[:20]
+        return Validators(f'W/"{digest}"', version["modified"])
+
+    # Async routes call these, so the shared_state reads and writes happen
+    # in a thread instead of on the event loop
+
+    async def abump(self, user_id: str):
+        await asyncio.to_thread(self.bump, user_id)
+
+    async def avalidators(self, user_id: str, variant: str) -> Validators:
+        return await asyncio.to_thread(self.validators, user_id, variant)
+
+
+# Singleton instance
+user_versions = UserVersions()
@@ -0,0 +1,111 @@
+"""
+Benchmark: batch grading vs one /api/quiz/submit request per quiz.
+
+Seeds a throwaway SQLite database with N unsubmitted quizzes, grades them
+once through the per-request path (grade_quiz, one DB session and commit
+per quiz, like N separate requests) and once through grade_batch, and
+prints both timings.
+
+Run from the backend directory:
+    python -m benchmarks.bench_batch_grading --submissions 500
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+import uuid
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench_grading.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ.setdefault("GROQ_API_KEY", "benchmark-not-used")
+
+from app.database import Base, engine, SessionLocal  # noqa: E402
+from app.models import User, QuizSession, QuizQuestion  # noqa: E402
+from app.schemas.quiz import QuizAnswerSubmission  # noqa: E402
+from app.routes.quiz import grade_quiz  # noqa: E402
+from app.services.grading import grade_batch  # noqa: E402
+
+QUESTIONS_PER_QUIZ = 5
+DIFFICULTIES = ["easy", "medium", "hard"]
+LETTERS = ["A", "B", "C", "D"]
+
+
+def seed(count: int) -> list:
+    """Create `count` open quizzes and return a random submission for each."""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    rng = random.Random(42)
+    users, quizzes, questions, submissions = [], [], [], []
+    for i in range(count):
+        user_id, quiz_id = str(uuid.uuid4()), str(uuid.uuid4())
+        users.append({"id": user_id, "username": f"student{i}", "email": f"student{i}@example.com", "is_active": True})
+        quizzes.append({
+            "id": quiz_id, "user_id": user_id, "topic": "arrays", "level": "beginner",
+            "total_questions": QUESTIONS_PER_QUIZ, "completed": False
+        })
+        answers = {}
+        for n in range(1, QUESTIONS_PER_QUIZ + 1):
+            questions.append({
+                "id": str(uuid.uuid4()), "quiz_session_id": quiz_id, "question_number": n,
+                "question_text": f"Question {n} about arrays?",
+                "options": json.dumps({letter: f"Option {letter}" for letter in LETTERS}),
+                "correct_answer": rng.choice(LETTERS), "difficulty": rng.choice(DIFFICULTIES),
+                "concept": "arrays", "explanation": "Because arrays are contiguous."
+            })
+            answers[str(n - 1)] = rng.choice(LETTERS)
+        submissions.append(QuizAnswerSubmission(quiz_session_id=quiz_id, answers=answers, time_taken=120))
+
+    db = SessionLocal()
+    db.bulk_insert_mappings(User, users)
+    db.bulk_insert_mappings(QuizSession, quizzes)
+    db.bulk_insert_mappings(QuizQuestion, questions)
+    db.commit()
+    db.close()
+    return submissions
+
+
+def per_request(submissions: list) -> float:
+    async def run():
+        for submission in submissions:
+            db = SessionLocal()
+            try:
+                await grade_quiz(submission, db)
+            finally:
+                db.close()
+
+    started = time.perf_counter()
+    asyncio.run(run())
+    return time.perf_counter() - started
+
+
+def batched(submissions: list) -> float:
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        results, errors = grade_batch(db, submissions)
+        assert not errors, errors
+    finally:
+        db.close()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--submissions", type=int, default=500)
+    args = parser.parse_args()
+
+    single = per_request(seed(args.submissions))
+    batch = batched(seed(args.submissions))
+
+    print(f"Submissions:        {args.submissions} x {QUESTIONS_PER_QUIZ} questions")
+    print(f"Per-request path:   {single * 1000:8.1f} ms  ({single / args.submissions * 1000:.2f} ms/quiz)")
+    print(f"Batch path:         {batch * 1000:8.1f} ms  ({batch / args.submissions * 1000:.2f} ms/quiz)")
+    print(f"Speed-up:           {single / batch:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark and regression check over recorded LLM replies (cassettes).
+
+Record a corpus once against the real model (or the fake backend):
+    LLM_CASSETTE_MODE=record uvicorn app.main:app
+    ...use the app, or run benchmarks.load_test with the same setting...
+
+Then, offline:
+    python -m benchmarks.bench_replay --dir ./cassettes --repeat 200
+
+For every recorded reply of a JSON-returning method (generate_quiz,
+generate_lesson, generate_greeting_templates) this runs the same parsing
+AITutorService does (code-fence cleanup + json.loads) and checks the
+result has the fields the routes rely on. It prints per-method parse
+times and exits with status 1 if any recorded reply no longer parses, so
+a change to _parse_json can be checked against production-shaped output.
+
+To replay whole requests instead, run the app with
+LLM_CASSETTE_MODE=replay and LLM_CASSETTE_TIME_SCALE=0 (instant) or 1
+(recorded timing).
+"""
+import argparse
+import glob
+import json
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("GROQ_API_KEY", "benchmark-not-used")
+os.environ.setdefault("SHARED_STATE_URL", "memory://")
+
+# Methods whose replies are parsed as JSON, and the name _parse_json reports
+JSON_METHODS = {"generate_quiz": "quiz", "generate_lesson": "lesson", "generate_greeting_templates": "response"}
+QUIZ_FIELDS = {"question_text", "options", "correct_answer"}
+
+
+def check_quiz(questions) -> str:
+    if not isinstance(questions, list) or not questions:
+        return "no questions"
+    for q in questions:
+        missing = QUIZ_FIELDS - set(q)
+        if missing:
+            return f"question missing {sorted(missing)}"
+    return ""
+
+
+def check(method: str, data: dict) -> str:
+    """Problem with a parsed reply, or '' if the routes could use it."""
+    if method == "generate_quiz":
+        return check_quiz(data.get("questions"))
+    if method == "generate_lesson":
+        if not data.get("explanation"):
+            return "no explanation"
+        return check_quiz(data.get("quiz"))
+    if method == "generate_greeting_templates":
+        return "" if data.get("greetings") else "no greetings"
+    return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", default="./cassettes", help="cassette directory (LLM_CASSETTE_DIR)")
+    parser.add_argument("--repeat", type=int, default=200, help="parses per cassette when timing")
+    args = parser.parse_args()
+
+    from app.services.ai_service import AITutorService
+
+    failures = []
+    print(f"{'method':<30} {'replies':>8} {'mean µs':>10} {'p95 µs':>10} {'KB/reply':>9}")
+    for method, what in JSON_METHODS.items():
+        paths = sorted(glob.glob(os.path.join(args.dir, method, "*.json")))
+        if not paths:
+            continue
+        texts = []
+        for path in paths:
+            with open(path) as f:
+                texts.append((path, json.load(f)["text"]))
+
+        timings = []
+        for path, text in texts:
+            try:
+                problem = check(method, AITutorService._parse_json(text, what=what))
+            except Exception as e:
+                problem = str(e)
+            if problem:
+                failures.append((path, problem))
+                continue
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                AITutorService._parse_json(text, what=what)
+            timings.append((time.perf_counter() - started) / args.repeat * 1e6)
+
+        size_kb = statistics.mean(len(t) for _, t in texts) / 1024
+        if timings:
+            p95 = sorted(timings)[min(len(timings) - 1, int(len(timings) * 0.95))]
+            print(f"{method:<30} {len(texts):>8} {statistics.mean(timings):>10.1f} {p95:>10.1f} {size_kb:>9.1f}")
+        else:
+            print(f"{method:<30} {len(texts):>8} {'-':>10} {'-':>10} {size_kb:>9.1f}")
+
+    if failures:
+        print(f"\n{len(failures)} recorded replies failed:")
+        for path, problem in failures:
+            print(f"  {path}: {problem}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Benchmark: history list serialization, previous path vs orjson row path.
+
+Seeds a throwaway SQLite database with one student who has many finished
+quizzes and learning sessions, then times building and encoding the
+response body both ways:
+
+- before: ORM objects, json.loads of every stored options string,
+          jsonable_encoder and JSONResponse (quiz history), or
+          LearningSessionResponse.model_validate per row plus FastAPI's
+          response_model serialization (learning history)
+- after:  app.services.history_json (row tuples, orjson, stored options
+          embedded as-is)
+
+Both bodies are decoded and compared, so the benchmark also checks the
+fast path returns the same JSON.
+
+Run from the backend directory:
+    python -m benchmarks.bench_serialization --quizzes 50 200 500 --questions 10
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench_serialization.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["SHARED_STATE_URL"] = "memory://"
+os.environ.setdefault("GROQ_API_KEY", "benchmark-not-used")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+from typing import List  # noqa: E402
+import orjson  # noqa: E402
+from app.database import Base, engine, SessionLocal  # noqa: E402
+from app.models import User, QuizSession, QuizQuestion, LearningSession  # noqa: E402
+from app.schemas.profile import LearningSessionResponse  # noqa: E402
+from app.services.quiz_store import answered_questions  # noqa: E402
+from app.services.history_json import quiz_history, learning_history  # noqa: E402
+
+LETTERS = ["A", "B", "C", "D"]
+DIFFICULTIES = ["easy", "medium", "hard"]
+ROUNDS = 7
+
+SESSIONS_RESPONSE = TypeAdapter(List[LearningSessionResponse])
+
+
+def seed(quizzes: int, questions: int) -> str:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    rng = random.Random(42)
+    user_id = str(uuid.uuid4())
+    now = datetime.now(timezone.utc)
+    quiz_rows, question_rows, session_rows = [], [], []
+    for i in range(quizzes):
+        quiz_id = str(uuid.uuid4())
+        quiz_rows.append({
+            "id": quiz_id, "user_id": user_id, "topic": "arrays", "level": "beginner",
+            "total_questions": questions, "correct_answers": questions // 2, "score": 50.0,
+            "time_taken": 240, "completed": True, "completed_at": now - timedelta(minutes=i)
+        })
+        for n in range(1, questions + 1):
+            answer, correct = rng.choice(LETTERS), rng.choice(LETTERS)
+            question_rows.append({
+                "id": str(uuid.uuid4()), "quiz_session_id": quiz_id, "question_number": n,
+                "question_text": f"Question {n}: which statement about arrays is true?",
+                "options": json.dumps({letter: f"Option {letter}, a sentence-long answer" for letter in LETTERS}),
+                "correct_answer": correct, "user_answer": answer, "is_correct": answer == correct,
+                "difficulty": rng.choice(DIFFICULTIES), "concept": "arrays",
+                "explanation": "Arrays store elements contiguously, so indexing is constant time."
+            })
+        session_rows.append({
+            "id": str(uuid.uuid4()), "user_id": user_id, "topic": "arrays", "level": "beginner",
+            "learning_style": "visual", "explanation": "An explanation. " * 100,
+            "word_count": 200, "estimated_reading_time": 1, "created_at": now - timedelta(minutes=i)
+        })
+
+    db = SessionLocal()
+    db.add(User(id=user_id, username="historian", email="historian@example.com", is_active=True))
+    db.flush()
+    db.bulk_insert_mappings(QuizSession, quiz_rows)
+    db.bulk_insert_mappings(QuizQuestion, question_rows)
+    db.bulk_insert_mappings(LearningSession, session_rows)
+    db.commit()
+    db.close()
+    return user_id
+
+
+# ─── Previous implementations, kept for comparison ──────────────────
+
+def quiz_history_before(db, user_id: str, limit: int) -> bytes:
+    quizzes = db.query(QuizSession).filter(
+        QuizSession.user_id == user_id,
+        QuizSession.completed == True
+    ).order_by(QuizSession.completed_at.desc()).limit(limit).all()
+
+    content = {
+        "quizzes": [{
+            "id": str(q.id),
+            "topic": q.topic,
+            "score": q.score,
+            "correct_answers": q.correct_answers,
+            "total_questions": q.total_questions,
+            "time_taken": q.time_taken,
+            "completed_at": q.completed_at,
+            "questions": [
+                {
+                    "question_text": qq.question_text,
+                    "user_answer": user_answer,
+                    "correct_answer": qq.correct_answer,
+                    "is_correct": is_correct,
+                    "difficulty": qq.difficulty,
+                    "explanation": qq.explanation,
+                    "options": json.loads(qq.options)
+                }
+                for qq, user_answer, is_correct in answered_questions(q)
+            ]
+        } for q in quizzes]
+    }
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def learning_history_before(db, user_id: str, limit: int) -> bytes:
+    sessions = db.query(LearningSession).filter(
+        LearningSession.user_id == user_id
+    ).order_by(LearningSession.created_at.desc()).limit(limit).all()
+    validated = [LearningSessionResponse.model_validate(s) for s in sessions]
+    # What FastAPI does with response_model=List[LearningSessionResponse]
+    return JSONResponse(jsonable_encoder(SESSIONS_RESPONSE.dump_python(validated, mode="json"))).body
+
+
+def quiz_history_after(db, user_id: str, limit: int) -> bytes:
+    return orjson.dumps(quiz_history(db, user_id, limit))
+
+
+def learning_history_after(db, user_id: str, limit: int) -> bytes:
+    return orjson.dumps(learning_history(db, user_id, limit), option=orjson.OPT_UTC_Z)
+
+
+def timed(fn, user_id: str, limit: int) -> tuple:
+    """(median seconds, body) over ROUNDS runs, each in a fresh DB session"""
+    timings, body = [], None
+    for _ in range(ROUNDS):
+        db = SessionLocal()
+        try:
+            started = time.perf_counter()
+            body = fn(db, user_id, limit)
+            timings.append(time.perf_counter() - started)
+        finally:
+            db.close()
+    return statistics.median(timings), body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quizzes", type=int, nargs="+", default=[50, 200, 500])
+    parser.add_argument("--questions", type=int, default=10, help="questions per quiz")
+    args = parser.parse_args()
+
+    print(f"{'endpoint':<18} {'items':>6} {'KB':>8} {'before ms':>10} {'after ms':>10} {'speed-up':>9}")
+    for count in args.quizzes:
+        user_id = seed(count, args.questions)
+        for label, before, after in [
+            ("quiz history", quiz_history_before, quiz_history_after),
+            ("learning history", learning_history_before, learning_history_after),
+        ]:
+            before_s, before_body = timed(before, user_id, count)
+            after_s, after_body = timed(after, user_id, count)
+            assert json.loads(before_body) == json.loads(after_body), f"{label}: bodies differ"
+            print(f"{label:<18} {count:>6} {len(after_body) / 1024:>8.1f} "
+                  f"{before_s * 1000:>10.2f} {after_s * 1000:>10.2f} {before_s / after_s:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
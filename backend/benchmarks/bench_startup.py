@@ -0,0 +1,109 @@
+"""
+Benchmark: cold-start cost of the API.
+
+For each run, in fresh Python processes against a throwaway SQLite
+database:
+- import:         time to `import app.main`
+- import + LLM:   the same plus building the LLM client (the langchain
+                  imports that are now deferred to first use)
+- ready:          spawn `uvicorn app.main:app` until /health answers
+- first request:  latency of the first /api/learning/greeting and
+                  /api/learning/topics/suggest calls after that
+
+Server runs are repeated with WARMUP_ON_STARTUP off and on. No LLM call
+is made (greetings come from the built-in template pool).
+
+Run from the backend directory:
+    python -m benchmarks.bench_startup --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+TMP_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TMP_DIR, 'bench_startup.db')}"
+os.environ["SHARED_STATE_URL"] = "memory://"
+os.environ.setdefault("GROQ_API_KEY", "benchmark-not-used")
+
+PORT = 8766
+
+IMPORT_ONLY = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+IMPORT_AND_LLM = (
+    "import time; t = time.perf_counter(); import app.main; "
+    "from app.services.ai_service import ai_service; ai_service.warm(); print(time.perf_counter() - t)"
+)
+
+
+def time_import(code: str) -> float:
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True, env=os.environ
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def time_server(warmup: bool) -> tuple:
+    """(seconds until /health answers, first greeting ms, first suggest ms)"""
+    import httpx
+
+    env = dict(os.environ, WARMUP_ON_STARTUP=str(warmup).lower())
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(PORT), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{PORT}", timeout=30) as http:
+            while True:
+                try:
+                    if http.get("/health").status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    time.sleep(0.01)
+            ready = time.perf_counter() - started
+
+            t = time.perf_counter()
+            http.post("/api/learning/greeting", json={"student_name": "Ada", "level": "beginner"})
+            greeting_ms = (time.perf_counter() - t) * 1000
+
+            t = time.perf_counter()
+            http.get("/api/learning/topics/suggest", params={"q": "py"})
+            suggest_ms = (time.perf_counter() - t) * 1000
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    return ready, greeting_ms, suggest_ms
+
+
+def median(values: list) -> float:
+    return statistics.median(values)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    # Create the schema once so every run measures a warm database file
+    from app.schema import create_schema
+    create_schema()
+
+    imports = [time_import(IMPORT_ONLY) for _ in range(args.runs)]
+    imports_llm = [time_import(IMPORT_AND_LLM) for _ in range(args.runs)]
+    print(f"import app.main:          {median(imports) * 1000:8.1f} ms (median of {args.runs})")
+    print(f"import + LLM client:      {median(imports_llm) * 1000:8.1f} ms")
+
+    for warmup in (False, True):
+        runs = [time_server(warmup) for _ in range(args.runs)]
+        label = "on" if warmup else "off"
+        print(f"\nWARMUP_ON_STARTUP={label}")
+        print(f"  ready (/health):        {median([r[0] for r in runs]) * 1000:8.1f} ms")
+        print(f"  first greeting:         {median([r[1] for r in runs]):8.1f} ms")
+        print(f"  first topic suggest:    {median([r[2] for r in runs]):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""
+Benchmark: request throughput with 1, 2, 4 and 8 gunicorn workers.
+
+Seeds a throwaway SQLite database (users with quiz and learning history),
+then for each worker count starts `gunicorn -c gunicorn.conf.py` against
+it with a shared SQLite state store, drives read endpoints from several
+client processes for a fixed time, and prints requests per second.
+
+No LLM calls are made: the load is quiz history, profile and topic
+autocomplete requests.
+
+Run from the backend directory:
+    python -m benchmarks.bench_workers --seconds 10 --workers 1 2 4 8
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+TMP_DIR = tempfile.mkdtemp()
+DB_PATH = os.path.join(TMP_DIR, "bench_workers.db")
+STATE_PATH = os.path.join(TMP_DIR, "bench_workers_state.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ["SHARED_STATE_URL"] = f"sqlite:///{STATE_PATH}"
+os.environ.setdefault("GROQ_API_KEY", "benchmark-not-used")
+
+USERS = 50
+QUIZZES_PER_USER = 20
+QUESTIONS_PER_QUIZ = 5
+SESSIONS_PER_USER = 20
+TOPICS = ["arrays", "hash tables", "binary search", "recursion", "linked lists", "graphs", "dynamic programming"]
+LETTERS = ["A", "B", "C", "D"]
+PORT = 8765
+
+
+def seed():
+    from app.database import Base, engine, SessionLocal
+    from app.models import User, StudentProfile, LearningSession, QuizSession, QuizQuestion
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    rng = random.Random(42)
+    users, profiles, sessions, quizzes, questions = [], [], [], [], []
+    for i in range(USERS):
+        user_id = str(uuid.uuid4())
+        users.append({"id": user_id, "username": f"student{i}", "email": f"student{i}@example.com", "is_active": True})
+        profiles.append({
+            "id": str(uuid.uuid4()), "user_id": user_id, "proficiency_level": "beginner",
+            "learning_style": "visual", "preferred_topics": [], "total_sessions": str(SESSIONS_PER_USER)
+        })
+        for _ in range(SESSIONS_PER_USER):
+            sessions.append({
+                "id": str(uuid.uuid4()), "user_id": user_id, "topic": rng.choice(TOPICS),
+                "level": "beginner", "learning_style": "visual",
+                "explanation": "An explanation. " * 100, "word_count": 200, "estimated_reading_time": 1
+            })
+        for _ in range(QUIZZES_PER_USER):
+            quiz_id = str(uuid.uuid4())
+            quizzes.append({
+                "id": quiz_id, "user_id": user_id, "topic": rng.choice(TOPICS), "level": "beginner",
+                "total_questions": QUESTIONS_PER_QUIZ, "correct_answers": 3, "score": 60.0,
+                "completed": True
+            })
+            for n in range(1, QUESTIONS_PER_QUIZ + 1):
+                questions.append({
+                    "id": str(uuid.uuid4()), "quiz_session_id": quiz_id, "question_number": n,
+                    "question_text": f"Question {n}?",
+                    "options": json.dumps({letter: f"Option {letter}" for letter in LETTERS}),
+                    "correct_answer": rng.choice(LETTERS), "user_answer": rng.choice(LETTERS),
+                    "is_correct": rng.random() < 0.6, "difficulty": "medium",
+                    "concept": "basics", "explanation": "Because."
+                })
+
+    db = SessionLocal()
+    db.bulk_insert_mappings(User, users)
+    db.bulk_insert_mappings(StudentProfile, profiles)
+    db.bulk_insert_mappings(LearningSession, sessions)
+    db.bulk_insert_mappings(QuizSession, quizzes)
+    db.bulk_insert_mappings(QuizQuestion, questions)
+    db.commit()
+    db.close()
+    engine.dispose()
+
+
+def start_server(workers: int) -> subprocess.Popen:
+    env = dict(os.environ, PORT=str(PORT), WEB_CONCURRENCY=str(workers))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app.main:app"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True
+    )
+    import httpx
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{PORT}/health", timeout=1).status_code == 200:
+                return server
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    stop_server(server)
+    raise RuntimeError("Server did not start")
+
+
+def stop_server(server: subprocess.Popen):
+    os.killpg(server.pid, signal.SIGTERM)
+    server.wait(timeout=30)
+
+
+def client(seconds: float, concurrency: int, seed_value: int, results):
+    """One load-generating process: `concurrency` requests in flight until time is up."""
+    import asyncio
+    import httpx
+
+    rng = random.Random(seed_value)
+
+    def next_path():
+        roll = rng.random()
+        user = f"student{rng.randrange(USERS)}"
+        if roll < 0.5:
+            return f"/api/quiz/{user}/history"
+        if roll < 0.8:
+            return f"/api/profile/{user}"
+        return f"/api/learning/topics/suggest?q={rng.choice(TOPICS)[:3]}"
+
+    async def run():
+        done = errors = 0
+        deadline = time.perf_counter() + seconds
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORT}", timeout=30) as http:
+            async def loop():
+                nonlocal done, errors
+                while time.perf_counter() < deadline:
+                    response = await http.get(next_path())
+                    if response.status_code == 200:
+                        done += 1
+                    else:
+                        errors += 1
+            await asyncio.gather(*(loop() for _ in range(concurrency)))
+        results.put((done, errors))
+
+    asyncio.run(run())
+
+
+def measure(seconds: float, clients: int, concurrency: int) -> tuple:
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=client, args=(seconds, concurrency, i, results))
+        for i in range(clients)
+    ]
+    for p in processes:
+        p.start()
+    totals = [results.get() for _ in processes]
+    for p in processes:
+        p.join()
+    return sum(d for d, _ in totals), sum(e for _, e in totals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--clients", type=int, default=4, help="load-generating processes")
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight per client")
+    args = parser.parse_args()
+
+    seed()
+    print(f"Seeded {USERS} users, {USERS * QUIZZES_PER_USER} quizzes, {USERS * SESSIONS_PER_USER} sessions")
+    print(f"{'workers':>8} {'req/s':>10} {'errors':>8} {'speed-up':>9}")
+
+    baseline = None
+    for workers in args.workers:
+        server = start_server(workers)
+        try:
+            measure(1.0, args.clients, args.concurrency)   # warm-up
+            done, errors = measure(args.seconds, args.clients, args.concurrency)
+        finally:
+            stop_server(server)
+        rate = done / args.seconds
+        baseline = baseline or rate
+        print(f"{workers:>8} {rate:>10.1f} {errors:>8} {rate / baseline:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
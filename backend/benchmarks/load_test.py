@@ -0,0 +1,295 @@
+"""
+Load test: every API endpoint at increasing concurrency, fully offline.
+
+Starts `gunicorn -c gunicorn.conf.py` against a throwaway SQLite database
+with LLM_BACKEND=fake, so LLM-backed endpoints answer with realistic
+payloads after a simulated delay and no Groq quota is spent. Sets up one
+student per virtual user, then each virtual user repeats a full study
+session for a fixed time:
+
+    greeting, topic suggest, explain, practice, lesson, chat (start,
+    follow-up, read back), profile (read, update, history, search),
+    quiz (generate, poll job, read, submit), class assignment (create,
+    assign, open list, batch submit), mastery, review (read, submit),
+    quiz history, usage (today, summary, pregeneration report), the live
+    tutoring socket (one streamed explanation) and /health
+
+For each concurrency level it prints throughput and p50/p95/p99 latency,
+overall and per endpoint.
+
+Rate limiting and admission control are turned off in the server unless
+--rate-limit / --admission is given, since all virtual users share one IP.
+
+Run from the backend directory:
+    python -m benchmarks.load_test --concurrency 1 4 16 64 --seconds 20
+    python -m benchmarks.load_test --llm-latency-ms 1500 --llm-error-rate 0.02
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+TMP_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TMP_DIR, 'load_test.db')}"
+os.environ["SHARED_STATE_URL"] = f"sqlite:///{os.path.join(TMP_DIR, 'load_test_state.db')}"
+os.environ["LLM_BACKEND"] = "fake"
+os.environ.setdefault("GROQ_API_KEY", "load-test-not-used")
+
+PORT = 8767
+TOPICS = ["arrays", "hash tables", "binary search", "recursion", "linked lists", "graphs", "dynamic programming"]
+LEVELS = ["beginner", "intermediate", "advanced"]
+LETTERS = ["A", "B", "C", "D"]
+JOB_POLL_SECONDS = 0.2
+
+
+def start_server(workers: int, args) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        PORT=str(PORT),
+        WEB_CONCURRENCY=str(workers),
+        FAKE_LLM_LATENCY_MS=str(args.llm_latency_ms),
+        FAKE_LLM_LATENCY_SIGMA=str(args.llm_latency_sigma),
+        FAKE_LLM_ERROR_RATE=str(args.llm_error_rate),
+        QUIZ_JOB_POLL_SECONDS="0.5",
+        # Every virtual user comes from 127.0.0.1, so per-IP limits and
+        # shedding would measure the limiter, not the app
+        RATE_LIMIT_ENABLED=str(args.rate_limit).lower(),
+        ADMISSION_ENABLED=str(args.admission).lower()
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app.main:app"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True
+    )
+    import httpx
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{PORT}/health", timeout=1).status_code == 200:
+                return server
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    stop_server(server)
+    raise RuntimeError("Server did not start")
+
+
+def stop_server(server: subprocess.Popen):
+    os.killpg(server.pid, signal.SIGTERM)
+    server.wait(timeout=30)
+
+
+def create_students(count: int):
+    """Profiles plus one lesson each, so history, search and quizzes have data."""
+    import httpx
+    with httpx.Client(base_url=f"http://127.0.0.1:{PORT}", timeout=120) as http:
+        for i in range(count):
+            username = f"load{i}"
+            http.post("/api/profile/create", json={
+                "username": username,
+                "email": f"{username}@example.com",
+                "proficiency_level": LEVELS[i % len(LEVELS)],
+                "learning_style": "visual"
+            }).raise_for_status()
+            http.post("/api/learning/lesson", json={
+                "username": username, "topic": TOPICS[i % len(TOPICS)], "level": LEVELS[i % len(LEVELS)]
+            })
+
+
+class Recorder:
+    """Latencies per endpoint label for one concurrency level."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def add(self, label: str, seconds: float, ok: bool):
+        self.latencies[label].append(seconds)
+        if not ok:
+            self.errors[label] += 1
+
+
+def percentile(values: list, p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+async def study_session(http, username: str, peers: list, rng: random.Random, record: Recorder):
+    """One pass over every endpoint as a student would hit them."""
+    import websockets
+
+    async def call(label: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await http.request(method, url, **kwargs)
+            ok = response.status_code < 400
+        except Exception:
+            response, ok = None, False
+        record.add(label, time.perf_counter() - started, ok)
+        return response.json() if ok and response.headers.get("content-type", "").startswith("application/json") else None
+
+    topic = rng.choice(TOPICS)
+    level = rng.choice(LEVELS)
+
+    await call("POST /learning/greeting", "POST", "/api/learning/greeting",
+               json={"student_name": username, "level": level})
+    await call("GET /learning/topics/suggest", "GET", "/api/learning/topics/suggest", params={"q": topic[:3]})
+    await call("POST /learning/explain", "POST", "/api/learning/explain",
+               json={"topic": topic, "level": level, "username": username})
+    await call("POST /learning/practice", "POST", "/api/learning/practice", json={"topic": topic, "level": level})
+    lesson = await call("POST /learning/lesson", "POST", "/api/learning/lesson",
+                        json={"username": username, "topic": topic, "level": level})
+
+    chat = await call("POST /learning/chat", "POST", "/api/learning/chat", json={
+        "username": username, "message": f"Can you give me an example of {topic}?",
+        "learning_session_id": lesson["learning_session_id"] if lesson else None, "topic": topic
+    })
+    if chat:
+        await call("POST /learning/chat", "POST", "/api/learning/chat", json={
+            "username": username, "message": "Why does that work?", "conversation_id": chat["conversation_id"]
+        })
+        await call("GET /learning/chat/{id}", "GET", f"/api/learning/chat/{chat['conversation_id']}")
+
+    await call("GET /profile/{username}", "GET", f"/api/profile/{username}")
+    await call("PUT /profile/{username}/update", "PUT", f"/api/profile/{username}/update",
+               json={"preferred_topics": [topic]})
+    await call("GET /profile/{username}/history", "GET", f"/api/profile/{username}/history")
+    await call("GET /profile/{username}/history/search", "GET", f"/api/profile/{username}/history/search",
+               params={"q": topic.split()[0]})
+
+    # Quiz: queue, poll until generated, read, submit
+    job = await call("POST /quiz/generate", "POST", "/api/quiz/generate",
+                     json={"username": username, "topic": topic, "level": level})
+    while job and job["status"] in ("queued", "running"):
+        await asyncio.sleep(JOB_POLL_SECONDS)
+        job = await call("GET /quiz/jobs/{id}", "GET", f"/api/quiz/jobs/{job['id']}")
+    if job and job["status"] == "succeeded":
+        quiz = await call("GET /quiz/session/{id}", "GET", f"/api/quiz/session/{job['quiz']['id']}")
+        if quiz:
+            await call("POST /quiz/submit", "POST", "/api/quiz/submit", json={
+                "quiz_session_id": quiz["id"],
+                "answers": {str(i): rng.choice(LETTERS) for i in range(quiz["total_questions"])},
+                "time_taken": rng.randint(30, 300)
+            })
+
+    # Class assignment: this student as teacher for a few peers
+    assignment = await call("POST /quiz/assignments", "POST", "/api/quiz/assignments",
+                            json={"teacher_username": username, "topic": topic, "level": level})
+    if assignment:
+        assigned = await call("POST /quiz/assignments/{id}/assign", "POST",
+                              f"/api/quiz/assignments/{assignment['id']}/assign",
+                              json={"usernames": [username] + rng.sample(peers, min(3, len(peers)))})
+        await call("GET /quiz/{username}/assignments", "GET", f"/api/quiz/{username}/assignments")
+        if assigned:
+            await call("POST /quiz/submit/batch", "POST", "/api/quiz/submit/batch", json={"submissions": [
+                {
+                    "quiz_session_id": a["quiz_session_id"],
+                    "answers": {str(i): rng.choice(LETTERS) for i in range(assignment["total_questions"])},
+                    "time_taken": rng.randint(30, 300)
+                }
+                for a in assigned["assigned"]
+            ]})
+
+    await call("GET /quiz/{username}/mastery", "GET", f"/api/quiz/{username}/mastery")
+    review = await call("GET /quiz/{username}/review", "GET", f"/api/quiz/{username}/review")
+    if review and review["questions"]:
+        await call("POST /quiz/review/submit", "POST", "/api/quiz/review/submit", json={
+            "username": username, "answers": {q["id"]: rng.choice(LETTERS) for q in review["questions"]}
+        })
+    await call("GET /quiz/{username}/history", "GET", f"/api/quiz/{username}/history")
+
+    await call("GET /usage/{username}/today", "GET", f"/api/usage/{username}/today")
+    await call("GET /usage/summary", "GET", "/api/usage/summary")
+    await call("GET /usage/pregeneration/report", "GET", "/api/usage/pregeneration/report")
+
+    # Live socket: one streamed explanation, timed until its "done" frame
+    started = time.perf_counter()
+    ok = False
+    try:
+        async with websockets.connect(f"ws://127.0.0.1:{PORT}/ws/tutor/{username}") as socket:
+            await socket.send(json.dumps({"id": 1, "type": "explain", "topic": topic, "level": level}))
+            while True:
+                frame = json.loads(await socket.recv())
+                if frame["type"] in ("done", "error"):
+                    ok = frame["type"] == "done"
+                    break
+    except Exception:
+        pass
+    record.add("WS /ws/tutor/{username} explain", time.perf_counter() - started, ok)
+
+    await call("GET /health", "GET", "/health")
+
+
+async def run_level(concurrency: int, seconds: float, students: int) -> tuple:
+    """Run `concurrency` virtual users for `seconds`; (recorder, elapsed seconds)"""
+    import httpx
+
+    record = Recorder()
+    usernames = [f"load{i}" for i in range(students)]
+    deadline = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=concurrency * 2, max_keepalive_connections=concurrency * 2)
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORT}", timeout=120, limits=limits) as http:
+        async def virtual_user(i: int):
+            # One socket per student, so each virtual user gets its own
+            username = usernames[i]
+            peers = [u for u in usernames if u != username]
+            rng = random.Random(i)
+            while time.perf_counter() < deadline:
+                await study_session(http, username, peers, rng, record)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(virtual_user(i) for i in range(concurrency)))
+    return record, time.perf_counter() - started
+
+
+def report(concurrency: int, record: Recorder, elapsed: float):
+    everything = [s for values in record.latencies.values() for s in values]
+    errors = sum(record.errors.values())
+    print(f"\nconcurrency {concurrency}: {len(everything)} requests in {elapsed:.1f}s, "
+          f"{len(everything) / elapsed:.1f} req/s, {errors} errors")
+    if not everything:
+        return
+    print(f"  {'endpoint':<44} {'count':>6} {'err':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    rows = sorted(record.latencies.items()) + [("all", everything)]
+    for label, values in rows:
+        err = errors if label == "all" else record.errors[label]
+        print(f"  {label:<44} {len(values):>6} {err:>5} "
+              f"{percentile(values, 50) * 1000:>9.1f} {percentile(values, 95) * 1000:>9.1f} "
+              f"{percentile(values, 99) * 1000:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64], help="virtual users per level")
+    parser.add_argument("--seconds", type=float, default=20.0, help="duration of each level")
+    parser.add_argument("--workers", type=int, default=1, help="gunicorn workers")
+    parser.add_argument("--llm-latency-ms", type=float, default=800.0, help="median fake LLM reply time")
+    parser.add_argument("--llm-latency-sigma", type=float, default=0.4, help="log-normal spread of reply times")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="share of fake LLM calls that fail")
+    parser.add_argument("--rate-limit", action="store_true", help="keep per-user/per-IP rate limits on")
+    parser.add_argument("--admission", action="store_true", help="keep admission control (503 shedding) on")
+    args = parser.parse_args()
+
+    students = max(max(args.concurrency), 4)
+    server = start_server(args.workers, args)
+    try:
+        create_students(students)
+        print(f"{students} students, {args.workers} worker(s), fake LLM median {args.llm_latency_ms:.0f} ms, "
+              f"error rate {args.llm_error_rate:.1%}")
+        for concurrency in args.concurrency:
+            record, elapsed = asyncio.run(run_level(concurrency, args.seconds, students))
+            report(concurrency, record, elapsed)
+    finally:
+        stop_server(server)
+
+
+if __name__ == "__main__":
+    main()
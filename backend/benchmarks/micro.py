@@ -0,0 +1,422 @@
+"""
+Micro-benchmarks for code that runs on every request, with baselines.
+
+Benchmarks (time per call, median of several rounds):
+- grade_quiz:             /api/quiz/submit grading of a 10-question quiz
+                          (scoring, answer writes, mastery, review queue)
+- quiz_results_response:  building QuizResultsResponse for 10 and 50
+                          questions, and encoding it as FastAPI does
+- quiz_history:           /api/quiz/{username}/history for 50 quizzes of
+                          20 questions, including encoding the response
+- parse_json:             AITutorService._parse_json on a 10-question
+                          quiz reply, plain and wrapped in a code fence
+- get_profile, get_learning_history, get_quiz_history at each --rows
+  scale: route functions against a SQLite database seeded with that many
+  learning sessions (plus rows/10 quizzes of 5 questions), for a random
+  student each call
+
+Run and save a baseline (machine-specific; keep one per machine/CI runner):
+    python -m benchmarks.micro run --save
+Compare the current code against it; exits 1 if any metric got slower
+by more than --threshold:
+    python -m benchmarks.micro compare --threshold 0.15
+
+Seeding a million rows takes a while; pass --data-dir to keep the seeded
+databases between runs, or --rows 10000 100000 for a quicker pass.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+TMP_DIR = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TMP_DIR, 'micro.db')}"
+os.environ["SHARED_STATE_URL"] = "memory://"
+os.environ.setdefault("GROQ_API_KEY", "benchmark-not-used")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from starlette.requests import Request  # noqa: E402
+from starlette.responses import Response  # noqa: E402
+from sqlalchemy import create_engine, func, select  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from app.database import Base  # noqa: E402
+from app.models import User, StudentProfile, LearningSession, QuizSession, QuizQuestion  # noqa: E402
+from app.schemas.quiz import QuizAnswerSubmission, QuizResultsResponse, QuizQuestionResult  # noqa: E402
+from app.routes.quiz import grade_quiz, get_quiz_history  # noqa: E402
+from app.routes.profile import get_profile, get_learning_history  # noqa: E402
+from app.services.ai_service import AITutorService  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines", "micro.json")
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000]
+
+TOPICS = ["arrays", "hash tables", "binary search", "recursion", "linked lists", "graphs", "dynamic programming"]
+DIFFICULTIES = ["easy", "medium", "hard"]
+LETTERS = ["A", "B", "C", "D"]
+SESSIONS_PER_USER = 100
+INSERT_CHUNK = 10_000
+
+# Rounds per metric; each round runs the operation enough times to take ~ROUND_SECONDS
+ROUNDS = 5
+ROUND_SECONDS = 0.2
+
+
+# ─── Timing ──────────────────────────────────────────────────────────
+
+def measure(fn, rounds: int = ROUNDS) -> float:
+    """Median seconds per call of fn() over `rounds` rounds."""
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - started >= ROUND_SECONDS or number >= 100_000:
+            break
+        number *= 2
+
+    per_call = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        per_call.append((time.perf_counter() - started) / number)
+    return statistics.median(per_call)
+
+
+def open_database(path: str):
+    """Engine and session factory for a benchmark database (schema created)."""
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def insert_rows(engine, model, rows: list):
+    with engine.begin() as conn:
+        for i in range(0, len(rows), INSERT_CHUNK):
+            conn.execute(model.__table__.insert(), rows[i:i + INSERT_CHUNK])
+
+
+def quiz_question_rows(rng: random.Random, quiz_id: str, count: int, answered: bool) -> list:
+    rows = []
+    for n in range(1, count + 1):
+        correct = rng.choice(LETTERS)
+        answer = rng.choice(LETTERS) if answered else None
+        rows.append({
+            "id": str(uuid.uuid4()), "quiz_session_id": quiz_id, "question_number": n,
+            "question_text": f"Question {n}: which statement about {rng.choice(TOPICS)} is true?",
+            "options": json.dumps({letter: f"Option {letter} describing the idea in a sentence" for letter in LETTERS}),
+            "correct_answer": correct, "user_answer": answer,
+            "is_correct": (answer == correct) if answered else None,
+            "difficulty": rng.choice(DIFFICULTIES), "concept": rng.choice(TOPICS),
+            "explanation": "The correct option follows from how the structure stores its elements."
+        })
+    return rows
+
+
+def add_user(rng: random.Random, users: list, profiles: list, username: str) -> str:
+    user_id = str(uuid.uuid4())
+    users.append({"id": user_id, "username": username, "email": f"{username}@example.com", "is_active": True})
+    profiles.append({
+        "id": str(uuid.uuid4()), "user_id": user_id, "proficiency_level": "beginner",
+        "learning_style": "visual", "preferred_topics": [rng.choice(TOPICS)], "total_sessions": "0"
+    })
+    return user_id
+
+
+# ─── Benchmarks ──────────────────────────────────────────────────────
+
+def bench_grade_quiz(results: dict):
+    questions = 10
+    engine, Session = open_database(os.path.join(TMP_DIR, "grade.db"))
+    rng = random.Random(1)
+    loop = asyncio.new_event_loop()
+
+    def fresh_submission() -> QuizAnswerSubmission:
+        users, profiles = [], []
+        user_id = add_user(rng, users, profiles, f"student-{uuid.uuid4()}")
+        quiz_id = str(uuid.uuid4())
+        insert_rows(engine, User, users)
+        insert_rows(engine, QuizSession, [{
+            "id": quiz_id, "user_id": user_id, "topic": "arrays", "level": "beginner",
+            "total_questions": questions, "completed": False
+        }])
+        insert_rows(engine, QuizQuestion, quiz_question_rows(rng, quiz_id, questions, answered=False))
+        return QuizAnswerSubmission(
+            quiz_session_id=quiz_id,
+            answers={str(i): rng.choice(LETTERS) for i in range(questions)},
+            time_taken=120
+        )
+
+    # Every call needs an unsubmitted quiz, so time only the grading
+    timings = []
+    for _ in range(ROUNDS * 20):
+        submission = fresh_submission()
+        db = Session()
+        try:
+            started = time.perf_counter()
+            loop.run_until_complete(grade_quiz(submission, db))
+            timings.append(time.perf_counter() - started)
+        finally:
+            db.close()
+    loop.close()
+    results[f"grade_quiz[{questions}q]"] = statistics.median(timings)
+
+
+def bench_quiz_results_response(results: dict):
+    rng = random.Random(2)
+    for count in (10, 50):
+        rows = quiz_question_rows(rng, "quiz", count, answered=True)
+
+        def build():
+            return QuizResultsResponse(
+                quiz_id="quiz", topic="arrays", total_questions=count,
+                correct_answers=sum(1 for r in rows if r["is_correct"]),
+                score=50.0, time_taken=120, passed=False,
+                questions=[
+                    QuizQuestionResult(
+                        question_number=r["question_number"], question_text=r["question_text"],
+                        options=json.loads(r["options"]), user_answer=r["user_answer"],
+                        correct_answer=r["correct_answer"], is_correct=r["is_correct"],
+                        explanation=r["explanation"], difficulty=r["difficulty"]
+                    )
+                    for r in rows
+                ],
+                easy_correct=0, easy_total=0, medium_correct=0, medium_total=0, hard_correct=0, hard_total=0,
+                feedback="Keep practicing!"
+            )
+
+        response = build()
+        results[f"quiz_results_response[{count}q]/build"] = measure(build)
+        results[f"quiz_results_response[{count}q]/encode"] = measure(
+            lambda: JSONResponse(jsonable_encoder(response)).body
+        )
+
+
+def plain_request() -> Request:
+    """A GET with no conditional headers, so routes always build the full response."""
+    return Request({"type": "http", "method": "GET", "path": "/", "query_string": b"", "headers": []})
+
+
+def bench_quiz_history(results: dict):
+    quizzes, questions = 50, 20
+    engine, Session = open_database(os.path.join(TMP_DIR, "history.db"))
+    rng = random.Random(3)
+    users, profiles = [], []
+    user_id = add_user(rng, users, profiles, "historian")
+    quiz_rows, question_rows = [], []
+    now = datetime.now(timezone.utc)
+    for i in range(quizzes):
+        quiz_id = str(uuid.uuid4())
+        quiz_rows.append({
+            "id": quiz_id, "user_id": user_id, "topic": rng.choice(TOPICS), "level": "beginner",
+            "total_questions": questions, "correct_answers": 10, "score": 50.0, "time_taken": 200,
+            "completed": True, "completed_at": now - timedelta(hours=i)
+        })
+        question_rows += quiz_question_rows(rng, quiz_id, questions, answered=True)
+    insert_rows(engine, User, users)
+    insert_rows(engine, QuizSession, quiz_rows)
+    insert_rows(engine, QuizQuestion, question_rows)
+
+    loop = asyncio.new_event_loop()
+    db = Session()
+
+    def route():
+        db.expire_all()
+        return loop.run_until_complete(get_quiz_history("historian", plain_request(), limit=quizzes, db=db))
+
+    # The route returns the encoded response, so this includes encoding
+    results[f"quiz_history[{quizzes}x{questions}]"] = measure(route)
+    db.close()
+    loop.close()
+
+
+def _fenced_quiz_reply(count: int) -> str:
+    rng = random.Random(4)
+    rows = quiz_question_rows(rng, "quiz", count, answered=False)
+    return json.dumps({"questions": [
+        {
+            "question_number": r["question_number"], "question_text": r["question_text"],
+            "options": json.loads(r["options"]), "correct_answer": r["correct_answer"],
+            "difficulty": r["difficulty"], "concept": r["concept"], "explanation": r["explanation"]
+        }
+        for r in rows
+    ]}, indent=2)
+
+
+def bench_parse_json(results: dict):
+    plain = _fenced_quiz_reply(10)
+    fenced = f"```json\n{plain}\n```"
+    results["parse_json[quiz 10q]"] = measure(lambda: AITutorService._parse_json(plain, what="quiz"))
+    results["parse_json[fenced quiz 10q]"] = measure(lambda: AITutorService._parse_json(fenced, what="quiz"))
+
+
+def seed_scale(path: str, rows: int) -> int:
+    """Seed `rows` learning sessions (and rows/10 quizzes); returns the number of students."""
+    engine, _ = open_database(path)
+    students = max(1, rows // SESSIONS_PER_USER)
+    with engine.connect() as conn:
+        if conn.execute(select(func.count()).select_from(LearningSession.__table__)).scalar() >= rows:
+            return students
+
+    rng = random.Random(5)
+    users, profiles = [], []
+    user_ids = [add_user(rng, users, profiles, f"student{i}") for i in range(students)]
+    insert_rows(engine, User, users)
+    insert_rows(engine, StudentProfile, profiles)
+
+    started = datetime.now(timezone.utc) - timedelta(days=365)
+    for offset in range(0, rows, INSERT_CHUNK * 10):
+        batch = min(INSERT_CHUNK * 10, rows - offset)
+        sessions, quizzes, questions = [], [], []
+        for i in range(offset, offset + batch):
+            user_id = user_ids[i % students]
+            created_at = started + timedelta(seconds=i * 30)
+            sessions.append({
+                "id": str(uuid.uuid4()), "user_id": user_id, "topic": rng.choice(TOPICS),
+                "level": "beginner", "learning_style": "visual",
+                "explanation": "An explanation of the topic. " * 60, "word_count": 300,
+                "estimated_reading_time": 2, "created_at": created_at
+            })
+            if i % 10 == 0:
+                quiz_id = str(uuid.uuid4())
+                quizzes.append({
+                    "id": quiz_id, "user_id": user_id, "topic": rng.choice(TOPICS), "level": "beginner",
+                    "total_questions": 5, "correct_answers": 3, "score": 60.0, "time_taken": 100,
+                    "completed": True, "completed_at": created_at
+                })
+                questions += quiz_question_rows(rng, quiz_id, 5, answered=True)
+        insert_rows(engine, LearningSession, sessions)
+        insert_rows(engine, QuizSession, quizzes)
+        insert_rows(engine, QuizQuestion, questions)
+    engine.dispose()
+    return students
+
+
+def bench_queries(results: dict, rows: int, data_dir: str):
+    path = os.path.join(data_dir, f"micro_rows_{rows}.db")
+    students = seed_scale(path, rows)
+    engine, Session = open_database(path)
+    rng = random.Random(6)
+    loop = asyncio.new_event_loop()
+    db = Session()
+
+    def username() -> str:
+        return f"student{rng.randrange(students)}"
+
+    def call(route, **kwargs):
+        db.expire_all()
+        return route(username(), plain_request(), db=db, **kwargs)
+
+    results[f"get_profile[rows={rows}]"] = measure(lambda: call(get_profile, response=Response()))
+    results[f"get_learning_history[rows={rows}]"] = measure(lambda: call(get_learning_history, limit=10))
+    results[f"get_quiz_history[rows={rows}]"] = measure(
+        lambda: loop.run_until_complete(call(get_quiz_history, limit=10))
+    )
+    db.close()
+    loop.close()
+    engine.dispose()
+
+
+# ─── Commands ────────────────────────────────────────────────────────
+
+def run_suite(rows: list, data_dir: str, only: str = None) -> dict:
+    results = {}
+    suites = [
+        ("grade_quiz", bench_grade_quiz),
+        ("quiz_results_response", bench_quiz_results_response),
+        ("quiz_history", bench_quiz_history),
+        ("parse_json", bench_parse_json),
+    ]
+    for name, bench in suites:
+        if not only or only in name:
+            bench(results)
+            print(f"  done: {name}", file=sys.stderr)
+    for count in rows:
+        if not only or only in "queries":
+            bench_queries(results, count, data_dir)
+            print(f"  done: queries at {count} rows", file=sys.stderr)
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "machine": f"{platform.node()} {platform.machine()} {platform.processor()}".strip(),
+        "python": platform.python_version(),
+        "rows": rows,
+        "metrics": results
+    }
+
+
+def print_results(run: dict):
+    print(f"{'metric':<48} {'µs/call':>12}")
+    for name, seconds in run["metrics"].items():
+        print(f"{name:<48} {seconds * 1e6:>12.1f}")
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    """Print a comparison table; return the metrics that regressed past `threshold`."""
+    regressions = []
+    print(f"{'metric':<48} {'baseline µs':>12} {'current µs':>12} {'change':>8}")
+    for name, before in baseline["metrics"].items():
+        after = current["metrics"].get(name)
+        if after is None:
+            print(f"{name:<48} {before * 1e6:>12.1f} {'-':>12} {'missing':>8}")
+            continue
+        change = after / before - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSED"
+        print(f"{name:<48} {before * 1e6:>12.1f} {after * 1e6:>12.1f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the suite and print (or save) the results")
+    run.add_argument("--rows", type=int, nargs="+", default=DEFAULT_ROWS, help="database sizes for query benchmarks")
+    run.add_argument("--only", help="run only benchmarks whose name contains this")
+    run.add_argument("--data-dir", default=TMP_DIR, help="where seeded databases are kept")
+    run.add_argument("--out", help="write results to this file")
+    run.add_argument("--save", action="store_true", help=f"save as the baseline ({BASELINE_PATH})")
+
+    cmp = commands.add_parser("compare", help="compare against a baseline; exit 1 on regressions")
+    cmp.add_argument("--baseline", default=BASELINE_PATH)
+    cmp.add_argument("--current", help="results file from `run --out` (default: run the suite now)")
+    cmp.add_argument("--threshold", type=float, default=0.15, help="allowed slow-down, e.g. 0.15 = 15%%")
+    cmp.add_argument("--data-dir", default=TMP_DIR, help="where seeded databases are kept")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        results = run_suite(args.rows, args.data_dir, args.only)
+        print_results(results)
+        for path in filter(None, [args.out, BASELINE_PATH if args.save else None]):
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, "w") as f:
+                json.dump(results, f, indent=2)
+            print(f"Saved {path}")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if args.current:
+        with open(args.current) as f:
+            current = json.load(f)
+    else:
+        current = run_suite(baseline["rows"], args.data_dir)
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) slower than baseline by more than {args.threshold:.0%}")
+        sys.exit(1)
+    print(f"\nNo regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
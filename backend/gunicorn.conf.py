@@ -0,0 +1,58 @@
+"""
+Gunicorn settings for multi-worker serving:
+    gunicorn -c gunicorn.conf.py app.main:app
+
+Each worker is a separate uvicorn process with its own event loop, DB
+pool and AITutorService. State the workers must agree on (quota counters,
+greeting pools, idempotency claims, the nightly pregeneration lock) lives
+in SHARED_STATE_URL: a local SQLite file by default, Redis across machines.
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", min(multiprocessing.cpu_count(), 4)))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Workers write their metrics here so /metrics can add them up
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "genai_tutor_metrics")
+)
+
+# LLM calls can be slow; don't kill a worker in the middle of one
+timeout = 120
+graceful_timeout = 30
+keepalive = 5
+
+# Take the client address from X-Forwarded-For (so per-IP rate limits
+# see real clients, not the proxy) only on connections from these
+# addresses. Behind the platform's proxy, set FORWARDED_ALLOW_IPS to the
+# proxy's address, or to "*" only if nothing but the proxy can reach the
+# workers: otherwise any client can pick the IP it is limited as.
+forwarded_allow_ips = os.environ.get("FORWARDED_ALLOW_IPS", "127.0.0.1")
+
+
+def on_starting(server):
+    """Create tables and the search index once, before any worker starts."""
+    # Metrics from a previous run would be added to this one's
+    metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+
+    from app.config import settings
+    from app.database import engine
+    from app.schema import create_schema
+
+    create_schema()
+    # Workers are forked from here: they open their own connections and
+    # inherit these settings, so they don't each repeat the schema check
+    engine.dispose()
+    settings.AUTO_CREATE_SCHEMA = False
+
+
+def child_exit(server, worker):
+    """Drop a dead worker's live gauges (e.g. pool checkouts)."""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
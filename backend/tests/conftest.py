@@ -0,0 +1,59 @@
+"""
+Shared fixtures. Settings are read when the app is imported, so the
+environment is pointed at a throwaway SQLite database, in-process shared
+state and the offline fake LLM before anything from `app` is imported.
+"""
+import os
+import tempfile
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
+os.environ["SHARED_STATE_URL"] = "memory://"
+os.environ["GROQ_API_KEY"] = "test-not-used"
+os.environ["LLM_BACKEND"] = "fake"
+os.environ["FAKE_LLM_LATENCY_MS"] = "1"
+os.environ["WARMUP_ON_STARTUP"] = "false"
+
+import pytest  # noqa: E402
+from app.database import Base, SessionLocal  # noqa: E402
+from app.models import User  # noqa: E402
+from app.schema import create_schema  # noqa: E402
+from app.services.quiz_store import save_quiz  # noqa: E402
+from app.services.shared_state import shared_state  # noqa: E402
+from .helpers import questions_data  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    create_schema()
+
+
+@pytest.fixture
+def db():
+    """A session on an emptied database (and emptied shared state)."""
+    session = SessionLocal()
+    for table in reversed(Base.metadata.sorted_tables):
+        session.execute(table.delete())
+    session.commit()
+    shared_state._data.clear()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def make_user(db):
+    def make(username: str = "student") -> User:
+        user = User(username=username, email=f"{username}@example.com", is_active=True)
+        db.add(user)
+        db.commit()
+        return user
+    return make
+
+
+@pytest.fixture
+def make_quiz(db):
+    def make(user: User, count: int = 3, topic: str = "arrays"):
+        quiz = save_quiz(db, user_id=user.id, topic=topic, level="beginner", questions_data=questions_data(count, topic))
+        db.commit()
+        return quiz
+    return make
+
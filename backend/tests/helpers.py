@@ -0,0 +1,21 @@
+import json
+
+
+def questions_data(count: int = 3, topic: str = "arrays") -> list:
+    """Generated-quiz style question dicts; the answer to question n is "ABCD"[n % 4]."""
+    return [
+        {
+            "question_number": n,
+            "question_text": f"Question {n} about {topic}?",
+            "options": {letter: f"Option {letter}" for letter in "ABCD"},
+            "correct_answer": "ABCD"[n % 4],
+            "difficulty": ["easy", "medium", "hard"][n % 3],
+            "concept": f"{topic} concept {n}",
+            "explanation": f"Explanation {n}"
+        }
+        for n in range(1, count + 1)
+    ]
+
+
+def response_json(response):
+    return json.loads(response.body)
@@ -0,0 +1,71 @@
+import asyncio
+import pytest
+from app.admission import AdmissionController, priority_of, CRITICAL, NORMAL, LOW
+from app.models import QuizJob
+
+
+def controller() -> AdmissionController:
+    return AdmissionController(
+        max_in_flight=10, max_llm_calls=4, shed_low_at=0.8, retry_after=5,
+        max_queued_jobs=20, refresh_seconds=0.01
+    )
+
+
+def loads(**overrides) -> dict:
+    return {"requests": 0.0, "llm_calls": 0.0, "db_pool": 0.0, "quiz_jobs": 0.0, **overrides}
+
+
+@pytest.mark.parametrize("method, path, priority", [
+    ("GET", "/health", CRITICAL),
+    ("GET", "/metrics", CRITICAL),
+    ("POST", "/api/quiz/submit", CRITICAL),
+    ("POST", "/api/quiz/submit/batch", CRITICAL),
+    ("POST", "/api/quiz/review/submit", CRITICAL),
+    ("OPTIONS", "/api/learning/lesson", CRITICAL),
+    ("POST", "/api/learning/lesson", LOW),
+    ("POST", "/api/quiz/generate", LOW),
+    ("GET", "/api/usage/student/today", LOW),
+    ("GET", "/api/quiz/generate", NORMAL),
+    ("POST", "/api/learning/lesson/extra", NORMAL),
+    ("GET", "/api/profile/student", NORMAL),
+])
+def test_priority_of(method, path, priority):
+    assert priority_of(method, path) == priority
+
+
+@pytest.mark.parametrize("priority, current, reason", [
+    (CRITICAL, loads(requests=5.0, db_pool=5.0), None),
+    (LOW, loads(), None),
+    (LOW, loads(llm_calls=0.79), None),
+    (LOW, loads(llm_calls=0.8), "llm_calls"),
+    (LOW, loads(quiz_jobs=0.9), "quiz_jobs"),
+    (LOW, loads(requests=1.0, db_pool=1.0), "requests"),
+    (NORMAL, loads(llm_calls=1.0, quiz_jobs=3.0), None),
+    (NORMAL, loads(requests=0.99), None),
+    (NORMAL, loads(requests=1.0), "requests"),
+    (NORMAL, loads(db_pool=1.2), "db_pool"),
+])
+def test_shed_reason(priority, current, reason):
+    assert controller().shed_reason(priority, current) == reason
+
+
+def test_queued_jobs_are_counted_in_the_background(db, make_user):
+    student = make_user()
+    for status in ["queued"] * 17 + ["running", "succeeded"]:
+        db.add(QuizJob(user_id=student.id, username=student.username, topic="arrays",
+                       level="beginner", status=status))
+    db.commit()
+    admission = controller()
+
+    async def refreshed() -> dict:
+        await admission.start()
+        await asyncio.sleep(0.05)
+        await admission.stop()
+        return admission.readiness()
+
+    state = asyncio.run(refreshed())
+    assert state["queued_jobs"] == 17
+    assert state["loads"]["quiz_jobs"] == 0.85
+    assert state["ready"] is False
+    assert admission.shed_reason(LOW) == "quiz_jobs"
+    assert admission.shed_reason(NORMAL) is None
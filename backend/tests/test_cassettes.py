@@ -0,0 +1,38 @@
+import asyncio
+import glob
+import json
+import pytest
+from app.services import ai_service as ai_module
+from app.services.ai_service import AITutorService
+from app.services.cassettes import CassetteStore, CassetteMissError
+
+
+def lesson(service: AITutorService) -> dict:
+    return asyncio.run(service.generate_lesson("recursion", "beginner", num_quiz_questions=2))
+
+
+def test_lesson_replays_without_building_the_model(tmp_path, monkeypatch):
+    monkeypatch.setattr(ai_module, "cassettes", CassetteStore(str(tmp_path), mode="record"))
+    recorded = lesson(AITutorService())
+
+    [path] = glob.glob(str(tmp_path / "generate_lesson" / "*.json"))
+    with open(path) as f:
+        assert json.load(f)["bind"] == {"response_format": {"type": "json_object"}}
+
+    monkeypatch.setattr(ai_module, "cassettes", CassetteStore(str(tmp_path), mode="replay", time_scale=0))
+    service = AITutorService()
+    assert lesson(service) == recorded
+    assert service._llm is None
+
+
+def test_model_options_are_part_of_the_cassette_key(tmp_path):
+    store = CassetteStore(str(tmp_path), mode="replay")
+    messages = [["human", "Build the lesson"]]
+    plain = store._path("generate_lesson", messages)
+
+    assert store._path("generate_lesson", messages, {"response_format": {"type": "json_object"}}) != plain
+    assert store._path("generate_lesson", messages, {}) == plain
+
+    prompt = ai_module._prompt([("user", "Build the lesson")])
+    with pytest.raises(CassetteMissError):
+        asyncio.run(store.replay("generate_lesson", prompt, {}, bind={"response_format": {"type": "text"}}))
@@ -0,0 +1,51 @@
+import asyncio
+import gzip
+import pytest
+from app.compression import CompressionMiddleware
+
+BIG_JSON = b'{"items": [' + b", ".join(b'"item"' for _ in range(500)) + b"]}"
+
+
+def respond(content_type: bytes, body: bytes):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", content_type)]})
+        await send({"type": "http.response.body", "body": body})
+    return app
+
+
+def get(app, accept_encoding: bytes = None) -> tuple:
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    headers = [(b"accept-encoding", accept_encoding)] if accept_encoding else []
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": headers}
+    asyncio.run(CompressionMiddleware(app, minimum_size=100)(scope, None, send))
+    return [(k.decode().lower(), v.decode()) for k, v in sent[0]["headers"]], sent[1]["body"]
+
+
+def test_compressed_responses_vary_on_accept_encoding_once():
+    headers, body = get(respond(b"application/json", BIG_JSON), b"gzip")
+
+    assert ("content-encoding", "gzip") in headers
+    assert [v for k, v in headers if k == "vary"] == ["Accept-Encoding"]
+    assert gzip.decompress(body) == BIG_JSON
+
+
+@pytest.mark.parametrize("body, accept_encoding", [
+    (BIG_JSON, None),            # the client takes no compression
+    (b'{"ok": true}', b"gzip"),  # too small to compress
+])
+def test_uncompressed_json_still_varies_on_accept_encoding(body, accept_encoding):
+    headers, sent = get(respond(b"application/json", body), accept_encoding)
+
+    assert sent == body
+    assert "content-encoding" not in dict(headers)
+    assert dict(headers)["vary"] == "Accept-Encoding"
+
+
+def test_types_never_compressed_do_not_vary():
+    headers, _ = get(respond(b"image/png", BIG_JSON), b"gzip")
+
+    assert "vary" not in dict(headers)
@@ -0,0 +1,31 @@
+from langchain_core.messages import HumanMessage, SystemMessage
+from app.services import fake_llm
+from app.services.fake_llm import FakeChatModel
+
+
+def prompt(topic: str) -> list:
+    return [SystemMessage(content=f"Topic: {topic}\nStructure your explanation"), HumanMessage(content="Go")]
+
+
+def draws(model: FakeChatModel, order: list) -> dict:
+    fake_llm._prompt_calls.clear()
+    seen = {}
+    for topic in order:
+        seen.setdefault(topic, []).append(model._draw(prompt(topic)))
+    return seen
+
+
+def test_draws_depend_on_the_prompt_not_on_what_ran_before():
+    model = FakeChatModel(latency_ms=100, latency_sigma=0.5, error_rate=0.3, seed=7)
+
+    first = draws(model, ["arrays", "graphs", "arrays", "graphs", "arrays"])
+    second = draws(model, ["graphs", "graphs", "arrays", "arrays", "arrays"])
+
+    assert first == second
+    # Repeats of one prompt still vary
+    assert len(set(first["arrays"])) == 3
+
+
+def test_seed_changes_the_draws():
+    order = ["arrays"] * 5
+    assert draws(FakeChatModel(seed=1), order) != draws(FakeChatModel(seed=2), order)
@@ -0,0 +1,104 @@
+import asyncio
+from app.models import QuizSession, QuizQuestion, AssignmentAnswer, ConceptMastery
+from app.routes.quiz import grade_quiz
+from app.schemas.quiz import QuizAnswerSubmission
+from app.services.grading import grade_batch
+from app.services.quiz_store import save_assignment
+from .helpers import questions_data
+
+# Question n's answer is "ABCD"[n % 4]: questions 1-3 are B, C, D
+ANSWERS = {"0": "B", "1": "A", "3": "A", "4": "A"}   # 1 right, 2 wrong, 3 blank, 4 wrong, 5 right
+
+
+def submission(quiz_id: str, answers: dict = ANSWERS) -> QuizAnswerSubmission:
+    return QuizAnswerSubmission(quiz_session_id=quiz_id, answers=answers, time_taken=90)
+
+
+def stored(db, quiz_id: str) -> tuple:
+    db.expire_all()
+    quiz = db.query(QuizSession).filter_by(id=quiz_id).one()
+    questions = db.query(QuizQuestion).filter_by(quiz_session_id=quiz_id).order_by(QuizQuestion.question_number)
+    return (
+        quiz.completed, quiz.correct_answers, quiz.score, quiz.time_taken,
+        [(q.user_answer, q.is_correct) for q in questions]
+    )
+
+
+def test_batch_grading_matches_single_grading(db, make_user, make_quiz):
+    single_quiz = make_quiz(make_user("single"), count=5)
+    batch_quiz = make_quiz(make_user("batch"), count=5)
+
+    single = asyncio.run(grade_quiz(submission(single_quiz.id), db))
+    results, errors = grade_batch(db, [submission(batch_quiz.id)])
+
+    assert errors == []
+    [batch] = results
+    assert batch.model_dump(exclude={"quiz_id"}) == single.model_dump(exclude={"quiz_id"})
+    assert (batch.correct_answers, batch.easy_total, batch.medium_total, batch.hard_total) == (2, 1, 2, 2)
+    assert stored(db, batch_quiz.id) == stored(db, single_quiz.id)
+
+    # Question ratings are shared, so compare what each student was credited with
+    counts = {}
+    for m in db.query(ConceptMastery).all():
+        counts.setdefault(m.user_id, set()).add((m.concept, m.attempts, m.correct))
+    assert len(counts) == 2
+    assert counts[single_quiz.user_id] == counts[batch_quiz.user_id]
+
+
+def test_duplicate_missing_and_submitted_quizzes_are_reported(db, make_user, make_quiz):
+    student = make_user()
+    fresh, submitted = make_quiz(student), make_quiz(student)
+    asyncio.run(grade_quiz(submission(submitted.id), db))
+
+    results, errors = grade_batch(db, [
+        submission(fresh.id),
+        submission(fresh.id, {"0": "A"}),
+        submission(submitted.id, {"0": "A"}),
+        submission("no-such-quiz"),
+    ])
+
+    assert [r.quiz_id for r in results] == [fresh.id]
+    assert {(e["quiz_session_id"], e["detail"]) for e in errors} == {
+        (fresh.id, "Duplicate submission in batch"),
+        (submitted.id, "Quiz not found or already submitted"),
+        ("no-such-quiz", "Quiz not found or already submitted"),
+    }
+    # The first submission of a duplicate wins, the submitted quiz is untouched
+    assert stored(db, fresh.id)[4][0] == ("B", True)
+    assert stored(db, submitted.id)[4][0] == ("B", True)
+
+
+def test_batch_with_nothing_to_grade(db):
+    assert grade_batch(db, [submission("no-such-quiz")]) == (
+        [], [{"quiz_session_id": "no-such-quiz", "detail": "Quiz not found or already submitted"}]
+    )
+
+
+def test_assignment_attempts_share_questions_and_store_own_answers(db, make_user, make_quiz):
+    teacher = make_user("teacher")
+    assignment = save_assignment(db, teacher_id=teacher.id, topic="arrays", level="beginner",
+                                 questions_data=questions_data(3))
+    attempts = []
+    for name in ("ana", "ben"):
+        attempt = QuizSession(user_id=make_user(name).id, assignment_id=assignment.id,
+                              topic="arrays", level="beginner", total_questions=3)
+        db.add(attempt)
+        attempts.append(attempt)
+    own = make_quiz(make_user("cy"), count=3)
+    db.commit()
+
+    results, errors = grade_batch(db, [
+        submission(attempts[0].id, {"0": "B", "1": "C", "2": "D"}),
+        submission(attempts[1].id, {"0": "A"}),
+        submission(own.id, {"0": "B", "1": "C"}),
+    ])
+
+    assert errors == []
+    assert [(r.correct_answers, r.total_questions) for r in results] == [(3, 3), (0, 3), (2, 3)]
+    assert [q.question_text for q in results[0].questions] == [q.question_text for q in results[1].questions]
+    for attempt, expected in zip(attempts, [["B", "C", "D"], ["A", None, None]]):
+        answers = db.query(AssignmentAnswer).filter_by(quiz_session_id=attempt.id).all()
+        by_question = {a.question.question_number: a.user_answer for a in answers}
+        assert [by_question[n] for n in (1, 2, 3)] == expected
+    # Shared questions carry no per-student answer
+    assert db.query(QuizQuestion).filter(QuizQuestion.quiz_session_id.in_([a.id for a in attempts])).count() == 0
@@ -0,0 +1,146 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from app.services import idempotency
+from app.services.idempotency import IdempotencyStore
+from app.services.shared_state import shared_state
+from .helpers import response_json
+
+ENDPOINT = "/api/quiz/submit"
+CALLER = "user-1"
+PAYLOAD = {"quiz_session_id": "q1", "answers": {"0": "A"}, "time_taken": 30}
+
+
+class Producer:
+    """Counts calls and returns a fresh body each time."""
+
+    def __init__(self, release: asyncio.Event = None):
+        self.calls = 0
+        self.release = release
+
+    async def __call__(self):
+        self.calls += 1
+        if self.release is not None:
+            await self.release.wait()
+        return {"run": self.calls}
+
+
+@pytest.fixture
+def store(db):
+    return IdempotencyStore(ttl_seconds=60)
+
+
+def test_completed_key_is_replayed(store):
+    producer = Producer()
+
+    first = asyncio.run(store.run("key-1", ENDPOINT, CALLER, PAYLOAD, producer))
+    retry = asyncio.run(store.run("key-1", ENDPOINT, CALLER, PAYLOAD, producer))
+
+    assert producer.calls == 1
+    assert response_json(retry) == response_json(first) == {"run": 1}
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+
+
+def test_keys_are_scoped_per_endpoint(store):
+    producer = Producer()
+
+    asyncio.run(store.run("key-1", ENDPOINT, CALLER, PAYLOAD, producer))
+    asyncio.run(store.run("key-1", "/api/quiz/generate", CALLER, PAYLOAD, producer))
+
+    assert producer.calls == 2
+
+
+def test_keys_are_scoped_per_caller(store):
+    producer = Producer()
+
+    mine = asyncio.run(store.run("key-1", ENDPOINT, CALLER, PAYLOAD, producer))
+    theirs = asyncio.run(store.run("key-1", ENDPOINT, "user-2", PAYLOAD, producer))
+
+    assert producer.calls == 2
+    assert response_json(theirs) == {"run": 2} != response_json(mine)
+    assert "Idempotent-Replayed" not in theirs.headers
+
+
+def test_same_key_with_different_body_is_rejected(store):
+    producer = Producer()
+    asyncio.run(store.run("key-1", ENDPOINT, CALLER, PAYLOAD, producer))
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(store.run("key-1", ENDPOINT, CALLER, dict(PAYLOAD, time_taken=31), producer))
+
+    assert error.value.status_code == 422
+    assert producer.calls == 1
+
+
+def test_retry_while_in_flight_attaches_to_the_original(store):
+    async def scenario():
+        release = asyncio.Event()
+        producer = Producer(release)
+        first = asyncio.create_task(store.run("key-1", ENDPOINT, CALLER, PAYLOAD, producer))
+        await asyncio.sleep(0)
+        retry = asyncio.create_task(store.run("key-1", ENDPOINT, CALLER, PAYLOAD, producer))
+        await asyncio.sleep(0)
+        release.set()
+        return producer, await first, await retry
+
+    producer, first, retry = asyncio.run(scenario())
+
+    assert producer.calls == 1
+    assert response_json(retry) == response_json(first)
+    assert retry.headers["Idempotent-Replayed"] == "true"
+
+
+def test_in_flight_retry_with_different_body_is_rejected(store):
+    async def scenario():
+        release = asyncio.Event()
+        producer = Producer(release)
+        first = asyncio.create_task(store.run("key-1", ENDPOINT, CALLER, PAYLOAD, producer))
+        await asyncio.sleep(0)
+        retry = asyncio.create_task(store.run("key-1", ENDPOINT, CALLER, dict(PAYLOAD, time_taken=31), producer))
+        await asyncio.sleep(0)
+        release.set()
+        await first
+        return await retry
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(scenario())
+    assert error.value.status_code == 422
+
+
+def test_key_held_by_another_worker_times_out_with_409(store, monkeypatch):
+    monkeypatch.setattr(idempotency, "IN_FLIGHT_TTL_SECONDS", 0.3)
+    monkeypatch.setattr(idempotency, "IN_FLIGHT_POLL_SECONDS", 0.05)
+    shared_state.add(f"idempotency:{ENDPOINT}:{CALLER}:key-1", 99999, ttl=60)
+    producer = Producer()
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(store.run("key-1", ENDPOINT, CALLER, PAYLOAD, producer))
+
+    assert error.value.status_code == 409
+    assert producer.calls == 0
+
+
+def test_client_errors_are_stored_but_server_errors_are_not(store):
+    calls = []
+
+    async def fails(code):
+        calls.append(code)
+        raise HTTPException(status_code=code, detail="nope")
+
+    bad = asyncio.run(store.run("key-4xx", ENDPOINT, CALLER, PAYLOAD, lambda: fails(400)))
+    replayed = asyncio.run(store.run("key-4xx", ENDPOINT, CALLER, PAYLOAD, lambda: fails(400)))
+    assert bad.status_code == replayed.status_code == 400
+    assert calls == [400]
+
+    for _ in range(2):
+        with pytest.raises(HTTPException):
+            asyncio.run(store.run("key-5xx", ENDPOINT, CALLER, PAYLOAD, lambda: fails(503)))
+    assert calls == [400, 503, 503]
+
+
+def test_no_key_always_runs(store):
+    producer = Producer()
+    asyncio.run(store.run(None, ENDPOINT, CALLER, PAYLOAD, producer))
+    asyncio.run(store.run(None, ENDPOINT, CALLER, PAYLOAD, producer))
+    assert producer.calls == 2
@@ -0,0 +1,128 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from app.models import QuizJob
+from app.services.job_queue import QuizJobQueue
+
+
+def make_queue() -> QuizJobQueue:
+    # No worker tasks: jobs are claimed by hand
+    return QuizJobQueue(workers=0, concurrency=1, max_attempts=3, poll_seconds=0.01, lease_seconds=60)
+
+
+def add_job(db, user, status: str, lease_in: float = None, attempts: int = 1) -> QuizJob:
+    job = QuizJob(
+        user_id=user.id, username=user.username, topic="arrays", level="beginner",
+        status=status, attempts=attempts,
+        lease_expires_at=datetime.now(timezone.utc) + timedelta(seconds=lease_in) if lease_in is not None else None
+    )
+    db.add(job)
+    db.commit()
+    return job
+
+
+def statuses(db) -> dict:
+    db.expire_all()
+    return {job.id: (job.status, job.attempts) for job in db.query(QuizJob).all()}
+
+
+def test_start_requeues_only_jobs_whose_lease_ran_out(db, make_user):
+    student = make_user()
+    live = add_job(db, student, "running", lease_in=30)
+    expired = add_job(db, student, "running", lease_in=-1)
+    unleased = add_job(db, student, "running")
+    exhausted = add_job(db, student, "running", lease_in=-1, attempts=3)
+
+    asyncio.run(make_queue().start())
+
+    assert statuses(db) == {
+        live.id: ("running", 1),
+        expired.id: ("queued", 1),
+        unleased.id: ("queued", 1),
+        exhausted.id: ("failed", 3),
+    }
+
+
+def test_idle_claim_picks_up_expired_jobs_and_leases_them(db, make_user):
+    student = make_user()
+    live = add_job(db, student, "running", lease_in=30)
+    expired = add_job(db, student, "running", lease_in=-1)
+    queue = make_queue()
+
+    assert queue._claim() == expired.id
+    assert queue._claim() is None
+
+    db.expire_all()
+    job = db.query(QuizJob).filter_by(id=expired.id).one()
+    assert (job.status, job.attempts) == ("running", 2)
+    assert job.lease_expires_at.replace(tzinfo=timezone.utc) > datetime.now(timezone.utc) + timedelta(seconds=50)
+    assert statuses(db)[live.id] == ("running", 1)
+
+
+def test_renewing_a_lease_keeps_the_job_claimed(db, make_user):
+    job = add_job(db, make_user(), "running", lease_in=1)
+    queue = make_queue()
+    queue._renew_lease(job.id)
+
+    assert queue._requeue_expired() == 0
+    db.expire_all()
+    assert db.query(QuizJob).filter_by(id=job.id).one().lease_expires_at.replace(tzinfo=timezone.utc) > (
+        datetime.now(timezone.utc) + timedelta(seconds=50)
+    )
+
+
+def test_stop_hands_running_jobs_back(db, make_user):
+    job = add_job(db, make_user(), "queued", attempts=0)
+    queue = make_queue()
+
+    async def run_and_stop():
+        await queue.start()
+        job_id = queue._claim()
+        started = asyncio.Event()
+
+        async def hang():
+            started.set()
+            await asyncio.sleep(60)
+
+        queue._running[job_id] = asyncio.create_task(hang())
+        await started.wait()
+        await queue.stop()
+
+    asyncio.run(run_and_stop())
+
+    assert statuses(db) == {job.id: ("queued", 0)}
+
+
+def test_running_a_job_keeps_its_db_work_off_the_event_loop(db, make_user):
+    job = add_job(db, make_user(), "running", lease_in=60)
+    job.num_questions = 3
+    db.commit()
+    queue = make_queue()
+    prepare = queue._prepare
+
+    def slow_prepare(job_id):
+        # Stand-in for a slow query or a locked database
+        time.sleep(0.2)
+        return prepare(job_id)
+
+    queue._prepare = slow_prepare
+
+    async def run() -> int:
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        await queue._run(job.id)
+        ticker.cancel()
+        return ticks
+
+    assert asyncio.run(run()) >= 10
+    db.expire_all()
+    finished = db.query(QuizJob).filter_by(id=job.id).one()
+    assert finished.status == "succeeded"
+    assert finished.quiz_session_id is not None
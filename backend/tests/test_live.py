@@ -0,0 +1,115 @@
+import asyncio
+import pytest
+from app.database import SessionLocal
+from app.models import QuizSession, QuizQuestion, AssignmentAnswer, ConceptMastery, ReviewItem
+from app.routes.live import TutorSocketSession, handle_quiz_answer
+from app.routes.quiz import grade_quiz
+from app.schemas.quiz import QuizAnswerSubmission
+from app.services.quiz_store import save_assignment
+from .helpers import questions_data
+
+
+class FakeSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_json(self, data):
+        self.sent.append(data)
+
+
+@pytest.fixture
+def live_session():
+    """Builds TutorSocketSessions on a fake socket, each with its own write session."""
+    sessions = []
+
+    def make(user) -> TutorSocketSession:
+        live = TutorSocketSession(FakeSocket(), user, SessionLocal())
+        sessions.append(live)
+        return live
+    yield make
+    for live in sessions:
+        live.db.close()
+
+
+def answer(live, quiz_id, number, letter) -> dict:
+    asyncio.run(handle_quiz_answer(live, number, {
+        "quiz_session_id": quiz_id, "question_number": number, "answer": letter
+    }))
+    return live.websocket.sent[-1]
+
+
+def attempt(db, student, teacher):
+    assignment = save_assignment(db, teacher_id=teacher.id, topic="arrays", level="beginner",
+                                 questions_data=questions_data(3))
+    quiz = QuizSession(user_id=student.id, assignment_id=assignment.id, topic="arrays",
+                       level="beginner", total_questions=3)
+    db.add(quiz)
+    db.commit()
+    return quiz
+
+
+def mastery_attempts(db) -> int:
+    db.expire_all()
+    return sum(m.attempts for m in db.query(ConceptMastery).all())
+
+
+def test_assignment_answers_are_stored_and_counted(db, make_user, live_session):
+    student, teacher = make_user("student"), make_user("teacher")
+    quiz = attempt(db, student, teacher)
+    live = live_session(student)
+
+    missed = answer(live, quiz.id, 1, "A")   # question 1's answer is "B"
+    right = answer(live, quiz.id, 2, "C")
+    live.flush()
+
+    assert missed["type"] == right["type"] == "done"
+    assert (missed["data"]["is_correct"], right["data"]["is_correct"]) == (False, True)
+    stored = {a.user_answer for a in db.query(AssignmentAnswer).filter_by(quiz_session_id=quiz.id)}
+    assert stored == {"A", "C"}
+    assert mastery_attempts(db) == 2
+    assert [r.question_text for r in db.query(ReviewItem).all()] == ["Question 1 about arrays?"]
+
+
+def test_changed_answer_counts_once(db, make_user, live_session):
+    student, teacher = make_user("student"), make_user("teacher")
+    quiz = attempt(db, student, teacher)
+    live = live_session(student)
+
+    answer(live, quiz.id, 1, "A")
+    live.flush()
+    answer(live, quiz.id, 1, "B")
+    live.flush()
+
+    answers = db.query(AssignmentAnswer).filter_by(quiz_session_id=quiz.id).all()
+    assert [(a.user_answer, a.is_correct) for a in answers] == [("B", True)]
+    assert mastery_attempts(db) == 1
+
+
+def test_submitting_after_live_answers_counts_each_question_once(db, make_user, make_quiz, live_session):
+    student = make_user("student")
+    quiz = make_quiz(student, count=3)
+    live = live_session(student)
+
+    answer(live, quiz.id, 1, "B")
+    live.flush()
+    asyncio.run(grade_quiz(QuizAnswerSubmission(
+        quiz_session_id=quiz.id, answers={"0": "B", "1": "C", "2": "A"}, time_taken=30
+    ), db))
+
+    assert mastery_attempts(db) == 3
+
+
+def test_live_answers_to_a_submitted_quiz_are_dropped(db, make_user, make_quiz, live_session):
+    student = make_user("student")
+    quiz = make_quiz(student, count=3)
+    live = live_session(student)
+
+    answer(live, quiz.id, 1, "A")
+    db.query(QuizSession).filter_by(id=quiz.id).update({"completed": True})
+    db.commit()
+    live.flush()
+
+    db.expire_all()
+    assert db.query(QuizQuestion).filter_by(quiz_session_id=quiz.id, question_number=1).one().user_answer is None
+    assert mastery_attempts(db) == 0
+    assert answer(live, quiz.id, 2, "C")["type"] == "error"
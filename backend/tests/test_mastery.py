@@ -0,0 +1,32 @@
+from app.database import SessionLocal
+from app.models import ConceptMastery, QuestionRating
+from app.services.mastery import update_mastery
+
+
+def answer(user_id: str, is_correct: bool) -> dict:
+    return {
+        "user_id": user_id,
+        "topic": "Arrays",
+        "concept": "Two  Pointers",
+        "question_text": "Which index moves first?",
+        "difficulty": "easy",
+        "is_correct": is_correct
+    }
+
+
+def test_rows_created_by_another_session_are_updated_in_place(db, make_user):
+    student = make_user()
+    other = SessionLocal()
+    try:
+        update_mastery(other, [answer(student.id, True)])
+        other.commit()
+        # Rows another submission created meanwhile are locked and updated
+        update_mastery(db, [answer(student.id, False), answer(student.id, True)])
+        db.commit()
+    finally:
+        other.close()
+
+    mastery = db.query(ConceptMastery).one()
+    assert (mastery.concept, mastery.topic, mastery.attempts, mastery.correct) == ("two pointers", "arrays", 3, 2)
+    rating = db.query(QuestionRating).one()
+    assert (rating.attempts, rating.correct) == (3, 2)
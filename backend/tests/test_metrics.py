@@ -0,0 +1,58 @@
+import asyncio
+import time
+from fastapi import APIRouter, FastAPI
+from pydantic import BaseModel, field_validator
+from app.metrics import MetricsMiddleware, TimedRoute
+
+
+class Slow(BaseModel):
+    value: int
+
+    @field_validator("value")
+    @classmethod
+    def slow(cls, value):
+        time.sleep(0.01)
+        return value
+
+
+router = APIRouter(route_class=TimedRoute)
+
+
+@router.get("/async", response_model=list[Slow])
+async def async_items(count: int):
+    return [{"value": i} for i in range(count)]
+
+
+@router.get("/sync", response_model=list[Slow])
+def sync_items(count: int):
+    return [{"value": i} for i in range(count)]
+
+
+def get(app, path: str) -> dict:
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http", "method": "GET", "path": path, "raw_path": path.encode(), "query_string": b"count=3",
+        "headers": [], "scheme": "http", "server": ("test", 80), "client": ("10.0.0.1", 5000),
+        "root_path": "", "http_version": "1.1"
+    }
+    asyncio.run(app(scope, receive, send))
+    return dict(sent[0]["headers"])
+
+
+def test_render_time_covers_response_model_validation():
+    app = FastAPI()
+    app.include_router(router)
+    app = MetricsMiddleware(app)
+
+    for path in ("/async", "/sync"):
+        timing = get(app, path)[b"server-timing"].decode()
+        render = next(part for part in timing.split(", ") if part.startswith("render;"))
+        # Three items, each validated against the response_model in 10 ms
+        assert float(render.split("dur=")[1]) >= 30
@@ -0,0 +1,195 @@
+import asyncio
+import json
+import pytest
+from app.rate_limit import SlidingWindowLimiter, SharedWindowLimiter, RateLimitMiddleware, _path_username, MAX_KEY_LENGTH
+from app.services.shared_state import MemoryState
+
+
+def test_retry_after_when_the_current_window_is_full():
+    limiter = SlidingWindowLimiter(limit=10, window_seconds=60, max_keys=10)
+    for _ in range(10):
+        limiter.add("alice", 1.0)
+
+    wait = limiter.retry_after("alice", 30.0)
+    # The next window starts at 60; by 66 only 90% of these 10 still count
+    assert wait == pytest.approx(36.0)
+    assert limiter.retry_after("alice", 30.0 + wait - 0.01) > 0
+    assert limiter.retry_after("alice", 30.0 + wait) == 0
+
+
+def test_retry_after_when_the_previous_window_still_overlaps():
+    limiter = SlidingWindowLimiter(limit=10, window_seconds=60, max_keys=10)
+    for _ in range(10):
+        limiter.add("alice", 1.0)
+    for _ in range(5):
+        limiter.add("alice", 90.0)
+
+    wait = limiter.retry_after("alice", 90.0)
+    # 5 this window + 10 * 50% of the last one: 4 of those must slide out
+    assert wait == pytest.approx(6.0)
+    assert limiter.retry_after("alice", 95.9) > 0
+    assert limiter.retry_after("alice", 96.0) == 0
+
+
+def test_no_limit_and_stale_windows():
+    assert SlidingWindowLimiter(limit=0, window_seconds=60, max_keys=10).retry_after("alice", 0.0) == 0
+    limiter = SlidingWindowLimiter(limit=2, window_seconds=60, max_keys=10)
+    limiter.add("alice", 1.0)
+    limiter.add("alice", 1.0)
+    assert limiter.retry_after("alice", 2.0) > 0
+    # Two windows later nothing from the first one counts
+    assert limiter.retry_after("alice", 121.0) == 0
+
+
+def test_least_recently_seen_key_is_dropped_at_max_keys():
+    limiter = SlidingWindowLimiter(limit=1, window_seconds=60, max_keys=2)
+    limiter.add("alice", 1.0)
+    limiter.add("bob", 1.0)
+    assert limiter.retry_after("alice", 2.0) > 0   # also marks alice as recently seen
+
+    limiter.add("carol", 3.0)
+
+    assert list(limiter._windows) == ["alice", "carol"]
+    assert limiter.retry_after("alice", 4.0) > 0
+    # bob's count was forgotten
+    assert limiter.retry_after("bob", 4.0) == 0
+
+
+@pytest.mark.parametrize("path, username", [
+    ("/api/profile/alice", "alice"),
+    ("/api/quiz/alice/history", "alice"),
+    ("/api/usage/alice/today", "alice"),
+    ("/api/profile/create", None),
+    ("/api/quiz/generate", None),
+    ("/api/quiz/jobs/123", None),
+    ("/api/quiz/review/submit", None),
+    ("/api/quiz/submit", None),
+    ("/api/usage/summary", None),
+    ("/api/usage/pregeneration", None),
+    ("/api/learning/lesson", None),
+    ("/api/profiles/alice", None),
+])
+def test_path_username_skips_route_segments(path, username):
+    assert _path_username(path) == username
+
+
+class App:
+    """Records the body each request reaches the route with."""
+
+    def __init__(self):
+        self.bodies = []
+
+    async def __call__(self, scope, receive, send):
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if not message.get("more_body", False):
+                break
+        self.bodies.append(body)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+
+def middleware(app, store=None, llm_per_ip=100) -> RateLimitMiddleware:
+    return RateLimitMiddleware(
+        app, window_seconds=60, llm_per_user=1, llm_per_ip=llm_per_ip, cheap_per_user=100, cheap_per_ip=100,
+        max_keys=100, store=store or MemoryState()
+    )
+
+
+async def post(limiter: RateLimitMiddleware, path: str, ip: str, chunks: list) -> int:
+    messages = [
+        {"type": "http.request", "body": chunk, "more_body": i < len(chunks) - 1}
+        for i, chunk in enumerate(chunks)
+    ]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": path, "client": (ip, 5000), "headers": []}
+    await limiter(scope, receive, send)
+    return sent[0]["status"]
+
+
+def test_username_is_read_from_the_body_and_the_body_replayed():
+    app = App()
+    limiter = middleware(app)
+    body = json.dumps({"username": "alice", "topic": "graphs"}).encode()
+
+    async def requests():
+        return [
+            await post(limiter, "/api/learning/lesson", "10.0.0.1", [body[:10], body[10:]]),
+            # Another IP, same username in the body
+            await post(limiter, "/api/learning/lesson", "10.0.0.2", [body]),
+            await post(limiter, "/api/learning/lesson", "10.0.0.3", [json.dumps({"username": "bob"}).encode()]),
+        ]
+
+    assert asyncio.run(requests()) == [200, 429, 200]
+    # The route saw the whole body, split or not; the rejected one never got there
+    assert app.bodies == [body, json.dumps({"username": "bob"}).encode()]
+
+
+def test_unreadable_bodies_fall_back_to_the_ip_limit():
+    app = App()
+    store = MemoryState()
+    limiter = middleware(app, store)
+    long_name = "x" * (MAX_KEY_LENGTH + 10)
+
+    async def requests():
+        return [
+            await post(limiter, "/api/learning/lesson", "10.0.0.1", [b"not json"]),
+            await post(limiter, "/api/learning/lesson", "10.0.0.1", [b"[1, 2]"]),
+            await post(limiter, "/api/learning/lesson", "10.0.0.1", [json.dumps({"username": 7}).encode()]),
+            await post(limiter, "/api/learning/lesson", "10.0.0.1", [json.dumps({"username": long_name}).encode()]),
+        ]
+
+    assert asyncio.run(requests()) == [200, 200, 200, 200]
+    user_keys = [key for key in store._data if key.startswith("ratelimit:llm:user:")]
+    assert len(user_keys) == 1
+    assert f":{long_name[:MAX_KEY_LENGTH]}:" in user_keys[0]
+
+
+def test_shared_limiter_matches_the_in_process_one():
+    local = SlidingWindowLimiter(limit=10, window_seconds=60, max_keys=10)
+    shared = SharedWindowLimiter("test", limit=10, window_seconds=60, store=MemoryState())
+    # Line the windows up with the shared limiter's wall-clock ones
+    start = 6000.0
+
+    async def run():
+        waits = []
+        for now in [start + 1] * 10 + [start + 90] * 6:
+            waits.append((await local.acquire("alice", now), await shared.acquire("alice", now)))
+        return waits
+
+    for local_wait, shared_wait in asyncio.run(run()):
+        assert shared_wait == pytest.approx(local_wait)
+
+
+def test_llm_limits_are_shared_between_workers():
+    app = App()
+    store = MemoryState()
+    workers = [middleware(app, store), middleware(app, store)]
+    body = json.dumps({"username": "alice"}).encode()
+
+    async def requests():
+        return [await post(worker, "/api/learning/lesson", "10.0.0.1", [body]) for worker in workers]
+
+    assert asyncio.run(requests()) == [200, 429]
+
+
+def test_a_rejected_username_gives_back_its_ip_slot():
+    app = App()
+    limiter = middleware(app, llm_per_ip=2)
+
+    async def requests():
+        return [
+            await post(limiter, "/api/learning/lesson", "10.0.0.1", [json.dumps({"username": name}).encode()])
+            for name in ("alice", "alice", "alice", "bob", "carol")
+        ]
+
+    assert asyncio.run(requests()) == [200, 429, 429, 200, 429]
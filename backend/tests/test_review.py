@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from app.models import QuizSession, QuizQuestion, ReviewItem, AppliedMigration
+from app.schema import _run_once
+from app.services.review import backfill_missed, due_reviews, schedule_missed
+from app.services.quiz_store import graded_answer
+
+
+def finish(db, quiz, days_ago: int, missed: list):
+    """Mark `quiz` as submitted `days_ago` with the given question numbers missed."""
+    quiz.completed = True
+    quiz.completed_at = datetime.now(timezone.utc) - timedelta(days=days_ago)
+    for question in quiz.questions:
+        question.is_correct = question.question_number not in missed
+    db.commit()
+
+
+def test_backfill_queues_old_misses_once_per_question(db, make_user, make_quiz):
+    student = make_user()
+    finish(db, make_quiz(student), days_ago=10, missed=[1, 2])
+    # The same questions again: question 1 missed a second time
+    finish(db, make_quiz(student), days_ago=5, missed=[1])
+
+    assert backfill_missed(db) == 2
+    db.commit()
+
+    items = {item.question_text: item for item in db.query(ReviewItem).all()}
+    assert sorted(items) == ["Question 1 about arrays?", "Question 2 about arrays?"]
+    assert (items["Question 1 about arrays?"].lapses, items["Question 2 about arrays?"].lapses) == (2, 1)
+    # Old enough that both are due now
+    assert len(due_reviews(db, student.id)) == 2
+    # Nothing left to do if it ever ran again
+    assert backfill_missed(db) == 0
+    db.commit()
+    assert db.query(ReviewItem).count() == 2
+
+
+def test_backfill_skips_questions_already_queued(db, make_user, make_quiz):
+    student = make_user()
+    quiz = make_quiz(student)
+    finish(db, quiz, days_ago=3, missed=[2])
+    question = db.query(QuizQuestion).filter_by(quiz_session_id=quiz.id, question_number=2).one()
+    # Scheduled live, before the older quiz below was backfilled
+    schedule_missed(db, [graded_answer(quiz, question, False)])
+    db.commit()
+    finish(db, make_quiz(student), days_ago=20, missed=[2, 3])
+
+    assert backfill_missed(db) == 1
+    db.commit()
+    assert sorted(item.question_text for item in db.query(ReviewItem).all()) == [
+        "Question 2 about arrays?", "Question 3 about arrays?"
+    ]
+
+
+def test_due_reviews_match_topic_however_it_is_spelled(db, make_user, make_quiz):
+    student = make_user()
+    quiz = make_quiz(student, topic="  Linked   Lists ")
+    question = quiz.questions[0]
+    schedule_missed(db, [graded_answer(quiz, question, False)])
+    db.commit()
+    # An item stored before topics were normalized
+    legacy = db.query(ReviewItem).one()
+    db.add(ReviewItem(
+        user_id=student.id, fingerprint="0" * 40, topic="Linked Lists", question_text="Old?",
+        options=question.options, correct_answer="A", due_at=datetime.now(timezone.utc) - timedelta(days=1)
+    ))
+    legacy.due_at = datetime.now(timezone.utc) - timedelta(days=1)
+    db.commit()
+
+    backfill_missed(db)
+    db.commit()
+
+    assert {item.topic for item in db.query(ReviewItem).all()} == {"linked lists"}
+    assert len(due_reviews(db, student.id, topic="LINKED lists")) == 2
+    assert due_reviews(db, student.id, topic="arrays") == []
+
+
+def test_one_off_migrations_run_once_per_database(db):
+    runs = []
+    _run_once("test_migration", runs.append)
+    _run_once("test_migration", runs.append)
+
+    assert len(runs) == 1
+    assert db.get(AppliedMigration, "test_migration") is not None
+
+
+def test_a_failed_migration_runs_again_next_time(db):
+    def fail(session):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        _run_once("test_migration", fail)
+    assert db.get(AppliedMigration, "test_migration") is None
+
+
+def test_a_question_missed_twice_in_one_batch_gets_one_item(db, make_user, make_quiz):
+    student = make_user()
+    quiz = make_quiz(student)
+    question = quiz.questions[0]
+    # Already queued from an earlier quiz, then missed twice more
+    schedule_missed(db, [graded_answer(quiz, question, False)])
+    db.commit()
+    schedule_missed(db, [graded_answer(quiz, question, False), graded_answer(quiz, question, False)])
+    db.commit()
+
+    item = db.query(ReviewItem).one()
+    assert item.lapses == 3
+    assert item.topic == "arrays"
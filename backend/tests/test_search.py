@@ -0,0 +1,85 @@
+from sqlalchemy import text
+from app.database import engine
+from app.models import LearningSession
+from app.services.search import ensure_search_index, search_sessions
+
+
+def add_session(db, user, topic: str, explanation: str) -> LearningSession:
+    session = LearningSession(user_id=user.id, topic=topic, level="beginner", explanation=explanation)
+    db.add(session)
+    db.commit()
+    return session
+
+
+def found(db, user, query: str) -> list:
+    return [row[0] for row in search_sessions(db, user.id, query)]
+
+
+def test_search_survives_vacuum_updates_and_deletes(db, make_user):
+    student = make_user()
+    sessions = [add_session(db, student, f"Topic {n}", f"Filler text number {n}.") for n in range(5)]
+    recursion = add_session(db, student, "Recursion", "A function that calls itself.")
+    # Free rowids so VACUUM renumbers the rows after them
+    for session in sessions[:3]:
+        db.delete(session)
+    db.commit()
+    with engine.connect() as conn:
+        conn.execute(text("VACUUM"))
+
+    assert found(db, student, "recursion") == [recursion.id]
+    assert sorted(found(db, student, "filler")) == sorted(s.id for s in sessions[3:])
+
+    recursion.explanation = "Base cases stop the calls."
+    db.commit()
+    assert found(db, student, "itself") == []
+    assert found(db, student, "base case") == [recursion.id]
+
+    db.delete(recursion)
+    db.commit()
+    assert found(db, student, "recursion") == []
+
+
+def test_rowid_keyed_index_is_replaced(db, make_user):
+    student = make_user()
+    graphs = add_session(db, student, "Graphs", "Nodes joined by edges.")
+    with engine.begin() as conn:
+        for statement in (
+            "DROP TRIGGER learning_sessions_fts_insert",
+            "DROP TRIGGER learning_sessions_fts_delete",
+            "DROP TRIGGER learning_sessions_fts_update",
+            "DROP TABLE learning_sessions_fts",
+            "CREATE VIRTUAL TABLE learning_sessions_fts USING fts5(topic, explanation,"
+            " content='learning_sessions', content_rowid='rowid')",
+        ):
+            conn.execute(text(statement))
+
+    ensure_search_index()
+
+    assert found(db, student, "edges") == [graphs.id]
+    # Already replaced: nothing is indexed twice
+    ensure_search_index()
+    assert found(db, student, "edges") == [graphs.id]
+
+
+def test_snippet_highlights_the_explanation_match(db, make_user):
+    student = make_user()
+    add_session(db, student, "Hashing", "Two keys landing in one bucket are called collisions.")
+
+    [row] = search_sessions(db, student.id, "collisions")
+
+    assert row[1] == "Hashing"
+    assert "<mark>collisions</mark>" in row[4]
+
+
+def test_topic_matches_rank_above_explanation_matches(db, make_user):
+    student = make_user()
+    # Sessions without the word, so it is rare enough to score
+    for topic in ("Graphs", "Queues", "Stacks", "Trees"):
+        add_session(db, student, topic, f"Notes on {topic.lower()}.")
+    in_body = add_session(db, student, "Arrays", "Sorting, then sorting again.")
+    in_topic = add_session(db, student, "Sorting", "Put the elements in order.")
+
+    rows = search_sessions(db, student.id, "sorting")
+
+    assert [row[0] for row in rows] == [in_topic.id, in_body.id]
+    assert rows[0][5] > rows[1][5]
@@ -0,0 +1,56 @@
+import asyncio
+import sqlite3
+import pytest
+from app.services.shared_state import SharedState, SQLiteState, MemoryState
+
+
+def test_backends_must_implement_every_method():
+    class Partial(SharedState):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_async_methods_match_the_plain_ones(tmp_path):
+    async def exercise(state: SharedState) -> list:
+        return [
+            await state.aadd("claim", 1, ttl=60),
+            await state.aadd("claim", 2, ttl=60),
+            await state.aget("claim"),
+            await state.aincr("count", 5),
+            await state.aincr("count"),
+            await state.aset("pool", {"a": [1]}),
+            await state.aget("pool"),
+            await state.adelete("claim"),
+            await state.aget("claim"),
+        ]
+
+    expected = [True, False, 1, 5, 6, None, {"a": [1]}, None, None]
+    assert asyncio.run(exercise(MemoryState())) == expected
+    assert asyncio.run(exercise(SQLiteState(str(tmp_path / "state.db")))) == expected
+
+
+def test_waiting_on_another_process_lock_does_not_block_the_event_loop(tmp_path):
+    path = str(tmp_path / "state.db")
+    state = SQLiteState(path)
+    state.set("warm", 1)
+    # Another worker holding the write lock
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+
+    async def claim_while_locked() -> tuple:
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.3, other.execute, "ROLLBACK")
+        claim = asyncio.create_task(state.aadd("claim", 1))
+        ticks = 0
+        while not claim.done():
+            ticks += 1
+            await asyncio.sleep(0.01)
+        return ticks, claim.result()
+
+    ticks, claimed = asyncio.run(claim_while_locked())
+    other.close()
+    assert claimed is True
+    assert ticks >= 10
@@ -0,0 +1,30 @@
+import threading
+from app.services.topic_index import TopicIndex
+
+
+def test_suggest_while_topics_are_added_from_other_threads():
+    index = TopicIndex()
+    index.add("Python", 50)
+    errors = []
+
+    def add_topics(worker: int):
+        for n in range(300):
+            index.add(f"python topic {worker} {n}", n % 7 + 1)
+
+    def suggest():
+        try:
+            for _ in range(300):
+                index.suggest("pyth")
+                index.suggest("pythn topic")
+        except Exception as exc:   # e.g. "dictionary changed size during iteration"
+            errors.append(exc)
+
+    threads = [threading.Thread(target=add_topics, args=(w,)) for w in range(3)]
+    threads += [threading.Thread(target=suggest) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert index.suggest("pyth", limit=1) == [("Python", 50)]
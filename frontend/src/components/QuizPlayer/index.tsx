@@ -62,7 +62,22 @@ export default function QuizPlayer({ username, topic, level, onComplete, onClose
         throw new Error(`HTTP error! status: ${response.status}`);
       }
 
-      const data = await response.json();
+      // Generation runs as a background job: poll it until the quiz is ready
+      let job = await response.json();
+      while (job.status === 'queued' || job.status === 'running') {
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        const jobResponse = await fetch(`${API_URL}/api/quiz/jobs/${job.id}`);
+        if (!jobResponse.ok) {
+          throw new Error(`HTTP error! status: ${jobResponse.status}`);
+        }
+        job = await jobResponse.json();
+      }
+
+      if (job.status !== 'succeeded') {
+        throw new Error(job.error || 'Quiz generation failed');
+      }
+
+      const data = job.quiz;
       console.log('Quiz response:', data);
       
       // Check for quiz_session_id in the response